@@ -0,0 +1,221 @@
+import sys
+import json
+import time
+import queue
+import random
+import argparse
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import pygame
+from arena_core import SCREEN_WIDTH, SCREEN_HEIGHT
+from arena_assets import encode_image, decode_image
+
+# Ad pipeline. A fetch thread keeps a small bounded queue of creatives
+# prefetched and decoded into Surfaces while the player is elsewhere, so
+# showing an ad never touches the network or a decoder in the frame loop.
+# Impressions go out on a queue too: a report thread sends them to the ad
+# source and only then books the revenue, at the CPM the creative was sold
+# for.
+#
+# A source is anything with fetch() -> creative dict and
+# report(impression). LocalAdSource makes creatives in-process, HttpAdSource
+# talks to an ad server such as the stub one below (python arena_ads.py).
+
+AD_SIZE = (SCREEN_WIDTH - 100, SCREEN_HEIGHT - 200)
+CPM_RANGE = (100, 2200)
+
+ADVERTISERS = [
+    ("Odin's Mead Hall", (120, 70, 20)),
+    ("Longship Outfitters", (20, 70, 120)),
+    ("Valhalla Insurance", (90, 20, 90)),
+    ("Runestone Bank", (30, 100, 60)),
+    ("Fjord Cruises", (20, 110, 130)),
+]
+
+class Ad:
+    def __init__(self, ad_id, title, cpm, surface):
+        self.id = ad_id
+        self.title = title
+        self.cpm = cpm  # booked CPM for this impression
+        self.surface = surface
+
+    @classmethod
+    def decode(cls, creative):
+        return cls(creative["id"], creative["title"], creative["cpm"], decode_image(creative["image"]))
+
+class LocalAdSource:
+    def __init__(self, rng=None, latency=0.0):
+        self.rng = rng or random.Random()
+        self.latency = latency  # simulated network delay per request
+        self.count = 0
+        self.lock = threading.Lock()
+        self.impressions = []
+
+    def fetch(self):
+        time.sleep(self.latency)
+        with self.lock:
+            self.count += 1
+            ad_id = f"ad-{self.count}"
+            title, color = self.rng.choice(ADVERTISERS)
+            cpm = round(self.rng.uniform(*CPM_RANGE), 2)
+        surf = pygame.Surface(AD_SIZE)
+        surf.fill((30, 30, 50))
+        pygame.draw.rect(surf, color, (20, 20, surf.get_width()-40, surf.get_height()-40))
+        pygame.draw.rect(surf, (212, 175, 55), (20, 20, surf.get_width()-40, surf.get_height()-40), 6)
+        return {"id": ad_id, "title": title, "cpm": cpm, "image": encode_image(surf)}
+
+    def report(self, impression):
+        time.sleep(self.latency)
+        with self.lock:
+            self.impressions.append(impression)
+
+class HttpAdSource:
+    def __init__(self, url, timeout=5.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def fetch(self):
+        with urllib.request.urlopen(self.url + "/ad", timeout=self.timeout) as response:
+            return json.load(response)
+
+    def report(self, impression):
+        request = urllib.request.Request(self.url + "/impression", data=json.dumps(impression).encode(),
+                                         headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+class AdPipeline:
+    def __init__(self, source, prefetch=3, on_impression=None, retry_delay=1.0, max_attempts=3):
+        # on_impression(impression) runs on the report thread once the source
+        # has accepted it
+        self.source = source
+        self.ready = queue.Queue(maxsize=prefetch)
+        self.outbox = queue.Queue()
+        self.on_impression = on_impression
+        self.retry_delay = retry_delay
+        self.max_attempts = max_attempts
+        self.stopping = threading.Event()
+        self.stats = {"fetched": 0, "served": 0, "no_fill": 0, "reported": 0,
+                      "fetch_errors": 0, "report_errors": 0, "dropped": 0, "booking_errors": 0}
+        self.threads = [threading.Thread(target=self.fetch_loop, name="ad-fetch", daemon=True),
+                        threading.Thread(target=self.report_loop, name="ad-report", daemon=True)]
+        for thread in self.threads:
+            thread.start()
+
+    def fetch_loop(self):
+        while not self.stopping.is_set():
+            try:
+                ad = Ad.decode(self.source.fetch())
+            except Exception:
+                self.stats["fetch_errors"] += 1
+                self.stopping.wait(self.retry_delay)
+                continue
+            self.stats["fetched"] += 1
+            # Blocks while the queue is full; wakes up regularly to notice close()
+            while not self.stopping.is_set():
+                try:
+                    self.ready.put(ad, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+
+    def report_loop(self):
+        while True:
+            impression = self.outbox.get()
+            if impression is None:
+                return
+            for attempt in range(self.max_attempts):
+                try:
+                    self.source.report(impression)
+                except Exception:
+                    self.stats["report_errors"] += 1
+                    if attempt + 1 < self.max_attempts:
+                        time.sleep(self.retry_delay)
+                    continue
+                self.stats["reported"] += 1
+                if self.on_impression:
+                    # A failed booking (say the ledger closed under us at
+                    # shutdown) must not stop the impressions behind it
+                    try:
+                        self.on_impression(impression)
+                    except Exception as error:
+                        self.stats["booking_errors"] += 1
+                        print(f"ad-report: could not book impression {impression.get('id')}: {error!r}",
+                              file=sys.stderr)
+                break
+            else:
+                self.stats["dropped"] += 1
+
+    def next_ad(self):
+        # A prefetched ad, or None if none is ready yet (never waits)
+        try:
+            ad = self.ready.get_nowait()
+        except queue.Empty:
+            self.stats["no_fill"] += 1
+            return None
+        self.stats["served"] += 1
+        return ad
+
+    def record_impression(self, ad):
+        self.outbox.put({"id": ad.id, "cpm": ad.cpm, "ts": time.time()})
+
+    def close(self, timeout=2.0):
+        # Stops fetching and gives queued impressions a chance to go out
+        self.stopping.set()
+        self.outbox.put(None)
+        for thread in self.threads:
+            thread.join(timeout)
+
+class StubAdHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == "/ad":
+            self.send_json(self.server.source.fetch())
+        elif self.path == "/stats":
+            self.send_json({"served": self.server.source.count,
+                            "impressions": self.server.source.impressions})
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        if self.path != "/impression":
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        self.server.source.report(json.loads(self.rfile.read(length)))
+        self.send_json({"ok": True})
+
+    def send_json(self, body):
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def stub_server(port=0, latency=0.0, seed=None):
+    # Local ad server for testing; port 0 picks a free one (server.server_port)
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubAdHandler)
+    server.source = LocalAdSource(random.Random(seed), latency)
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stub ad server for Viking Arena")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to delay each request")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    server = stub_server(args.port, args.latency, args.seed)
+    print(f"Serving ads on http://127.0.0.1:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
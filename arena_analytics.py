@@ -0,0 +1,175 @@
+import os
+import sys
+import csv
+import mmap
+import datetime
+import argparse
+from collections import deque
+from arena_core import ENTRY_FEE
+from arena_ledger import DEFAULT_LEDGER, decode, log_segments
+
+# Finance analytics over ledger logs. One streaming pass over any number of
+# log segments (see Ledger(archive=True)), read through mmap a line at a
+# time, so a multi-GB history costs no more memory than a small one: only
+# the current day's totals and the last `window` days of the rolling sums
+# are ever held. A row is emitted for each day as soon as it is complete.
+#
+# Per day:
+#   impressions, ad_revenue     booked ad impressions and what they paid
+#   ecpm                        ad revenue per thousand impressions
+#   entry_fees                  cash entry fees paid
+#   free_entries                tournaments entered on a free game
+#   free_game_cost              entry fees waived by those free entries
+#   ads_granted                 free games granted by the every-3-ads rule
+#   payouts, withdrawals        prizes paid and cash withdrawn
+#   margin                      ad revenue + entry fees - payouts
+#   rolling_revenue, rolling_margin   the same over the last `window` days
+
+FIELDS = ["day", "impressions", "ad_revenue", "ecpm", "entry_fees", "free_entries",
+          "free_game_cost", "ads_granted", "payouts", "withdrawals", "margin",
+          "rolling_revenue", "rolling_margin"]
+MONEY = ["ad_revenue", "ecpm", "entry_fees", "free_game_cost", "payouts", "withdrawals",
+         "margin", "rolling_revenue", "rolling_margin"]
+
+def read_lines(path):
+    # Every line of a file, including its newline, via mmap
+    if os.path.getsize(path) == 0:
+        return
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+        if hasattr(m, "madvise"):
+            m.madvise(mmap.MADV_SEQUENTIAL)
+        pos = 0
+        while True:
+            end = m.find(b"\n", pos)
+            if end < 0:
+                # Torn last line; decode() rejects it
+                if pos < len(m):
+                    yield m[pos:]
+                return
+            yield m[pos:end + 1]
+            pos = end + 1
+
+def day_totals(day):
+    return {"day": day, "impressions": 0, "ad_revenue": 0, "entry_fees": 0,
+            "free_entries": 0, "ads_granted": 0, "payouts": 0, "withdrawals": 0}
+
+class RevenueStats:
+    def __init__(self, window=7):
+        self.window = deque(maxlen=window)  # (revenue, margin) of recent days
+        self.current = None
+        self.day_start = self.day_end = None  # local midnights around the current day
+        self.totals = day_totals(None)  # over the whole history, in cents
+        self.records = 0
+        self.skipped = 0  # unreadable lines
+
+    def add(self, record):
+        # Returns the finished day's row when record starts a new day
+        self.records += 1
+        row = None
+        if self.current is None or not self.day_start <= record["ts"] < self.day_end:
+            row = self.close_day()
+            day = datetime.date.fromtimestamp(record["ts"])
+            self.day_start = datetime.datetime.combine(day, datetime.time()).timestamp()
+            self.day_end = datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time()).timestamp()
+            self.current = day_totals(day.isoformat())
+
+        delta = record.get("delta", {})
+        kind = record["kind"]
+        cur = self.current
+        if kind == "impression":
+            cur["impressions"] += 1
+            cur["ad_revenue"] += delta.get("owner_revenue", 0)
+        elif kind == "ad_view":
+            cur["ads_granted"] += delta.get("free_games", 0)
+        elif kind == "entry_fee":
+            cur["entry_fees"] -= delta.get("player_cash", 0)
+        elif kind == "free_entry":
+            cur["free_entries"] += 1
+        elif kind == "prize":
+            cur["payouts"] += delta.get("player_cash", 0)
+        elif kind == "withdrawal":
+            cur["withdrawals"] -= delta.get("player_cash", 0)
+        return row
+
+    def close_day(self):
+        if self.current is None:
+            return None
+        day = self.current
+        for key, value in day.items():
+            if key != "day":
+                self.totals[key] += value
+        revenue = day["ad_revenue"] + day["entry_fees"]
+        margin = revenue - day["payouts"]
+        self.window.append((revenue, margin))
+        self.current = None
+        return self.row(day, sum(r for r, _ in self.window), sum(m for _, m in self.window))
+
+    def row(self, day, rolling_revenue, rolling_margin):
+        # Money in dollars
+        revenue = day["ad_revenue"] + day["entry_fees"]
+        row = dict(day)
+        row["ecpm"] = day["ad_revenue"] / day["impressions"] * 1000 if day["impressions"] else 0
+        row["free_game_cost"] = day["free_entries"] * ENTRY_FEE * 100
+        row["margin"] = revenue - day["payouts"]
+        row["rolling_revenue"] = rolling_revenue
+        row["rolling_margin"] = rolling_margin
+        for key in MONEY:
+            row[key] = row[key] / 100
+        return row
+
+    def finish(self):
+        # Row for the last (partial) day, if any
+        return self.close_day()
+
+    def summary(self):
+        total = dict(self.totals, day="total")
+        revenue = total["ad_revenue"] + total["entry_fees"]
+        return self.row(total, revenue, revenue - total["payouts"])
+
+def daily_rows(paths, window=7, stats=None):
+    # Streams one row per day over the given log segments, in order
+    stats = stats or RevenueStats(window)
+    for path in paths:
+        for line in read_lines(path):
+            record = decode(line)
+            if record is None:
+                stats.skipped += 1
+                continue
+            row = stats.add(record)
+            if row:
+                yield row
+    row = stats.finish()
+    if row:
+        yield row
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Revenue and payout analytics over ledger logs")
+    parser.add_argument("paths", nargs="*", help="log segments in order (default: the game's ledger)")
+    parser.add_argument("--window", type=int, default=7, help="days in the rolling sums")
+    parser.add_argument("--csv", action="store_true", help="write CSV instead of a table")
+    args = parser.parse_args(argv)
+
+    paths = args.paths or log_segments(DEFAULT_LEDGER)
+    stats = RevenueStats(args.window)
+    if args.csv:
+        writer = csv.DictWriter(sys.stdout, FIELDS)
+        writer.writeheader()
+        for row in daily_rows(paths, stats=stats):
+            writer.writerow(row)
+        writer.writerow(stats.summary())
+        return
+
+    print(f"{'day':<12}{'impr':>8}{'ad rev':>11}{'eCPM':>10}{'fees':>12}{'free':>6}"
+          f"{'payouts':>11}{'withdrawn':>11}{'margin':>11}{'rolling':>11}")
+    for row in daily_rows(paths, stats=stats):
+        print_row(row)
+    print_row(stats.summary())
+    print(f"{stats.records} transactions, {stats.skipped} unreadable lines skipped")
+
+def print_row(row):
+    print(f"{row['day']:<12}{row['impressions']:>8}{row['ad_revenue']:>11.2f}{row['ecpm']:>10.2f}"
+          f"{row['entry_fees']:>12.2f}{row['free_entries']:>6}{row['payouts']:>11.2f}"
+          f"{row['withdrawals']:>11.2f}{row['margin']:>11.2f}{row['rolling_margin']:>11.2f}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,143 @@
+import os
+import json
+import time
+import zlib
+import base64
+import pygame
+
+# Lazy asset registry. Fonts, surfaces and even the display are registered
+# as loaders and only built the first time something asks for them, with the
+# time each one took recorded for the startup report.
+#
+# A baked bundle (see bake/load_bundle) stores the font files SysFont
+# resolved to and the pixels of every procedurally drawn image. With a bundle
+# loaded, fonts open straight from their file without the system font scan
+# and images are decoded instead of redrawn.
+
+def make_font(path, size, bold, italic):
+    # Same as the constructor SysFont uses
+    font = pygame.font.Font(path, size)
+    if bold:
+        font.set_bold(True)
+    if italic:
+        font.set_italic(True)
+    return font
+
+def encode_image(surface):
+    # JSON-friendly pixels: zlib-compressed and base64-encoded
+    mode = "RGBA" if surface.get_flags() & pygame.SRCALPHA else "RGB"
+    data = zlib.compress(pygame.image.tobytes(surface, mode))
+    return {"size": list(surface.get_size()), "mode": mode,
+            "data": base64.b64encode(data).decode("ascii")}
+
+def decode_image(image):
+    data = zlib.decompress(base64.b64decode(image["data"]))
+    return pygame.image.frombytes(data, tuple(image["size"]), image["mode"])
+
+class AssetRegistry:
+    def __init__(self):
+        self.loaders = {}
+        self.kinds = {}
+        self.loaded = {}
+        self.timings = {}  # name -> seconds spent in its own loader
+        self.loading = []  # stack of [name, seconds spent in nested loads]
+        self.font_specs = {}  # name -> (sysfont name, size, bold, italic)
+        self.resolved_fonts = {}  # name -> (path, size, bold, italic)
+        self.baked_images = {}
+
+    def register(self, name, loader, kind="asset"):
+        self.loaders[name] = loader
+        self.kinds[name] = kind
+        self.loaded.pop(name, None)
+
+    def font(self, name, sysname, size, bold=False, italic=False):
+        self.font_specs[name] = (sysname, size, bold, italic)
+        self.register(name, lambda: self.load_font(name), "font")
+
+    def image(self, name, loader):
+        # Procedurally drawn surfaces; a bundle can supply them pre-baked
+        def load():
+            if name in self.baked_images:
+                return self.baked_images[name]
+            return loader()
+        self.register(name, load, "image")
+
+    def load_font(self, name):
+        if not pygame.font.get_init():
+            pygame.font.init()
+        if name in self.resolved_fonts:
+            return make_font(*self.resolved_fonts[name])
+
+        def constructor(path, size, bold, italic):
+            self.resolved_fonts[name] = (path, size, bold, italic)
+            return make_font(path, size, bold, italic)
+        sysname, size, bold, italic = self.font_specs[name]
+        return pygame.font.SysFont(sysname, size, bold, italic, constructor=constructor)
+
+    def __getitem__(self, name):
+        if name in self.loaded:
+            return self.loaded[name]
+        if name not in self.loaders:
+            raise KeyError(name)
+
+        self.loading.append([name, 0.0])
+        start = time.perf_counter()
+        try:
+            asset = self.loaders[name]()
+        finally:
+            elapsed = time.perf_counter() - start
+            _, nested = self.loading.pop()
+            self.timings[name] = elapsed - nested
+            if self.loading:
+                self.loading[-1][1] += elapsed
+        self.loaded[name] = asset
+        return asset
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __contains__(self, name):
+        return name in self.loaders
+
+    def preload(self, names=None):
+        for name in names or list(self.loaders):
+            self[name]
+
+    def report(self):
+        # One line per loaded asset, slowest first, with a total
+        lines = []
+        for name, seconds in sorted(self.timings.items(), key=lambda item: -item[1]):
+            lines.append(f"{name:<20} {self.kinds[name]:<8} {seconds * 1000:8.2f} ms")
+        total = sum(self.timings.values())
+        lines.append(f"{'total':<20} {'':<8} {total * 1000:8.2f} ms")
+        return "\n".join(lines)
+
+    def bake(self, path):
+        # Write a bundle with every font's resolved file and every image's pixels
+        fonts = [name for name, kind in self.kinds.items() if kind == "font"]
+        images = [name for name, kind in self.kinds.items() if kind == "image"]
+        self.preload(fonts + images)
+
+        bundle = {"fonts": {name: list(self.resolved_fonts[name]) for name in fonts
+                            if name in self.resolved_fonts},
+                  "images": {}}
+        for name in images:
+            bundle["images"][name] = encode_image(self[name])
+        with open(path, "w") as f:
+            json.dump(bundle, f)
+
+    def load_bundle(self, path):
+        with open(path) as f:
+            bundle = json.load(f)
+        for name, (font_path, size, bold, italic) in bundle.get("fonts", {}).items():
+            # Fonts from another machine may not exist here; those still go
+            # through SysFont
+            if font_path is None or os.path.exists(font_path):
+                self.resolved_fonts[name] = (font_path, size, bold, italic)
+        for name, image in bundle.get("images", {}).items():
+            self.baked_images[name] = decode_image(image)
@@ -0,0 +1,170 @@
+import random
+import numpy as np
+from arena_core import (SCREEN_WIDTH, FIGHTER_WIDTH, VELOCITY, ATTACK_FRAMES, WEAPONS,
+                        Fighter, place_fighters, resolve_fight)
+
+# Batch fight engine: N AI-vs-AI bouts held in NumPy structured arrays and
+# advanced together, one frame per tick. The per-frame rules are the same as
+# Fighter.update/Fighter.move in arena_core, applied with array ops.
+
+FIGHTER_DTYPE = np.dtype([
+    ("x", np.int32),
+    ("health", np.int32),
+    ("cooldown", np.int32),
+    ("attack_frame", np.int32),
+    ("attacking", np.bool_),
+    ("direction", np.int8),
+    ("weapon", np.int8),
+    ("alive", np.bool_),
+])
+
+class WeaponTable:
+    # Column view of a weapon list, indexed by weapon id (position in the list)
+    def __init__(self, weapons=WEAPONS):
+        self.weapons = weapons
+        self.names = [w["name"] for w in weapons]
+        self.damage = np.array([w["damage"] for w in weapons], dtype=np.int32)
+        self.range = np.array([w["range"] for w in weapons], dtype=np.int32)
+        self.cooldown = np.array([60 // w["speed"] for w in weapons], dtype=np.int32)
+        # Same expression as Fighter.move so parity mode compares equal floats
+        self.hit_chance = np.array([0.9 + (w["speed"] - 5) * 0.02 for w in weapons])
+
+    def index(self, name):
+        return self.names.index(name)
+
+class BatchBouts:
+    # weapons1/weapons2 are weapon ids for side 0 and side 1 of each bout.
+    # In parity mode every bout owns a random.Random(seeds[i]) and draws its
+    # hit rolls in the same order as the scalar path, so results match
+    # scalar_resolve() bout for bout. Otherwise rolls come from one NumPy
+    # generator, which is much faster but only statistically equivalent.
+    def __init__(self, weapons1, weapons2, health1=100, health2=100, seed=None,
+                 parity=False, seeds=None, weapons=WEAPONS):
+        self.table = WeaponTable(weapons)
+        weapons1 = np.asarray(weapons1, dtype=np.int8)
+        weapons2 = np.asarray(weapons2, dtype=np.int8)
+        self.n = len(weapons1)
+
+        self.state = np.zeros((self.n, 2), dtype=FIGHTER_DTYPE)
+        self.state["weapon"][:, 0] = weapons1
+        self.state["weapon"][:, 1] = weapons2
+        self.state["health"][:, 0] = health1
+        self.state["health"][:, 1] = health2
+        self.state["alive"] = self.state["health"] > 0
+
+        # Opening positions, as in place_fighters
+        self.state["x"][:, 0] = SCREEN_WIDTH//4 - FIGHTER_WIDTH//2
+        self.state["x"][:, 1] = SCREEN_WIDTH*3//4 - FIGHTER_WIDTH//2
+        self.state["direction"][:, 0] = 1
+        self.state["direction"][:, 1] = -1
+
+        self.frame = 0
+        self.frames = np.zeros(self.n, dtype=np.int32)
+        self.winner = np.full(self.n, -1, dtype=np.int8)
+        self.winner[~self.state["alive"][:, 1]] = 0
+        self.winner[~self.state["alive"][:, 0]] = 1
+
+        self.parity = parity
+        if parity:
+            if seeds is None:
+                base = seed or 0
+                seeds = range(base, base + self.n)
+            self.rngs = [random.Random(s) for s in seeds]
+        else:
+            self.np_rng = np.random.default_rng(seed)
+
+    @property
+    def live(self):
+        return self.winner < 0
+
+    def rolls(self, idx):
+        if self.parity:
+            return np.array([self.rngs[i].random() for i in idx])
+        return self.np_rng.random(len(idx))
+
+    def update(self, side, live):
+        a = self.state[:, side]
+        attacking = live & a["attacking"]
+        a["attack_frame"][attacking] += 1
+        done = attacking & (a["attack_frame"] > ATTACK_FRAMES)
+        a["attacking"][done] = False
+        a["attack_frame"][done] = 0
+
+        cooling = live & (a["cooldown"] > 0)
+        a["cooldown"][cooling] -= 1
+
+    def move(self, side, live):
+        a = self.state[:, side]
+        target = self.state[:, 1 - side]
+        weapon = a["weapon"]
+
+        can_act = live & a["alive"] & ~a["attacking"]
+        dx = target["x"] - a["x"]
+        toward = np.where(dx > 0, 1, -1).astype(np.int8)
+        in_range = np.abs(dx) < self.table.range[weapon]
+
+        # Move toward target
+        walk = can_act & ~in_range
+        a["x"][walk] += VELOCITY * toward[walk]
+        a["direction"][walk] = toward[walk]
+
+        # Attack if in range and cooldown is done
+        idx = np.flatnonzero(can_act & in_range & (a["cooldown"] <= 0))
+        self.attack(side, idx, toward[idx], in_range[idx])
+
+    def attack(self, side, idx, toward, in_range):
+        # Fighter.attack for the bouts in idx; toward is each attacker's
+        # direction to its target and in_range whether the swing can land
+        if not len(idx):
+            return
+        a = self.state[:, side]
+        target = self.state[:, 1 - side]
+        w = a["weapon"][idx]
+        a["attacking"][idx] = True
+        a["attack_frame"][idx] = 0
+        a["cooldown"][idx] = self.table.cooldown[w]
+        a["direction"][idx] = toward
+
+        # A swing out of range can't land, and draws no roll
+        idx, w = idx[in_range], w[in_range]
+        hit = self.rolls(idx) < self.table.hit_chance[w]
+        idx, w = idx[hit], w[hit]
+        health = target["health"]
+        health[idx] -= self.table.damage[w]
+        dead = idx[health[idx] <= 0]
+        health[dead] = 0
+        target["alive"][dead] = False
+        self.winner[dead] = side
+        self.frames[dead] = self.frame + 1
+
+    def tick(self):
+        # One frame for every unfinished bout, in step_fight order
+        live = self.live
+        self.update(0, live)
+        self.update(1, live)
+        self.move(0, live)
+        self.move(1, live)
+        self.frame += 1
+
+    def run(self, max_frames=None):
+        # Tick until every bout is decided; returns (winner side, frames)
+        while self.live.any():
+            if max_frames is not None and self.frame >= max_frames:
+                break
+            self.tick()
+        return self.winner, self.frames
+
+def resolve_bouts(weapons1, weapons2, seed=None, parity=False, **kwargs):
+    return BatchBouts(weapons1, weapons2, seed=seed, parity=parity, **kwargs).run()
+
+def scalar_resolve(weapon1, weapon2, seed, health1=100, health2=100, weapons=WEAPONS):
+    # Reference bout through the scalar Fighter path, seeded the way parity
+    # mode seeds each bout. Returns (winner side, frames).
+    rng = random.Random(seed)
+    fighter1 = Fighter("A", weapon=weapons[weapon1], rng=rng)
+    fighter2 = Fighter("B", weapon=weapons[weapon2], rng=rng)
+    fighter1.health = health1
+    fighter2.health = health2
+    place_fighters(fighter1, fighter2)
+    winner, frames = resolve_fight(fighter1, fighter2)
+    return (0 if winner is fighter1 else 1), frames
@@ -0,0 +1,238 @@
+import os
+import sys
+import json
+import time
+import random
+import platform
+import argparse
+import subprocess
+
+# Render benchmarks draw to an offscreen display
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from arena_core import WEAPONS, Fighter, Tournament, place_fighters, resolve_fight
+from arena_resolver import resolve_fight_events
+
+# Benchmark suite for the hot paths: bout and tournament resolution, every
+# screen's draw method, cold start and peak memory. Results are written as
+# JSON and can be compared against a stored baseline; anything worse than
+# the baseline by more than the threshold counts as a regression and makes
+# the run exit non-zero.
+#
+#   python arena_bench.py --output results.json
+#   python arena_bench.py --baseline baseline.json --threshold 0.15
+
+RENDER_FRAMES = 300
+
+# Run by the cold-start benchmark in a fresh interpreter
+COLD_START = """
+import resource, time
+start = time.perf_counter()
+import viking_arena as va
+game = va.Game()
+game.draw_main_menu()
+game.renderer.present()
+elapsed = time.perf_counter() - start
+game.ads.close()
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+def throughput(run, min_time, repeat):
+    # Best operations/sec over `repeat` runs of at least min_time seconds;
+    # run() does a batch of work and returns how many operations it was
+    best = 0.0
+    for _ in range(repeat):
+        count = 0
+        start = time.perf_counter()
+        while True:
+            count += run()
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = max(best, count / elapsed)
+    return best
+
+def result(value, unit, higher_is_better=True):
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better}
+
+def bench_bouts(min_time, repeat):
+    # Frame-by-frame bouts (Fighter.move/update) for every weapon pairing
+    results = {}
+    for weapon1 in WEAPONS:
+        for weapon2 in WEAPONS:
+            rng = random.Random(0)
+            def run():
+                fighter1 = Fighter("A", weapon=weapon1, rng=rng)
+                fighter2 = Fighter("B", weapon=weapon2, rng=rng)
+                place_fighters(fighter1, fighter2)
+                resolve_fight(fighter1, fighter2)
+                return 1
+            name = f"sim.bouts.{weapon1['name'].lower()}_vs_{weapon2['name'].lower()}"
+            results[name] = result(throughput(run, min_time, repeat), "bouts/s")
+    return results
+
+def bench_tournaments(min_time, repeat):
+    results = {}
+    for label, resolver in [("stepped", resolve_fight), ("events", resolve_fight_events)]:
+        rng = random.Random(0)
+        def run():
+            Tournament(rng=rng).resolve(resolver=resolver)
+            return 1
+        results[f"sim.tournaments.{label}"] = result(throughput(run, min_time, repeat), "tournaments/s")
+    return results
+
+def render_states():
+    # (name, setup(game), draw(game)) for every screen
+    import viking_arena as va
+
+    def fight(game):
+        game.start_tournament()
+        game.tournament.start_next_fight()
+        game.state = va.FIGHT
+
+    def ad(game):
+        game.state = va.MAIN_MENU
+        game.watch_ad()
+
+    def results(game):
+        game.tournament_result = "Bjorn won the tournament"
+        game.state = va.RESULTS
+
+    def screen(state):
+        def setup(game):
+            game.state = state
+            if state == va.TOURNAMENT and game.tournament is None:
+                game.start_tournament()
+        return setup
+
+    return [
+        ("main_menu", screen(va.MAIN_MENU), va.Game.draw_main_menu),
+        ("character_select", screen(va.CHARACTER_SELECT), va.Game.draw_character_select),
+        ("tournament", screen(va.TOURNAMENT), va.Game.draw_tournament),
+        ("fight", fight, va.Game.draw_fight),
+        ("ad_screen", ad, va.Game.draw_ad_screen),
+        ("results", results, va.Game.draw_results),
+        ("withdraw", screen(va.WITHDRAW), va.Game.draw_withdraw),
+    ]
+
+def bench_render(min_time, repeat):
+    # Frames/sec of each screen, one simulation step per frame so fights and
+    # the ad countdown animate as they do in game
+    import viking_arena as va
+    va.assets.preload()
+    results = {}
+    for retained in (True, False):
+        mode = "retained" if retained else "immediate"
+        for name, setup, draw in render_states():
+            random.seed(0)
+            game = va.Game(retained=retained)
+            game.ledger.post("bench", {"player_cash": 10**9})  # plenty of entry fees
+            setup(game)
+            state = game.state
+
+            def run():
+                for _ in range(RENDER_FRAMES):
+                    game.update()
+                    if game.state != state:
+                        setup(game)
+                    draw(game)
+                    game.renderer.present()
+                return RENDER_FRAMES
+            results[f"render.{name}.{mode}"] = result(throughput(run, min_time, repeat), "fps")
+            game.ads.close()
+    return results
+
+def bench_cold_start(repeat):
+    # Median wall time from interpreter start to the first presented frame,
+    # and the largest peak RSS seen
+    times = []
+    peak_rss = 0
+    for _ in range(max(3, repeat)):
+        start = time.perf_counter()
+        output = subprocess.run([sys.executable, "-c", COLD_START], check=True,
+                                capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.split()
+        times.append(time.perf_counter() - start)
+        peak_rss = max(peak_rss, int(output[-1]))
+    times.sort()
+    return {
+        "startup.cold_start": result(times[len(times) // 2], "s", higher_is_better=False),
+        "startup.peak_rss": result(peak_rss * rss_scale() / 2**20, "MiB", higher_is_better=False),
+    }
+
+def rss_scale():
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return 1 if sys.platform == "darwin" else 1024
+
+SUITES = {
+    "bouts": lambda args: bench_bouts(args.min_time, args.repeat),
+    "tournaments": lambda args: bench_tournaments(args.min_time, args.repeat),
+    "render": lambda args: bench_render(args.min_time, args.repeat),
+    "startup": lambda args: bench_cold_start(args.repeat),
+}
+
+def run_suites(names, args):
+    results = {}
+    for name in names:
+        print(f"running {name}...", file=sys.stderr)
+        results.update(SUITES[name](args))
+    return results
+
+def compare(results, baseline, threshold):
+    # Returns (name, old, new, change) rows and the names that regressed.
+    # change is the relative improvement, so negative is worse.
+    rows = []
+    regressions = []
+    for name, current in sorted(results.items()):
+        if name not in baseline:
+            continue
+        old, new = baseline[name]["value"], current["value"]
+        if not old:
+            continue
+        change = (new - old) / old
+        if not current["higher_is_better"]:
+            change = -change
+        rows.append((name, old, new, change))
+        if change < -threshold:
+            regressions.append(name)
+    return rows, regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Viking Arena benchmark suite")
+    parser.add_argument("--suite", nargs="+", choices=list(SUITES), default=list(SUITES))
+    parser.add_argument("--min-time", type=float, default=0.5, help="seconds per measurement")
+    parser.add_argument("--repeat", type=int, default=3, help="measurements per benchmark (best is kept)")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--baseline", help="compare against a previous --output file")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown that counts as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_suites(args.suite, args)
+    report = {
+        "meta": {"python": platform.python_version(), "platform": platform.platform(),
+                 "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    for name, entry in sorted(results.items()):
+        print(f"{name:<40} {entry['value']:>12.2f} {entry['unit']}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        rows, regressions = compare(results, baseline, args.threshold)
+        print(f"\n{'benchmark':<40} {'baseline':>12} {'current':>12} {'change':>8}")
+        for name, old, new, change in rows:
+            mark = "  REGRESSION" if name in regressions else ""
+            print(f"{name:<40} {old:>12.2f} {new:>12.2f} {change:>+8.1%}{mark}")
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
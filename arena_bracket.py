@@ -0,0 +1,108 @@
+from collections import deque
+
+# Single-elimination bracket for any number of entrants, stored as an
+# array-indexed binary tree. With P the next power of two >= the entrant
+# count, leaves P..2P-1 hold entrants in seed order and internal node i (a
+# match) is fed by nodes 2i and 2i+1; node 1 is the final. Each node holds
+# the index of the entrant who reached it, or NOBODY while undecided.
+#
+# Byes go to the first P - N first-round matches, one per match, and are
+# settled immediately. Matches whose two entrants are known wait in a FIFO
+# queue, so finding the next match is O(1) amortized and recording a result
+# only touches the match's parent; nothing ever rescans the field.
+
+BYE = -1
+NOBODY = -2
+
+class Bracket:
+    def __init__(self, count):
+        if count < 1:
+            raise ValueError("a bracket needs at least one entrant")
+        self.count = count
+        self.size = 1
+        while self.size < count:
+            self.size *= 2
+        self.rounds = self.size.bit_length() - 1
+        self.slots = [NOBODY] * (2 * self.size)
+        self.ready = deque()  # matches in the order they became playable
+        self.waiting = set()  # the ones in ready not yet recorded
+        self.played = 0
+        if count == 1:
+            self.slots[1] = 0
+            return
+
+        # Seed the leaves, spreading byes across the first round
+        byes = self.size - count
+        entrant = 0
+        for match in range(self.size // 2):
+            left = self.size + 2 * match
+            self.slots[left] = entrant
+            entrant += 1
+            if match < byes:
+                self.slots[left + 1] = BYE
+            else:
+                self.slots[left + 1] = entrant
+                entrant += 1
+
+        # Settle byes, then queue the first round
+        for match in self.matches_in_round(0):
+            a, b = self.participants(match)
+            if b == BYE:
+                self.advance(match, a)
+            else:
+                self.queue(match)
+
+    def participants(self, match):
+        return self.slots[2 * match], self.slots[2 * match + 1]
+
+    def round_of(self, match):
+        # 0 for the first round, self.rounds - 1 for the final
+        return self.rounds - match.bit_length()
+
+    def matches_in_round(self, round_index):
+        return range(self.size >> (round_index + 1), self.size >> round_index)
+
+    def next_match(self):
+        # Results may be recorded out of order, so drop any already played
+        while self.ready and self.ready[0] not in self.waiting:
+            self.ready.popleft()
+        return self.ready[0] if self.ready else None
+
+    def playable(self):
+        # Every match whose entrants are known and that hasn't been recorded
+        self.ready = deque(match for match in self.ready if match in self.waiting)
+        return list(self.ready)
+
+    def winner_of(self, match):
+        winner = self.slots[match]
+        return None if winner == NOBODY else winner
+
+    def record(self, match, winner):
+        # winner is the index of the entrant that won the match
+        if match not in self.waiting:
+            raise ValueError(f"match {match} is not waiting to be played")
+        if winner not in self.participants(match):
+            raise ValueError(f"entrant {winner} is not in match {match}")
+        self.waiting.discard(match)
+        self.played += 1
+        self.advance(match, winner)
+
+    def queue(self, match):
+        self.ready.append(match)
+        self.waiting.add(match)
+
+    def advance(self, match, winner):
+        self.slots[match] = winner
+        parent = match // 2
+        if parent >= 1:
+            a, b = self.participants(parent)
+            if a != NOBODY and b != NOBODY:
+                self.queue(parent)
+
+    @property
+    def champion(self):
+        return self.winner_of(1)
+
+    @property
+    def finished(self):
+        return self.champion is not None
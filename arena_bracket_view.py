@@ -0,0 +1,243 @@
+import math
+import pygame
+from arena_bracket import BYE, NOBODY
+
+# Scrollable, zoomable view of a tournament bracket of any size.
+#
+# The layout is worked out once per bracket: match m of round r sits in
+# column r, centred between the two matches that feed it, in world
+# coordinates at zoom 1. Each match slot is rendered to its own small surface
+# and cached together with the bracket state it shows (its two entrants and
+# its winner), so a slot is only re-rendered when its own result changes.
+# Drawing walks just the columns and rows that intersect the viewport, so a
+# frame costs the same for 8 entrants or 1024. Zoom levels are discrete and
+# scaled slots are cached per level.
+#
+# key() is cheap and changes whenever the picture would, so the view can be
+# registered as a single DirtyRenderer widget.
+
+SLOT_WIDTH = 200
+SLOT_HEIGHT = 52
+COLUMN_PITCH = 240  # world x from one round to the next
+ROW_PITCH = 60  # world y between first-round matches
+HEADER_HEIGHT = 36  # round labels, pinned to the top of the viewport
+MARGIN = 10
+ZOOMS = [0.25, 0.35, 0.5, 0.7, 1.0, 1.4]
+
+SLOT_COLOR = (40, 40, 60)
+LINE_COLOR = (80, 80, 110)
+TEXT_COLOR = (255, 255, 255)
+PLAYER_COLOR = (220, 20, 60)
+LOSER_COLOR = (105, 105, 105)
+WINNER_COLOR = (50, 205, 50)
+NEXT_COLOR = (255, 215, 0)
+
+def round_name(round_index, rounds, short=False):
+    from_final = rounds - 1 - round_index
+    if from_final < 3:
+        return (["F", "SF", "QF"] if short else ["Finals", "Semi-Finals", "Quarter-Finals"])[from_final]
+    return f"R{round_index + 1}" if short else f"Round {round_index + 1}"
+
+class BracketView:
+    def __init__(self, tournament, viewport, font, label_font, background, render=None):
+        # viewport is the screen Rect the bracket is drawn in. render takes
+        # Font.render's arguments (pass a TextCache's render to share it).
+        self.tournament = tournament
+        self.bracket = tournament.bracket
+        self.viewport = pygame.Rect(viewport)
+        self.font = font
+        self.label_font = label_font
+        self.background = background
+        self.render = render or (lambda font, text, antialias, color: font.render(text, antialias, color))
+        self.slots = {}  # match -> (state, surface) at zoom 1
+        self.scaled = {}  # match -> (state, surface) at the current zoom
+        self.labels = {}  # (round, short) -> rendered round label
+        self.layout()
+
+        # Start zoomed to fit the bracket's height, or at full size when no
+        # listed zoom fits it
+        fits = [i for i, zoom in enumerate(ZOOMS) if zoom <= 1.0 and self.world_height * zoom <= self.body.height]
+        self.zoom_index = fits[-1] if fits else ZOOMS.index(1.0)
+        self.scroll_x = self.scroll_y = 0.0
+        self.focus(self.bracket.next_match())
+
+    def layout(self):
+        bracket = self.bracket
+        self.columns = [MARGIN + r * COLUMN_PITCH for r in range(bracket.rounds)]
+        self.spans = [ROW_PITCH << r for r in range(bracket.rounds)]  # row pitch per round
+        self.rects = [None] * bracket.size  # world Rect of every match node
+        for r in range(bracket.rounds):
+            first = bracket.size >> (r + 1)
+            for match in bracket.matches_in_round(r):
+                centre = MARGIN + (match - first + 0.5) * self.spans[r]
+                self.rects[match] = pygame.Rect(self.columns[r], round(centre - SLOT_HEIGHT / 2),
+                                                SLOT_WIDTH, SLOT_HEIGHT)
+        self.world_width = MARGIN * 2 + max(bracket.rounds - 1, 0) * COLUMN_PITCH + SLOT_WIDTH
+        self.world_height = MARGIN * 2 + (bracket.size // 2) * ROW_PITCH
+        self.body = pygame.Rect(self.viewport.x, self.viewport.y + HEADER_HEIGHT,
+                                self.viewport.width, self.viewport.height - HEADER_HEIGHT)
+
+    @property
+    def zoom(self):
+        return ZOOMS[self.zoom_index]
+
+    def key(self):
+        # Changes whenever draw() would draw something different
+        return (self.tournament, self.bracket.played, self.bracket.next_match(),
+                self.tournament.active_match, self.zoom_index, self.scroll_x, self.scroll_y)
+
+    # Navigation
+
+    def scroll(self, dx, dy):
+        # dx, dy in screen pixels
+        self.scroll_x += dx / self.zoom
+        self.scroll_y += dy / self.zoom
+        self.clamp()
+
+    def zoom_by(self, steps):
+        # Keeps the world point at the centre of the viewport where it is
+        centre_x = self.scroll_x + self.body.width / 2 / self.zoom
+        centre_y = self.scroll_y + self.body.height / 2 / self.zoom
+        index = min(max(self.zoom_index + steps, 0), len(ZOOMS) - 1)
+        if index == self.zoom_index:
+            return
+        self.zoom_index = index
+        self.scaled = {}
+        self.scroll_x = centre_x - self.body.width / 2 / self.zoom
+        self.scroll_y = centre_y - self.body.height / 2 / self.zoom
+        self.clamp()
+
+    def focus(self, match):
+        # Centre the viewport on a match (e.g. the next one to be fought)
+        if match is None or match < 1:
+            match = 1
+        rect = self.rects[match] if self.bracket.rounds else pygame.Rect(0, 0, SLOT_WIDTH, SLOT_HEIGHT)
+        self.scroll_x = rect.centerx - self.body.width / 2 / self.zoom
+        self.scroll_y = rect.centery - self.body.height / 2 / self.zoom
+        self.clamp()
+
+    def clamp(self):
+        # A bracket smaller than the viewport is centred in it
+        for axis, world, visible in (("scroll_x", self.world_width, self.body.width / self.zoom),
+                                     ("scroll_y", self.world_height, self.body.height / self.zoom)):
+            if world <= visible:
+                value = (world - visible) / 2
+            else:
+                value = min(max(getattr(self, axis), 0), world - visible)
+            setattr(self, axis, round(value * self.zoom) / self.zoom)
+
+    # Drawing
+
+    def visible_rounds(self):
+        left = self.scroll_x
+        right = left + self.body.width / self.zoom
+        first_round = max(0, math.floor((left - MARGIN - SLOT_WIDTH) / COLUMN_PITCH) + 1)
+        last_round = min(self.bracket.rounds - 1, math.floor((right - MARGIN) / COLUMN_PITCH))
+        return range(first_round, last_round + 1)
+
+    def visible_matches(self):
+        # (round, match) for every slot that intersects the viewport
+        top = self.scroll_y
+        bottom = top + self.body.height / self.zoom
+        for r in self.visible_rounds():
+            span = self.spans[r]
+            first = self.bracket.size >> (r + 1)
+            low = max(0, math.floor((top - MARGIN - SLOT_HEIGHT / 2) / span - 0.5))
+            high = min(first - 1, math.ceil((bottom - MARGIN + SLOT_HEIGHT / 2) / span - 0.5))
+            for match in range(first + low, first + high + 1):
+                yield r, match
+
+    def to_screen(self, x, y):
+        return (self.body.x + round((x - self.scroll_x) * self.zoom),
+                self.body.y + round((y - self.scroll_y) * self.zoom))
+
+    def slot_state(self, match):
+        a, b = self.bracket.participants(match)
+        return a, b, self.bracket.slots[match], match == self.bracket.next_match()
+
+    def slot_surface(self, match):
+        state = self.slot_state(match)
+        cached = self.scaled.get(match)
+        if cached and cached[0] == state:
+            return cached[1]
+        base = self.slots.get(match)
+        if not base or base[0] != state:
+            base = (state, self.render_slot(*state))
+            self.slots[match] = base
+        surface = base[1]
+        if self.zoom != 1.0:
+            size = (max(1, round(SLOT_WIDTH * self.zoom)), max(1, round(SLOT_HEIGHT * self.zoom)))
+            surface = pygame.transform.smoothscale(surface, size)
+        self.scaled[match] = (state, surface)
+        return surface
+
+    def render_slot(self, a, b, winner, is_next):
+        surface = pygame.Surface((SLOT_WIDTH, SLOT_HEIGHT))
+        surface.fill(self.background)
+        rect = surface.get_rect()
+        pygame.draw.rect(surface, SLOT_COLOR, rect, border_radius=5)
+        if is_next:
+            pygame.draw.rect(surface, NEXT_COLOR, rect, 2, border_radius=5)
+        decided = winner != NOBODY
+        for entrant, y in ((a, 1), (b, SLOT_HEIGHT // 2 + 1)):
+            if entrant == BYE:
+                text, color = "bye", LOSER_COLOR
+            elif entrant == NOBODY:
+                text, color = "...", LOSER_COLOR
+            else:
+                fighter = self.tournament.all_fighters[entrant]
+                text = fighter.name
+                color = PLAYER_COLOR if fighter.is_player else TEXT_COLOR
+                if decided and entrant != winner:
+                    color = LOSER_COLOR
+            surface.blit(self.render(self.font, text, True, color), (10, y))
+            if decided and entrant == winner and BYE not in (a, b):
+                mark = self.render(self.font, "WIN", True, WINNER_COLOR)
+                surface.blit(mark, (SLOT_WIDTH - mark.get_width() - 8, y))
+        return surface
+
+    def label(self, r, width):
+        # Full round name, or the short one when the column is too narrow
+        for short in (False, True):
+            if (r, short) not in self.labels:
+                self.labels[r, short] = self.render(self.label_font, round_name(r, self.bracket.rounds, short),
+                                                    True, TEXT_COLOR)
+            if self.labels[r, short].get_width() <= width or short:
+                return self.labels[r, short]
+
+    def draw_link(self, surface, match):
+        # The elbow from a match to the one its winner goes on to
+        rect, parent = self.rects[match], self.rects[match // 2]
+        mid_x = rect.right + (parent.left - rect.right) / 2
+        pygame.draw.lines(surface, LINE_COLOR, False, [
+            self.to_screen(rect.right, rect.centery), self.to_screen(mid_x, rect.centery),
+            self.to_screen(mid_x, parent.centery), self.to_screen(parent.left, parent.centery)])
+
+    def draw(self, surface):
+        # Draws into the viewport; returns the viewport Rect
+        clip = surface.get_clip()
+        surface.set_clip(self.body.clip(clip))
+        visible = list(self.visible_matches())
+        shown = {match for _, match in visible}
+
+        # Links into and out of every visible slot, then the slots on top
+        for r, match in visible:
+            if match > 1:
+                self.draw_link(surface, match)
+            if r > 0:
+                for child in (2 * match, 2 * match + 1):
+                    if child not in shown:
+                        self.draw_link(surface, child)
+        for r, match in visible:
+            rect = self.rects[match]
+            surface.blit(self.slot_surface(match), self.to_screen(rect.x, rect.y))
+
+        # Round labels over the columns in view
+        surface.set_clip(self.viewport.clip(clip))
+        for r in self.visible_rounds():
+            text = self.label(r, COLUMN_PITCH * self.zoom - 10)
+            x, _ = self.to_screen(self.columns[r] + SLOT_WIDTH / 2, 0)
+            surface.blit(text, (x - text.get_width() // 2, self.viewport.y + 4))
+
+        surface.set_clip(clip)
+        return self.viewport
@@ -0,0 +1,263 @@
+import random
+import datetime
+from arena_bracket import Bracket
+
+# Headless simulation core for Viking Arena.
+# Nothing in here touches pygame, so fights and whole tournaments can be
+# resolved on render-less machines and in worker processes. viking_arena.py
+# draws on top of these objects.
+
+# Arena geometry (shared with the renderer)
+SCREEN_WIDTH, SCREEN_HEIGHT = 1000, 700
+GROUND_HEIGHT = 100
+FPS = 60
+
+FIGHTER_WIDTH = 80
+FIGHTER_HEIGHT = 120
+VELOCITY = 5
+ATTACK_FRAMES = 20  # Attack animation lasts 20 frames
+ENTRY_FEE = 10  # USD
+
+# Weapon types (stats only; images live in the renderer)
+WEAPONS = [
+    {"name": "Sword", "damage": 25, "speed": 8, "range": 60},
+    {"name": "Axe", "damage": 35, "speed": 5, "range": 50},
+    {"name": "Spear", "damage": 20, "speed": 10, "range": 80}
+]
+
+AI_NAMES = ["Ragnar", "Bjorn", "Ivar", "Lagertha", "Floki", "Harald", "Erik", "Sigurd",
+            "Gunnar", "Sven", "Olaf", "Torsten", "Ubbe", "Hvitserk", "Halfdan"]
+
+class Fighter:
+    def __init__(self, name, is_player=False, weapon=None, rng=None):
+        # rng defaults to the global random module; pass a random.Random
+        # to make a fighter's weapon pick and hit rolls reproducible
+        self.rng = rng or random
+        self.name = name
+        self.is_player = is_player
+        self.health = 100
+        self.max_health = 100
+        self.weapon = weapon if weapon is not None else self.rng.choice(WEAPONS)
+        self.x = 0
+        self.y = SCREEN_HEIGHT - GROUND_HEIGHT - FIGHTER_HEIGHT
+        self.width = FIGHTER_WIDTH
+        self.height = FIGHTER_HEIGHT
+        self.velocity = VELOCITY
+        self.direction = 1  # 1 for right, -1 for left
+        self.attacking = False
+        self.attack_cooldown = 0
+        self.attack_frame = 0
+        self.wins = 0
+        self.alive = True
+
+    def move(self, target):
+        if self.attacking or not self.alive:
+            return
+
+        distance = abs(self.x - target.x)
+        in_range = distance < self.weapon["range"]
+
+        if not in_range:
+            # Move toward target
+            if self.x < target.x:
+                self.x += self.velocity
+                self.direction = 1
+            else:
+                self.x -= self.velocity
+                self.direction = -1
+        elif self.attack_cooldown <= 0:
+            # Attack if in range and cooldown is done
+            self.attack(target)
+
+    def attack(self, target):
+        self.attacking = True
+        self.attack_frame = 0
+        self.attack_cooldown = 60 // self.weapon["speed"]  # Frames until next attack
+        self.direction = 1 if target.x > self.x else -1
+
+        # A swing out of range can't land
+        if abs(self.x - target.x) >= self.weapon["range"]:
+            return
+        self.strike(target)
+
+    def strike(self, target):
+        # Calculate hit chance (90% base, modified by weapon speed)
+        hit_chance = 0.9 + (self.weapon["speed"] - 5) * 0.02
+        if self.rng.random() < hit_chance:
+            target.health -= self.weapon["damage"]
+            if target.health <= 0:
+                target.health = 0
+                target.alive = False
+                self.wins += 1
+
+    def update(self):
+        if self.attacking:
+            self.attack_frame += 1
+            if self.attack_frame > ATTACK_FRAMES:
+                self.attacking = False
+                self.attack_frame = 0
+
+        if self.attack_cooldown > 0:
+            self.attack_cooldown -= 1
+
+def place_fighters(fighter1, fighter2):
+    # Opening positions for a bout, facing each other
+    fighter1.x = SCREEN_WIDTH//4 - FIGHTER_WIDTH//2
+    fighter2.x = SCREEN_WIDTH*3//4 - FIGHTER_WIDTH//2
+    fighter1.direction = 1
+    fighter2.direction = -1
+    for fighter in (fighter1, fighter2):
+        fighter.attacking = False
+        fighter.attack_frame = 0
+        fighter.attack_cooldown = 0
+
+def step_fight(fighter1, fighter2, autopilot=False):
+    # Advance a bout by one frame. Human-controlled fighters are left alone
+    # unless autopilot is set, in which case the AI fights for them.
+    # Returns True once one of the fighters is down.
+    fighter1.update()
+    fighter2.update()
+
+    if autopilot or not fighter1.is_player:
+        fighter1.move(fighter2)
+    if autopilot or not fighter2.is_player:
+        fighter2.move(fighter1)
+
+    return not fighter1.alive or not fighter2.alive
+
+# Player commands, one per keypress. Also the opcodes replays store.
+MOVE_LEFT = 1
+MOVE_RIGHT = 2
+ATTACK = 3
+
+def apply_input(fighter, action, target):
+    # target is the fighter's opponent in the bout
+    if action == MOVE_LEFT:
+        fighter.x -= 10
+    elif action == MOVE_RIGHT:
+        fighter.x += 10
+    elif action == ATTACK:
+        if fighter.alive and not fighter.attacking and fighter.attack_cooldown <= 0:
+            fighter.attack(target)
+
+def player_of(fight):
+    # The human-controlled fighter of a bout, or None
+    for fighter in fight:
+        if fighter.is_player:
+            return fighter
+    return None
+
+def opponent_of(fight, fighter):
+    return fight[1] if fighter is fight[0] else fight[0]
+
+def resolve_fight(fighter1, fighter2, autopilot=True):
+    # Run a bout to completion, returning (winner, frames)
+    frames = 0
+    while fighter1.alive and fighter2.alive:
+        step_fight(fighter1, fighter2, autopilot)
+        frames += 1
+    return (fighter1 if fighter1.alive else fighter2), frames
+
+class Tournament:
+    def __init__(self, rng=None, entrants=8, include_player=True, players=None):
+        # Every random decision in the tournament (weapons, entrants, seeding,
+        # hit rolls) goes through rng, so a random.Random(seed) replays it.
+        # players names the human entrants (one "Player" by default); the
+        # rest of the field is AI.
+        self.rng = rng or random
+        self.entries = []
+        self.active_fight = None
+        self.active_match = None
+        self.winner = None
+        self.entry_fee = ENTRY_FEE
+        self.prize_pool = 0
+        self.start_date = datetime.date.today()
+
+        # Generate AI fighters
+        self.ai_names = list(AI_NAMES)
+
+        # Create players
+        if players is None:
+            players = ["Player"] if include_player else []
+        self.players = [Fighter(name, is_player=True, rng=rng) for name in players]
+        self.player = self.players[0] if self.players else None
+
+        # Create AI fighters
+        ai_count = entrants - len(self.players)
+        self.ai_fighters = [Fighter(name, rng=rng) for name in self.pick_names(ai_count)]
+        self.all_fighters = self.players + self.ai_fighters
+
+        # Setup tournament bracket
+        self.setup_bracket()
+
+    def pick_names(self, count):
+        if count <= len(self.ai_names):
+            return self.rng.sample(self.ai_names, count)
+        # Bigger fields reuse the names with a number
+        return [f"{self.ai_names[i % len(self.ai_names)]} {i + 1}" for i in range(count)]
+
+    def setup_bracket(self):
+        # Randomize the bracket
+        self.rng.shuffle(self.all_fighters)
+        self.bracket = Bracket(len(self.all_fighters))
+
+    @property
+    def current_round(self):
+        match = self.bracket.next_match()
+        return self.bracket.rounds if match is None else self.bracket.round_of(match)
+
+    @property
+    def rounds(self):
+        # Fighter pairs of every match whose two fighters are known, by round
+        rounds = []
+        for round_index in range(self.bracket.rounds):
+            matches = []
+            for match in self.bracket.matches_in_round(round_index):
+                a, b = self.bracket.participants(match)
+                if a >= 0 and b >= 0:
+                    matches.append((self.all_fighters[a], self.all_fighters[b]))
+            if not matches:
+                break
+            rounds.append(matches)
+        return rounds
+
+    def start_next_fight(self):
+        match = self.bracket.next_match()
+        if match is None:
+            # Tournament finished, determine winner
+            self.winner = self.get_tournament_winner()
+            return False
+
+        a, b = self.bracket.participants(match)
+        self.active_match = match
+        self.active_fight = (self.all_fighters[a], self.all_fighters[b])
+        place_fighters(*self.active_fight)
+        return True
+
+    def finish_fight(self):
+        # Called once the active bout has a loser; records the result and
+        # crowns the winner when the final has been fought
+        if self.active_fight is None:
+            return
+        fighter1, fighter2 = self.active_fight
+        if fighter1.alive and fighter2.alive:
+            return
+
+        a, b = self.bracket.participants(self.active_match)
+        self.bracket.record(self.active_match, a if fighter1.alive else b)
+        self.active_fight = None
+        self.active_match = None
+        if self.bracket.finished:
+            self.winner = self.get_tournament_winner()
+
+    def get_tournament_winner(self):
+        champion = self.bracket.champion
+        return None if champion is None else self.all_fighters[champion]
+
+    def resolve(self, autopilot=True, resolver=resolve_fight):
+        # Fight every remaining bout headlessly and return the champion.
+        # resolver can be swapped for arena_resolver.resolve_fight_events.
+        while self.start_next_fight():
+            resolver(*self.active_fight, autopilot=autopilot)
+            self.finish_fight()
+        return self.winner
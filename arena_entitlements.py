@@ -0,0 +1,214 @@
+import sys
+import time
+import heapq
+import datetime
+import argparse
+from zoneinfo import ZoneInfo
+from arena_ledger import Ledger
+
+# Daily free games, worked out on access instead of polled.
+#
+# A wallet's free-game balance goes back to DAILY_FREE_GAMES at the first
+# local midnight after its last reset. Rather than checking the date every
+# frame (or every wallet every day), the service keeps only the timestamp of
+# each wallet's last reset and answers balance() by comparing the clock with
+# the next local midnight after it, which is computed once per reset and
+# cached. The reset is written to the ledger (as the same "free_game_reset"
+# transaction the game always posted) just before anything changes the
+# balance, so ledger history and analytics see it where it belongs.
+#
+# Midnight is local to the wallet: its time zone is an IANA name stored with
+# the wallet, or the service's default zone (None means the machine's own).
+# Days of 23 or 25 hours around DST changes come out right because the next
+# reset is found by calendar date, not by adding 24 hours.
+#
+# The clock is any callable returning POSIX seconds, so tests can drive time
+# by hand (ManualClock). ResetScheduler is a timer heap for work that has to
+# happen at the reset itself, such as telling online players their free
+# games are back; nothing else needs it.
+
+DAILY_FREE_GAMES = 3
+
+class ManualClock:
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+def next_midnight(stamp, zone=None):
+    # POSIX time of the first midnight in zone strictly after stamp
+    local = datetime.datetime.fromtimestamp(stamp, zone)
+    midnight = datetime.datetime.combine(local.date() + datetime.timedelta(days=1), datetime.time(), zone)
+    return midnight.timestamp()
+
+class Entitlements:
+    def __init__(self, ledger, clock=time.time, default_zone=None, daily=DAILY_FREE_GAMES):
+        self.ledger = ledger
+        self.clock = clock
+        self.default_zone = default_zone
+        self.daily = daily
+        self.zones = {}  # IANA name -> ZoneInfo
+        self.resets = {}  # account -> (last reset, zone name, next reset)
+
+    def keys(self, account):
+        # Ledger fields of a wallet: the game's own (account None), or one
+        # player's among many on a server
+        if account is None:
+            return "free_games", "last_free_reset", "timezone"
+        return f"free:{account}", f"free_reset:{account}", f"tz:{account}"
+
+    def zone(self, name):
+        if name is None:
+            return self.default_zone
+        if name not in self.zones:
+            self.zones[name] = ZoneInfo(name)
+        return self.zones[name]
+
+    def next_reset(self, account):
+        # When the wallet's balance next goes back to the daily amount, or
+        # None for a wallet that has never been reset
+        _, reset_key, zone_key = self.keys(account)
+        state = self.ledger.state
+        stamp = state.get(reset_key)
+        if stamp is None:
+            return None
+        zone_name = state.get(zone_key)
+        cached = self.resets.get(account)
+        if cached and cached[0] == stamp and cached[1] == zone_name:
+            return cached[2]
+        due = next_midnight(stamp, self.zone(zone_name))
+        self.resets[account] = (stamp, zone_name, due)
+        return due
+
+    def due(self, account, now=None):
+        due = self.next_reset(account)
+        return due is not None and (self.clock() if now is None else now) >= due
+
+    def balance(self, account=None):
+        if self.due(account):
+            return self.daily
+        return self.ledger.state.get(self.keys(account)[0], 0)
+
+    def reset_fields(self, account, now=None):
+        # The fields a reset sets, for folding into a larger transaction
+        games_key, reset_key, _ = self.keys(account)
+        return {games_key: self.daily, reset_key: self.clock() if now is None else now}
+
+    def settle(self, account=None):
+        # Writes a pending reset to the ledger; call before changing the
+        # balance. Returns the balance.
+        now = self.clock()
+        if self.due(account, now):
+            self.ledger.post("free_game_reset", set=self.reset_fields(account, now), account=account)
+        return self.ledger.state.get(self.keys(account)[0], 0)
+
+    def open(self, account=None, zone=None):
+        # Starts the daily cycle for a wallet that has never been reset
+        _, reset_key, zone_key = self.keys(account)
+        if self.ledger.state.get(reset_key) is None:
+            fields = {reset_key: self.clock()}
+            if zone:
+                fields[zone_key] = zone
+            self.ledger.post("open", set=fields, account=account)
+
+    def set_zone(self, account, zone):
+        # A player who moves keeps today's balance; the next reset follows
+        # the new zone's midnight
+        self.settle(account)
+        self.ledger.post("timezone", set={self.keys(account)[2]: zone}, account=account)
+
+class ResetScheduler:
+    # Timer heap of upcoming resets. on_reset(account) runs once per wallet
+    # per reset, from run_due(); rescheduling a wallet leaves its old entry
+    # in the heap, which is skipped when it comes up.
+    def __init__(self, entitlements, on_reset):
+        self.entitlements = entitlements
+        self.on_reset = on_reset
+        self.heap = []  # (due, order, account)
+        self.scheduled = {}  # account -> due
+        self.order = 0
+
+    def schedule(self, account, due=None):
+        due = due if due is not None else self.entitlements.next_reset(account)
+        if due is None:
+            return
+        self.scheduled[account] = due
+        self.order += 1
+        heapq.heappush(self.heap, (due, self.order, account))
+
+    def cancel(self, account):
+        self.scheduled.pop(account, None)
+
+    def run_due(self, now=None):
+        # Fires every reset that is due; returns how many fired
+        now = self.entitlements.clock() if now is None else now
+        fired = 0
+        while self.heap and self.heap[0][0] <= now:
+            due, _, account = heapq.heappop(self.heap)
+            if self.scheduled.get(account) != due:
+                continue
+            self.on_reset(account)
+            fired += 1
+            zone_key = self.entitlements.keys(account)[2]
+            zone = self.entitlements.zone(self.entitlements.ledger.state.get(zone_key))
+            # From now, not from the missed reset, so days a wallet sat
+            # idle through fire once rather than once each
+            self.schedule(account, next_midnight(max(due, now), zone))
+        return fired
+
+    def next_due(self):
+        # Earliest pending reset, for deciding how long to sleep
+        while self.heap and self.scheduled.get(self.heap[0][2]) != self.heap[0][0]:
+            heapq.heappop(self.heap)
+        return self.heap[0][0] if self.heap else None
+
+def benchmark(accounts=100000, days=3, seed_time=1_760_000_000.0):
+    # Wallets spread over a few zones, every one scheduled, then `days` of
+    # resets fired; returns timings
+    zones = ["UTC", "Europe/Oslo", "America/New_York", "Asia/Kolkata", "Australia/Adelaide"]
+    clock = ManualClock(seed_time)
+    service = Entitlements(Ledger(None), clock, default_zone=ZoneInfo("UTC"))
+    fields = {}
+    for i in range(accounts):
+        fields.update({f"free_reset:{i}": seed_time, f"tz:{i}": zones[i % len(zones)], f"free:{i}": 0})
+    service.ledger.post("open", set=fields)
+
+    fired = []
+    scheduler = ResetScheduler(service, fired.append)
+    start = time.perf_counter()
+    for i in range(accounts):
+        scheduler.schedule(i)
+    schedule_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(accounts):
+        service.balance(i)
+    lookup_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(days * 24):
+        clock.advance(3600)
+        scheduler.run_due()
+    fire_time = time.perf_counter() - start
+    return {
+        "accounts": accounts,
+        "schedule_us": schedule_time / accounts * 1e6,
+        "balance_us": lookup_time / accounts * 1e6,
+        "resets_fired": len(fired),
+        "fire_us": fire_time / max(len(fired), 1) * 1e6,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Free-game reset scheduling benchmark")
+    parser.add_argument("--accounts", type=int, default=100000)
+    parser.add_argument("--days", type=int, default=3)
+    args = parser.parse_args(argv)
+    for key, value in benchmark(args.accounts, args.days).items():
+        print(f"{key:<14} {value:,.2f}" if isinstance(value, float) else f"{key:<14} {value:,}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
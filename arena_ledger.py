@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+import time
+import zlib
+import argparse
+import threading
+
+# Durable wallet for the player and the house. Every change to a balance
+# (entry fees, prizes, ad views, withdrawals, free-game resets) is posted as
+# a transaction and appended to a write-ahead log, one checksummed JSON line
+# each.
+#
+# Posting only applies the transaction to the in-memory state and queues the
+# line; a writer thread group-commits whatever has queued up every
+# flush_interval seconds (or sooner once batch_size lines are waiting) with a
+# single write and fsync, so the game loop never waits on the disk. A crash
+# loses at most the last flush_interval of transactions.
+#
+# Balances are always read from the materialized state. Every snapshot_every
+# transactions the writer saves that state with the sequence number it covers
+# and starts a new log, either truncating the old one or, with archive set,
+# keeping it as path.<last seq> for analytics (see arena_analytics). On open,
+# the snapshot is loaded and the log replayed on top of it, stopping at the
+# first torn or corrupt line.
+
+DEFAULT_LEDGER = os.path.join(os.path.expanduser("~"), ".local", "share", "viking_arena", "ledger.wal")
+
+# Money is kept in whole cents so balances never drift
+MONEY_FIELDS = ("player_cash", "owner_revenue")
+
+DEFAULT_STATE = {
+    "player_cash": 0,
+    "owner_revenue": 0,
+    "free_games": 3,
+    "last_free_reset": None,  # POSIX time of the last daily free-game reset
+    "total_ads_watched": 0,
+    "ad_count": 0,
+    "ad_set_count": 0,
+}
+
+def cents(dollars):
+    return int(round(dollars * 100))
+
+def encode(record):
+    payload = json.dumps(record, sort_keys=True, separators=(",", ":"))
+    return f"{zlib.crc32(payload.encode()):08x} {payload}\n".encode()
+
+DECODER = json.JSONDecoder()
+
+def decode(line):
+    # Returns None for a torn or corrupt line
+    if not line.endswith(b"\n"):
+        return None
+    crc, _, payload = line[:-1].partition(b" ")
+    try:
+        if int(crc, 16) != zlib.crc32(payload):
+            return None
+        # raw_decode skips json.loads' encoding sniffing and whitespace
+        # handling, a large share of the cost on long logs
+        return DECODER.raw_decode(payload.decode())[0]
+    except ValueError:
+        return None
+
+def archive_path(path, seq):
+    # Archived segments sort in log order
+    return f"{path}.{seq:012d}"
+
+def log_segments(path):
+    # Archived segments of a ledger, oldest first, then the live log
+    directory = os.path.dirname(path) or "."
+    prefix = os.path.basename(path) + "."
+    archived = sorted(name for name in os.listdir(directory)
+                      if name.startswith(prefix) and name[len(prefix):].isdigit())
+    segments = [os.path.join(directory, name) for name in archived]
+    if os.path.exists(path):
+        segments.append(path)
+    return segments
+
+def apply(state, record):
+    for name, delta in record.get("delta", {}).items():
+        state[name] = state.get(name, 0) + delta
+    state.update(record.get("set", {}))
+
+class Ledger:
+    def __init__(self, path=DEFAULT_LEDGER, flush_interval=0.05, batch_size=256,
+                 snapshot_every=1000, fsync=True, archive=False):
+        # path=None keeps everything in memory (nothing is persisted)
+        self.path = path
+        self.snapshot_path = path and path + ".snapshot"
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.snapshot_every = snapshot_every
+        self.fsync = fsync
+        self.archive = archive
+        self.state = dict(DEFAULT_STATE)
+        self.seq = 0  # last transaction posted
+        self.durable_seq = 0  # last transaction on disk
+        self.snapshot_seq = 0
+        self.snapshot_requested = False
+        self.pending = []
+        self.lock = threading.Lock()
+        self.wake = threading.Condition(self.lock)
+        self.flushed = threading.Condition(self.lock)
+        self.closed = False
+        self.error = None
+        self.writer = None
+        if path is None:
+            return
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.recover()
+        self.wal = open(path, "ab")
+        self.writer = threading.Thread(target=self.write_loop, name="ledger-writer", daemon=True)
+        self.writer.start()
+
+    def recover(self):
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+            self.state.update(snapshot["state"])
+            self.seq = self.snapshot_seq = snapshot["seq"]
+        if not os.path.exists(self.path):
+            return
+
+        good = 0  # byte offset of the end of the last intact line
+        with open(self.path, "rb") as f:
+            for line in f:
+                record = decode(line)
+                if record is None:
+                    break
+                good += len(line)
+                if record["seq"] > self.seq:
+                    apply(self.state, record)
+                    self.seq = record["seq"]
+        if good < os.path.getsize(self.path):
+            # Drop the torn tail so new lines don't follow garbage
+            with open(self.path, "r+b") as f:
+                f.truncate(good)
+        self.durable_seq = self.seq
+
+    def __getitem__(self, name):
+        return self.state[name]
+
+    def post(self, kind, delta=None, set=None, **details):
+        # delta adds to fields, set overwrites them. Returns the transaction.
+        with self.lock:
+            if self.closed:
+                raise ValueError("ledger is closed")
+            if self.error:
+                raise self.error
+            self.seq += 1
+            record = {"seq": self.seq, "ts": time.time(), "kind": kind}
+            if delta:
+                record["delta"] = delta
+            if set:
+                record["set"] = set
+            if details:
+                record["details"] = details
+            apply(self.state, record)
+            if self.path is None:
+                self.durable_seq = self.seq
+                return record
+            self.pending.append(encode(record))
+            if len(self.pending) >= self.batch_size:
+                self.wake.notify()
+        return record
+
+    def write_loop(self):
+        while True:
+            with self.lock:
+                if not self.pending and not self.closed:
+                    self.wake.wait(self.flush_interval)
+                if not self.pending and self.closed:
+                    return
+                batch, self.pending = self.pending, []
+                seq = self.seq
+                snapshot = None
+                if self.snapshot_requested or seq - self.snapshot_seq >= self.snapshot_every:
+                    self.snapshot_requested = False
+                    snapshot = {"seq": seq, "state": dict(self.state)}
+            try:
+                self.commit(batch, snapshot)
+            except OSError as error:
+                with self.lock:
+                    self.error = error
+                    self.flushed.notify_all()
+                return
+            with self.lock:
+                self.durable_seq = seq
+                if snapshot:
+                    self.snapshot_seq = seq
+                self.flushed.notify_all()
+
+    def commit(self, batch, snapshot):
+        if batch:
+            self.wal.write(b"".join(batch))
+            self.wal.flush()
+            if self.fsync:
+                os.fsync(self.wal.fileno())
+        if snapshot:
+            tmp = self.snapshot_path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(snapshot, f)
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            os.replace(tmp, self.snapshot_path)
+            # Everything in the log is now covered by the snapshot
+            if self.archive and self.wal.tell():
+                self.wal.close()
+                os.replace(self.path, archive_path(self.path, snapshot["seq"]))
+                self.wal = open(self.path, "ab")
+            else:
+                self.wal.truncate(0)
+
+    def flush(self, timeout=None):
+        # Block until every transaction posted so far is on disk
+        with self.lock:
+            target = self.seq
+            self.wake.notify()
+            while self.durable_seq < target and not self.error:
+                if not self.flushed.wait(timeout):
+                    return False
+            if self.error:
+                raise self.error
+        return True
+
+    def checkpoint(self):
+        # Snapshot now and start a fresh log
+        if self.path is None:
+            return
+        with self.lock:
+            target = self.seq
+            self.snapshot_requested = True
+            self.wake.notify()
+            while self.snapshot_seq < target and not self.error:
+                self.flushed.wait()
+            if self.error:
+                raise self.error
+
+    def close(self):
+        if self.closed:
+            return
+        with self.lock:
+            self.closed = True
+            self.wake.notify()
+        if self.writer:
+            self.writer.join()
+            self.wal.close()
+        self.closed = True
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect the Viking Arena ledger")
+    parser.add_argument("path", nargs="?", default=DEFAULT_LEDGER)
+    parser.add_argument("--checkpoint", action="store_true", help="compact the log into a snapshot")
+    args = parser.parse_args(argv)
+
+    ledger = Ledger(args.path)
+    if args.checkpoint:
+        ledger.checkpoint()
+    for name, value in ledger.state.items():
+        if name in MONEY_FIELDS:
+            value = f"${value / 100:.2f}"
+        print(f"{name:<20} {value}")
+    print(f"{'transactions':<20} {ledger.seq}")
+    ledger.close()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
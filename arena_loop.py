@@ -0,0 +1,60 @@
+import time
+import math
+from arena_core import FPS
+
+# Fixed-timestep driver for the game loop. Real time is accumulated every
+# render frame and spent in whole simulation steps of 1/rate seconds, so a
+# bout plays out the same however fast or slow frames are drawn. speed
+# scales how much simulated time passes per real second (fast-forward), and
+# the per-frame step budget stops a slow machine from spiralling: once it is
+# used up, the remaining backlog is dropped rather than carried over.
+
+SPEEDS = [1, 2, 4, 8]
+
+class FixedTimestep:
+    def __init__(self, rate=FPS, speed=1.0, max_steps=5, max_frame_time=0.25,
+                 time_source=time.perf_counter):
+        self.dt = 1.0 / rate
+        self.speed = speed
+        self.max_steps = max_steps
+        self.max_frame_time = max_frame_time
+        self.time_source = time_source
+        self.accumulator = 0.0
+        self.last_time = None
+        self.steps = 0  # total steps run
+        self.dropped = 0  # steps discarded by the spiral guard
+
+    def reset(self):
+        self.accumulator = 0.0
+        self.last_time = None
+
+    def step_budget(self):
+        # Fast-forward needs proportionally more steps per frame
+        return self.max_steps * max(1, math.ceil(self.speed))
+
+    def advance(self):
+        # Returns how many simulation steps to run this frame
+        now = self.time_source()
+        if self.last_time is None:
+            self.last_time = now
+        frame_time = min(now - self.last_time, self.max_frame_time)
+        self.last_time = now
+
+        self.accumulator += frame_time * self.speed
+        steps = min(int(self.accumulator / self.dt), self.step_budget())
+        self.accumulator -= steps * self.dt
+        if self.accumulator >= self.dt:
+            # Overloaded: give up on the backlog instead of chasing it
+            backlog = int(self.accumulator / self.dt)
+            self.dropped += backlog
+            self.accumulator -= backlog * self.dt
+        self.steps += steps
+        return steps
+
+    @property
+    def alpha(self):
+        # How far between the last two steps the current frame falls
+        return self.accumulator / self.dt
+
+def lerp(previous, current, alpha):
+    return previous + (current - previous) * alpha
@@ -0,0 +1,198 @@
+import sys
+import time
+import random
+import argparse
+from bisect import bisect_left, bisect_right
+from arena_core import AI_NAMES, FIGHTER_WIDTH, SCREEN_WIDTH, VELOCITY, Fighter
+
+# Free-for-all melee: many fighters in one arena, each going for its nearest
+# enemy with the same move/attack rules as a 1v1 bout (Fighter.move closes
+# in on the target and swings once it is inside weapon range). In a crowd a
+# swing is a cleave: it can land on every enemy within reach on the side the
+# fighter faces, each with its own hit roll.
+#
+# Comparing every fighter against every other would be O(n^2) a tick. The
+# arena is one-dimensional, so instead the living fighters are kept sorted by
+# x (a sweep line). After a tick fighters have moved at most a step, so the
+# list is nearly sorted and re-sorting it is close to linear. The nearest
+# enemy is then found by walking outwards from a fighter's own slot until the
+# first fighter of another team turns up on each side, and everything a swing
+# could reach is a bisect away. The per-tick cost grows roughly linearly with the
+# number of fighters; `python arena_melee.py --bench` shows it.
+#
+# Targets are picked from the start-of-tick positions, so the outcome does
+# not depend on which fighter happens to act first in the sweep.
+
+class SweepIndex:
+    def __init__(self, fighters=()):
+        self.order = list(fighters)
+        self.xs = []
+        self.slot = {}
+        self.rebuild()
+
+    def rebuild(self):
+        # Drops the dead and restores x order
+        order = [f for f in self.order if f.alive]
+        order.sort(key=lambda f: f.x)
+        self.order = order
+        self.xs = [f.x for f in order]
+        self.slot = {f: i for i, f in enumerate(order)}
+
+    def within(self, x, reach):
+        # Living fighters with |f.x - x| <= reach, as of the last rebuild
+        return self.order[bisect_left(self.xs, x - reach):bisect_right(self.xs, x + reach)]
+
+    def nearest_enemy(self, fighter, team):
+        # Closest fighter whose team differs from team[fighter], or None
+        order, xs = self.order, self.xs
+        own = team[fighter]
+        i = self.slot[fighter]
+        x = xs[i]
+        left = i - 1
+        while left >= 0 and team[order[left]] == own:
+            left -= 1
+        right = i + 1
+        while right < len(order) and team[order[right]] == own:
+            right += 1
+        if left < 0:
+            return order[right] if right < len(order) else None
+        if right >= len(order) or x - xs[left] <= xs[right] - x:
+            return order[left]
+        return order[right]
+
+class NaiveIndex(SweepIndex):
+    # Nearest enemies by comparing all pairs, for checking and comparison
+    def nearest_enemy(self, fighter, team):
+        best = None
+        for other in self.order:
+            if team[other] != team[fighter]:
+                if best is None or abs(other.x - fighter.x) < abs(best.x - fighter.x):
+                    best = other
+        return best
+
+class Melee:
+    def __init__(self, count=50, teams=None, width=None, rng=None):
+        # teams=None is every fighter for themselves; otherwise fighters are
+        # dealt round-robin into that many teams. width defaults to 60 px of
+        # arena per fighter, and never less than the screen.
+        self.rng = rng or random.Random()
+        self.width = width or max(SCREEN_WIDTH, count * 60)
+        self.fighters = []
+        self.team = {}
+        for i in range(count):
+            name = AI_NAMES[i % len(AI_NAMES)] + (f" {i // len(AI_NAMES) + 1}" if count > len(AI_NAMES) else "")
+            fighter = Fighter(name, rng=self.rng)
+            fighter.x = self.rng.randrange(0, self.width - FIGHTER_WIDTH)
+            fighter.direction = self.rng.choice((1, -1))
+            self.fighters.append(fighter)
+            self.team[fighter] = i % teams if teams else i
+        self.index = SweepIndex(self.fighters)
+        self.ticks = 0
+        self.winner = None  # the winning team, once decided
+
+    @property
+    def alive(self):
+        return self.index.order
+
+    def teams_alive(self):
+        return {self.team[f] for f in self.index.order}
+
+    def step(self):
+        # One tick; returns True once at most one team is left standing
+        fighters = self.index.order
+        for fighter in fighters:
+            fighter.update()
+        targets = [self.index.nearest_enemy(fighter, self.team) for fighter in fighters]
+        for fighter, target in zip(fighters, targets):
+            if target is None or not target.alive or fighter.attacking or not fighter.alive:
+                continue
+            if abs(fighter.x - target.x) >= fighter.weapon["range"]:
+                fighter.move(target)  # out of range, so this only closes in
+            elif fighter.attack_cooldown <= 0:
+                self.swing(fighter, target)
+        for fighter in fighters:
+            fighter.x = min(max(fighter.x, 0), self.width - FIGHTER_WIDTH)
+        self.index.rebuild()
+        self.ticks += 1
+
+        teams = self.teams_alive()
+        if len(teams) <= 1:
+            self.winner = teams.pop() if teams else None
+            return True
+        return False
+
+    def swing(self, fighter, target):
+        # Fighter.attack, landing on every enemy in reach on the side facing
+        # the target. The index holds start-of-tick positions and anyone may
+        # have stepped since, so candidates come from a step further out and
+        # are checked against where they are now.
+        fighter.attacking = True
+        fighter.attack_frame = 0
+        fighter.attack_cooldown = 60 // fighter.weapon["speed"]
+        fighter.direction = 1 if target.x > fighter.x else -1
+        reach = fighter.weapon["range"]
+        own = self.team[fighter]
+        for other in self.index.within(fighter.x, reach + VELOCITY):
+            gap = other.x - fighter.x
+            if (other.alive and self.team[other] != own and abs(gap) < reach
+                    and gap * fighter.direction >= 0):
+                fighter.strike(other)
+
+    def resolve(self, max_ticks=None):
+        # Fight it out headless; returns the winning team
+        while not self.step():
+            if max_ticks is not None and self.ticks >= max_ticks:
+                break
+        return self.winner
+
+def tick_cost(count, ticks=200, seed=0, naive=False):
+    # Mean seconds per tick over the first `ticks` ticks of a melee. The
+    # arena grows with the field, so fighter density stays the same.
+    melee = Melee(count, rng=random.Random(seed))
+    if naive:
+        melee.index = NaiveIndex(melee.fighters)
+    start = time.perf_counter()
+    for _ in range(ticks):
+        if melee.step():
+            break
+    return (time.perf_counter() - start) / melee.ticks
+
+def benchmark(counts=(50, 100, 200, 500, 1000, 2000), ticks=200, seed=0, naive_up_to=500):
+    rows = []
+    for count in counts:
+        sweep = tick_cost(count, ticks, seed)
+        naive = tick_cost(count, ticks, seed, naive=True) if count <= naive_up_to else None
+        rows.append((count, sweep, naive))
+    return rows
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Free-for-all melee and its per-tick cost")
+    parser.add_argument("--fighters", type=int, default=100)
+    parser.add_argument("--teams", type=int, help="fight in teams instead of every fighter for themselves")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--bench", action="store_true", help="time a tick at growing fighter counts")
+    parser.add_argument("--ticks", type=int, default=200, help="ticks timed per count with --bench")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        print(f"{'fighters':>8}{'us/tick':>12}{'us/fighter':>12}{'naive us/tick':>15}")
+        for count, sweep, naive in benchmark(ticks=args.ticks, seed=args.seed):
+            naive_text = f"{naive * 1e6:>15.0f}" if naive is not None else f"{'-':>15}"
+            print(f"{count:>8}{sweep * 1e6:>12.0f}{sweep * 1e6 / count:>12.2f}{naive_text}")
+        return
+
+    melee = Melee(args.fighters, args.teams, rng=random.Random(args.seed))
+    start = time.perf_counter()
+    winner = melee.resolve()
+    elapsed = time.perf_counter() - start
+    survivors = melee.alive
+    if args.teams:
+        print(f"team {winner} wins with {len(survivors)} standing after {melee.ticks} ticks")
+    else:
+        print(f"{survivors[0].name if survivors else 'nobody'} wins after {melee.ticks} ticks")
+    top = max(melee.fighters, key=lambda f: f.wins)
+    print(f"most kills: {top.name} ({top.wins})")
+    print(f"resolved in {elapsed * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,375 @@
+import os
+import sys
+import json
+import time
+import random
+import datetime
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from arena_core import ENTRY_FEE, WEAPONS, Fighter, place_fighters
+from arena_bracket import Bracket, BYE
+from arena_ledger import Ledger, encode, decode
+from arena_entitlements import Entitlements
+from arena_resolver import resolve_fight_events
+from arena_runner import tournament_seed
+
+# The scheduled monthly tournament. Over the month, registrations are only
+# appended to an entry queue (one checksummed line each, as in the ledger),
+# so signing up costs a buffered write. When the month is over, settle():
+#
+#   1. reads the queue, keeps each player's first entry, and validates all of
+#      them against the accounts ledger at once: a free game is used if the
+#      player has one, otherwise the entry fee is charged, otherwise the
+#      entry is rejected. Every charge is posted as ONE transaction.
+#   2. seeds the accepted field into one bracket and resolves it round by
+#      round, each round's matches spread over a process pool. Every match
+#      draws from its own random.Random seeded from the event seed and the
+#      match number, so results don't depend on the worker count.
+#   3. posts every payout as one more transaction.
+#
+# Accounts live in their own Ledger, keyed per player as cash:<id> (cents)
+# and free:<id> (free games, with their daily reset as in arena_entitlements).
+# Markers in the same transactions record which steps are done, so settling
+# again after a crash neither charges nor pays twice.
+
+DEFAULT_EVENT_DIR = os.path.join(os.path.expanduser("~"), ".local", "share", "viking_arena", "monthly")
+
+# Share of the prize pool by finishing place: the champion, the runner-up,
+# the two beaten semi-finalists and the four beaten quarter-finalists
+PAYOUT_SHARES = [0.5, 0.2, 0.1, 0.1, 0.025, 0.025, 0.025, 0.025]
+
+def month_of(date):
+    return f"{date.year:04d}-{date.month:02d}"
+
+def cash_key(player):
+    return f"cash:{player}"
+
+def free_key(player):
+    return f"free:{player}"
+
+class EntryQueue:
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.file = open(path, "ab", buffering=1 << 20)
+
+    def add(self, player, name):
+        self.file.write(encode({"player": player, "name": name, "ts": time.time()}))
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def read_entries(path):
+    # Every intact entry, in the order they were queued
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            record = decode(line)
+            if record is not None:
+                yield record
+
+def resolve_chunk(seed, jobs):
+    # jobs are (match, weapon a, health a, weapon b, health b); returns
+    # (match, a won, winner's health after the bout) for each
+    results = []
+    for match, weapon_a, health_a, weapon_b, health_b in jobs:
+        rng = random.Random(tournament_seed(seed, match))
+        fighter1 = Fighter("a", weapon=WEAPONS[weapon_a], rng=rng)
+        fighter2 = Fighter("b", weapon=WEAPONS[weapon_b], rng=rng)
+        fighter1.health, fighter2.health = health_a, health_b
+        place_fighters(fighter1, fighter2)
+        winner, _ = resolve_fight_events(fighter1, fighter2)
+        results.append((match, winner is fighter1, winner.health))
+    return results
+
+class MonthlyTournament:
+    def __init__(self, month, accounts, directory=DEFAULT_EVENT_DIR, entry_fee=ENTRY_FEE, seed=None,
+                 entitlements=None):
+        # month is "YYYY-MM". accounts is the Ledger holding players' cash
+        # and free games. seed defaults to one derived from the month.
+        self.month = month
+        self.accounts = accounts
+        self.entitlements = entitlements or Entitlements(accounts, default_zone=datetime.timezone.utc)
+        self.directory = directory
+        self.entry_fee = entry_fee
+        self.seed = tournament_seed(month, 0) if seed is None else seed
+        self.entries_path = os.path.join(directory, f"{month}.entries")
+        self.field_path = os.path.join(directory, f"{month}.field.json")
+        self.results_path = os.path.join(directory, f"{month}.results.json")
+        self.queue = None
+        self.field = []  # accepted entrants: [player, name, weapon id], in seed order
+        self.rejected = 0
+        self.bracket = None
+        self.health = []
+        self.timings = {}  # seconds per settle() step
+
+    @property
+    def status(self):
+        return self.accounts.state.get(f"monthly:{self.month}", "open")
+
+    @property
+    def prize_pool(self):
+        # In cents; every accepted entry counts, as in the game
+        return len(self.field) * self.entry_fee * 100
+
+    def register(self, player, name):
+        if self.status != "open":
+            raise ValueError(f"the {self.month} tournament is closed")
+        if self.queue is None:
+            self.queue = EntryQueue(self.entries_path)
+        self.queue.add(player, name)
+
+    def close(self):
+        # Flushes queued registrations to disk
+        if self.queue:
+            self.queue.close()
+            self.queue = None
+
+    def settle(self, workers=None, chunksize=1024):
+        # Close registration, play the tournament and pay out; returns the
+        # results. Safe to call again if a previous attempt was interrupted.
+        self.close()
+        if self.status == "paid":
+            # Final: charged and paid out already, so nothing is posted again
+            return self.paid_results(workers, chunksize)
+
+        start = time.perf_counter()
+        if self.status == "charged":
+            self.load_field()
+        else:
+            self.close_entries()
+        self.timings["entries"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self.resolve(workers, chunksize)
+        self.timings["resolve"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = self.pay_out()
+        self.timings["payouts"] = time.perf_counter() - start
+        return results
+
+    def close_entries(self):
+        state = self.accounts.state
+        entitlements = self.entitlements
+        fee = self.entry_fee * 100
+        now = entitlements.clock()
+        seen = set()
+        accepted = []
+        delta = {}
+        fields = {f"monthly:{self.month}": "charged"}
+        self.rejected = 0
+        for entry in read_entries(self.entries_path):
+            player = entry["player"]
+            if player in seen:
+                continue
+            seen.add(player)
+            if entitlements.balance(player) > 0:
+                if entitlements.due(player, now):
+                    # Today's reset hasn't been written yet; write it spent
+                    fields.update(entitlements.reset_fields(player, now))
+                    fields[free_key(player)] -= 1
+                else:
+                    delta[free_key(player)] = -1
+            elif state.get(cash_key(player), 0) >= fee:
+                delta[cash_key(player)] = -fee
+            else:
+                self.rejected += 1
+                continue
+            accepted.append((player, entry["name"]))
+
+        # Seed the field; the weapon picks come from the event seed too
+        rng = random.Random(self.seed)
+        rng.shuffle(accepted)
+        self.field = [[player, name, rng.randrange(len(WEAPONS))] for player, name in accepted]
+        with open(self.field_path, "w") as f:
+            json.dump({"seed": self.seed, "rejected": self.rejected, "field": self.field}, f)
+
+        self.accounts.post("monthly_entries", delta, set=fields,
+                           month=self.month, accepted=len(self.field), rejected=self.rejected)
+        self.accounts.flush()
+
+    def load_field(self):
+        with open(self.field_path) as f:
+            saved = json.load(f)
+        self.seed = saved["seed"]
+        self.rejected = saved["rejected"]
+        self.field = saved["field"]
+
+    def paid_results(self, workers=None, chunksize=1024):
+        # The saved results, or when they are missing or unreadable the same
+        # results rebuilt from the saved field, which plays out identically
+        try:
+            with open(self.results_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+        try:
+            self.load_field()
+        except (OSError, ValueError, KeyError) as error:
+            raise ValueError(f"the {self.month} tournament is paid but its field can't be read: {error}")
+        self.resolve(workers, chunksize)
+        results = self.results()
+        self.save_results(results)
+        return results
+
+    def resolve(self, workers=None, chunksize=1024):
+        # workers=0 plays every match in-process
+        if not self.field:
+            return
+        self.bracket = Bracket(len(self.field))
+        self.health = [100] * len(self.field)
+        if workers == 0:
+            self.play_rounds(map, chunksize)
+            return
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+            self.play_rounds(pool.map, chunksize)
+
+    def play_rounds(self, run, chunksize):
+        bracket, field, health = self.bracket, self.field, self.health
+        while not bracket.finished:
+            # Every playable match is in the same round, so they can all run at once
+            jobs = []
+            for match in bracket.playable():
+                a, b = bracket.participants(match)
+                jobs.append((match, field[a][2], health[a], field[b][2], health[b]))
+            chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+            for results in run(resolve_chunk, [self.seed] * len(chunks), chunks):
+                for match, first_won, remaining in results:
+                    a, b = bracket.participants(match)
+                    winner = a if first_won else b
+                    health[winner] = remaining
+                    bracket.record(match, winner)
+
+    def standings(self):
+        # Entrant indices by finishing place, as far as PAYOUT_SHARES goes
+        bracket = self.bracket
+        if bracket is None or not bracket.finished:
+            return []
+        places = [bracket.champion]
+        for match in range(1, min(bracket.size, 8)):
+            for entrant in bracket.participants(match):
+                if entrant not in (bracket.slots[match], BYE):
+                    places.append(entrant)
+        return places
+
+    def results(self):
+        places = self.standings()
+        pool = self.prize_pool
+        payouts = {}  # keyed by str(player), as they read back from results.json
+        for place, entrant in enumerate(places[:len(PAYOUT_SHARES)]):
+            payouts[str(self.field[entrant][0])] = int(pool * PAYOUT_SHARES[place])
+        if places:
+            # Rounding leftovers, and the shares of places a small field
+            # doesn't have, go to the champion
+            payouts[str(self.field[places[0]][0])] += pool - sum(payouts.values())
+
+        return {
+            "month": self.month,
+            "seed": self.seed,
+            "entrants": len(self.field),
+            "rejected": self.rejected,
+            "prize_pool": pool,
+            "standings": [self.field[entrant][:2] for entrant in places],
+            "payouts": payouts,
+        }
+
+    def save_results(self, results):
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.results_path, "w") as f:
+            json.dump(results, f)
+
+    def pay_out(self):
+        results = self.results()
+        self.save_results(results)
+        self.accounts.post("monthly_payouts",
+                           {cash_key(player): amount for player, amount in results["payouts"].items()},
+                           set={f"monthly:{self.month}": "paid"}, month=self.month)
+        self.accounts.flush()
+        return results
+
+def due_months(directory, today=None):
+    # Months with queued entries that are over and not yet settled
+    current = month_of(today or datetime.date.today())
+    if not os.path.isdir(directory):
+        return []
+    months = sorted(name[:-len(".entries")] for name in os.listdir(directory) if name.endswith(".entries"))
+    return [month for month in months if month < current
+            and not os.path.exists(os.path.join(directory, f"{month}.results.json"))]
+
+def simulate(entrants, directory, workers=None, seed=0):
+    # Fund `entrants` accounts (some with free games, some broke), register
+    # them all and settle; returns (results, timings)
+    rng = random.Random(seed)
+    accounts = Ledger(os.path.join(directory, "accounts.wal"), fsync=False)
+    timings = {}
+    start = time.perf_counter()
+    funding = {}
+    for i in range(entrants):
+        roll = rng.random()
+        if roll < 0.3:
+            funding[free_key(i)] = 1
+        elif roll < 0.95:
+            funding[cash_key(i)] = rng.choice((1000, 2500, 10000))
+    accounts.post("deposit", funding)
+    timings["funding"] = time.perf_counter() - start
+
+    month = month_of(datetime.date.today())
+    event = MonthlyTournament(month, accounts, directory, seed=seed)
+    start = time.perf_counter()
+    for i in range(entrants):
+        event.register(i, f"Viking {i}")
+    timings["registration"] = time.perf_counter() - start
+
+    results = event.settle(workers)
+    timings.update(event.timings)
+    accounts.close()
+    return results, timings
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run and settle the monthly tournament")
+    parser.add_argument("--dir", default=DEFAULT_EVENT_DIR, help="entry queues, fields and results")
+    parser.add_argument("--accounts", help="accounts ledger (default: accounts.wal in --dir)")
+    parser.add_argument("--workers", type=int)
+    commands = parser.add_subparsers(dest="command", required=True)
+    register_parser = commands.add_parser("register", help="queue an entry for this month")
+    register_parser.add_argument("player")
+    register_parser.add_argument("name")
+    settle_parser = commands.add_parser("settle", help="settle every month that is over")
+    settle_parser.add_argument("--month", help="settle this month even if it isn't over")
+    simulate_parser = commands.add_parser("simulate", help="register and settle a synthetic field")
+    simulate_parser.add_argument("--entrants", type=int, default=100000)
+    simulate_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "simulate":
+        os.makedirs(args.dir, exist_ok=True)
+        results, timings = simulate(args.entrants, args.dir, args.workers, args.seed)
+        print(f"{results['entrants']} entrants, {results['rejected']} rejected, "
+              f"prize pool ${results['prize_pool'] / 100:,.2f}")
+        print(f"champion: {results['standings'][0][1]}" if results["standings"] else "no champion")
+        for step, seconds in timings.items():
+            print(f"{step:<14}{seconds:>8.2f}s")
+        return
+
+    accounts = Ledger(args.accounts or os.path.join(args.dir, "accounts.wal"))
+    try:
+        if args.command == "register":
+            event = MonthlyTournament(month_of(datetime.date.today()), accounts, args.dir)
+            event.register(args.player, args.name)
+            event.close()
+        else:
+            for month in [args.month] if args.month else due_months(args.dir):
+                results = MonthlyTournament(month, accounts, args.dir).settle(args.workers)
+                winner = results["standings"][0][1] if results["standings"] else "nobody"
+                print(f"{month}: {results['entrants']} entrants, won by {winner}, "
+                      f"${results['prize_pool'] / 100:,.2f} paid out")
+    finally:
+        accounts.close()
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
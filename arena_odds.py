@@ -0,0 +1,149 @@
+import os
+import sys
+import json
+import math
+import hashlib
+import argparse
+import numpy as np
+from arena_core import WEAPONS, VELOCITY, ATTACK_FRAMES, FIGHTER_WIDTH, SCREEN_WIDTH
+from arena_batch import BatchBouts
+
+# Monte Carlo win probabilities for weapon matchups, simulated in bulk with
+# arena_batch and cached on disk. Each pair is keyed by a hash of the two
+# weapons' stats (plus the fight rules and sample size), so editing one
+# weapon only invalidates the pairs it takes part in.
+
+DEFAULT_CACHE = os.path.join(os.path.expanduser("~"), ".cache", "viking_arena", "matchups.json")
+STAT_KEYS = ("damage", "speed", "range")
+Z_95 = 1.96
+
+# Anything that changes fight outcomes besides the weapon stats themselves
+RULES = {
+    "velocity": VELOCITY,
+    "attack_frames": ATTACK_FRAMES,
+    "start_gap": SCREEN_WIDTH//2,
+    "width": FIGHTER_WIDTH,
+    "version": 1,
+}
+
+def weapon_stats(weapon):
+    return {key: weapon[key] for key in STAT_KEYS}
+
+def matchup_key(weapon1, weapon2, bouts):
+    # A vs B and B vs A share one cache entry, stored from the point of view
+    # of whichever weapon's stats sort first. Returns (key, flipped).
+    stats1 = json.dumps(weapon_stats(weapon1), sort_keys=True)
+    stats2 = json.dumps(weapon_stats(weapon2), sort_keys=True)
+    flipped = stats2 < stats1
+    if flipped:
+        stats1, stats2 = stats2, stats1
+    blob = json.dumps({"a": stats1, "b": stats2, "bouts": bouts, "rules": RULES}, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest(), flipped
+
+def mirror(result):
+    low, high = result["win_rate_ci"]
+    result = dict(result)
+    result["win_rate"] = 1 - result["win_rate"]
+    result["win_rate_ci"] = [1 - high, 1 - low]
+    return result
+
+def wilson_interval(wins, n, z=Z_95):
+    if n == 0:
+        return 0.0, 1.0
+    p = wins / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    margin = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+class MatchupOdds:
+    def __init__(self, weapons=WEAPONS, bouts=20000, cache_path=DEFAULT_CACHE):
+        self.weapons = weapons
+        self.bouts = bouts
+        self.cache_path = cache_path
+        self.cache = self.load_cache()
+
+    def load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_cache(self):
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp = self.cache_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.cache, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.cache_path)
+
+    def pairs(self):
+        return [(a, b) for a in range(len(self.weapons)) for b in range(len(self.weapons))]
+
+    def simulate(self, a, b):
+        # Each weapon fights half its bouts from the left and half from the
+        # right, because the left fighter moves first within a frame. The
+        # seed comes from the pair's key so a result never depends on which
+        # other pairs were recomputed alongside it.
+        half = self.bouts // 2
+        n = 2 * half
+        left = [a] * half + [b] * half
+        right = [b] * half + [a] * half
+        seed = int(matchup_key(self.weapons[a], self.weapons[b], self.bouts)[0][:16], 16)
+        winner, frames = BatchBouts(left, right, seed=seed, weapons=self.weapons).run()
+
+        wins = int((winner[:half] == 0).sum() + (winner[half:] == 1).sum())
+        length = frames.astype(np.float64)
+        mean = float(length.mean())
+        margin = Z_95 * float(length.std(ddof=1)) / math.sqrt(n) if n > 1 else 0.0
+        low, high = wilson_interval(wins, n)
+        return {
+            "bouts": n,
+            "win_rate": wins / n,
+            "win_rate_ci": [low, high],
+            "mean_frames": mean,
+            "mean_frames_ci": [mean - margin, mean + margin],
+        }
+
+    def table(self):
+        # Win rate and expected bout length for every ordered weapon pair,
+        # keyed by (weapon name, opponent name)
+        keys = {pair: matchup_key(self.weapons[pair[0]], self.weapons[pair[1]], self.bouts)
+                for pair in self.pairs()}
+        missing = False
+        for (a, b), (key, flipped) in keys.items():
+            if key not in self.cache:
+                self.cache[key] = self.simulate(b, a) if flipped else self.simulate(a, b)
+                missing = True
+        if missing:
+            self.save_cache()
+
+        table = {}
+        for pair, (key, flipped) in keys.items():
+            # Names aren't part of the key; report the current ones
+            result = mirror(self.cache[key]) if flipped else dict(self.cache[key])
+            result["weapon"] = self.weapons[pair[0]]["name"]
+            result["opponent"] = self.weapons[pair[1]]["name"]
+            table[(result["weapon"], result["opponent"])] = result
+        return table
+
+    def matchup(self, weapon, opponent):
+        return self.table()[(weapon, opponent)]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Weapon matchup win probabilities")
+    parser.add_argument("--bouts", type=int, default=20000)
+    parser.add_argument("--cache", default=DEFAULT_CACHE)
+    args = parser.parse_args(argv)
+
+    for (weapon, opponent), result in MatchupOdds(bouts=args.bouts, cache_path=args.cache).table().items():
+        low, high = result["win_rate_ci"]
+        print(f"{weapon:>6} vs {opponent:<6} win {result['win_rate']:.3f} "
+              f"[{low:.3f}, {high:.3f}]  {result['mean_frames']:.1f} frames")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,205 @@
+import sys
+import time
+import argparse
+import numpy as np
+from arena_core import VELOCITY, WEAPONS
+from arena_batch import BatchBouts
+
+# Pluggable AI policies, evaluated a batch at a time.
+#
+# A policy is any object with an act(obs) method. obs is a dict of equal
+# length NumPy arrays, one row per fighter that is free to act this frame
+# (alive and not mid-swing):
+#   distance            gap to the opponent in pixels
+#   health, cooldown    the fighter's own
+#   range, damage, hit_chance   the fighter's weapon
+#   target_health, target_cooldown, target_attacking
+#   target_range, target_damage     the opponent and their weapon
+#   waited              frames the fighter has been choosing IDLE in a row
+# act returns an array of actions, one per row: IDLE, ADVANCE, RETREAT or
+# ATTACK. An attack while the cooldown is running is ignored, and a swing
+# out of range misses, as with Fighter.attack.
+#
+# PolicyBouts runs arena_batch bouts with a policy on either side, so a
+# policy costs a few array ops per frame for thousands of bouts rather than
+# a Python call per fighter. BaselinePolicy reproduces Fighter.move, and
+# with it PolicyBouts matches BatchBouts bout for bout (parity mode
+# included). `python arena_policy.py` measures every policy against it.
+
+IDLE = 0
+ADVANCE = 1
+RETREAT = 2
+ATTACK = 3
+
+class BaselinePolicy:
+    # Today's AI: walk in, swing whenever in range and ready
+    name = "baseline"
+
+    def act(self, obs):
+        in_range = obs["distance"] < obs["range"]
+        return np.where(in_range, np.where(obs["cooldown"] <= 0, ATTACK, IDLE), ADVANCE).astype(np.int8)
+
+class SpacingPolicy:
+    # Fights around the two weapons' reach. With the longer weapon it keeps
+    # to the band where it can hit and the opponent can't, stepping back in
+    # whenever the opponent closes. With the shorter one it waits just
+    # outside the opponent's reach for them to commit to a swing, then
+    # closes while they recover (with equal reach too). It never waits more
+    # than patience frames in a row, so two of them, or one against an
+    # opponent that never swings, can't stall a bout.
+    name = "spacing"
+
+    def __init__(self, patience=60):
+        self.patience = patience
+
+    def act(self, obs):
+        distance, reach, their_reach = obs["distance"], obs["range"], obs["target_range"]
+        ready = obs["cooldown"] <= 0
+        in_range = distance < reach
+        exposed = distance < their_reach
+        busy = obs["target_attacking"] | (obs["target_cooldown"] > 0)
+        outreach = reach > their_reach
+
+        actions = np.full(len(distance), ADVANCE, dtype=np.int8)
+        # Longer weapon: back out of their reach, but never out of ours
+        actions[outreach & exposed & (distance + VELOCITY < reach) & ~busy] = RETREAT
+        # Shorter weapon: hold at the edge of their reach until they swing
+        hold = (~outreach & ~in_range & ~busy & (distance < their_reach + 2 * VELOCITY)
+                & (obs["waited"] < self.patience))
+        actions[hold] = IDLE
+        actions[in_range & ~ready & ~(outreach & exposed)] = IDLE
+        actions[in_range & ready] = ATTACK
+        return actions
+
+class Hesitant:
+    # Difficulty tier wrapper: each decision is dropped (IDLE) with
+    # probability 1 - reaction, standing in for a slower opponent
+    def __init__(self, policy, reaction, seed=None, name=None):
+        self.policy = policy
+        self.reaction = reaction
+        self.rng = np.random.default_rng(seed)
+        self.name = name or f"{policy.name}@{reaction:g}"
+
+    def act(self, obs):
+        actions = self.policy.act(obs)
+        actions[self.rng.random(len(actions)) >= self.reaction] = IDLE
+        return actions
+
+def tiers(seed=None):
+    return {
+        "easy": Hesitant(BaselinePolicy(), 0.5, seed, "easy"),
+        "normal": BaselinePolicy(),
+        "hard": SpacingPolicy(),
+    }
+
+class PolicyBouts(BatchBouts):
+    # BatchBouts with each side's moves chosen by a policy. policies is a
+    # pair; None on a side keeps the built-in rules.
+    def __init__(self, weapons1, weapons2, policies=(None, None), **kwargs):
+        super().__init__(weapons1, weapons2, **kwargs)
+        self.policies = policies
+        self.decisions = [0, 0]
+        self.decide_time = [0.0, 0.0]  # seconds spent in act(), per side
+        self.waited = np.zeros((self.n, 2), dtype=np.int32)  # IDLE choices in a row
+
+    def observe(self, side, idx):
+        a = self.state[idx, side]
+        target = self.state[idx, 1 - side]
+        table = self.table
+        return {
+            "distance": np.abs(target["x"] - a["x"]),
+            "health": a["health"],
+            "cooldown": a["cooldown"],
+            "range": table.range[a["weapon"]],
+            "damage": table.damage[a["weapon"]],
+            "hit_chance": table.hit_chance[a["weapon"]],
+            "target_health": target["health"],
+            "target_cooldown": target["cooldown"],
+            "target_attacking": target["attacking"],
+            "target_range": table.range[target["weapon"]],
+            "target_damage": table.damage[target["weapon"]],
+            "waited": self.waited[idx, side],
+        }
+
+    def move(self, side, live):
+        policy = self.policies[side]
+        if policy is None:
+            return super().move(side, live)
+        a = self.state[:, side]
+        idx = np.flatnonzero(live & a["alive"] & ~a["attacking"])
+        if not len(idx):
+            return
+        obs = self.observe(side, idx)
+        start = time.perf_counter()
+        actions = policy.act(obs)
+        self.decide_time[side] += time.perf_counter() - start
+        self.decisions[side] += len(idx)
+        self.waited[idx, side] = np.where(actions == IDLE, self.waited[idx, side] + 1, 0)
+
+        dx = self.state["x"][idx, 1 - side] - a["x"][idx]
+        toward = np.where(dx > 0, 1, -1).astype(np.int8)
+        for action, step in ((ADVANCE, 1), (RETREAT, -1)):
+            walk = actions == action
+            a["x"][idx[walk]] += VELOCITY * step * toward[walk]
+            a["direction"][idx[walk]] = step * toward[walk]
+
+        swing = (actions == ATTACK) & (a["cooldown"][idx] <= 0)
+        self.attack(side, idx[swing], toward[swing], obs["distance"][swing] < obs["range"][swing])
+
+def evaluate(policy, opponent=None, bouts=20000, seed=0, max_frames=3000):
+    # Policy against opponent (the baseline by default) over random weapon
+    # pairings, half the bouts on each side. Unfinished bouts are draws.
+    opponent = opponent or BaselinePolicy()
+    rng = np.random.default_rng(seed)
+    weapons1 = rng.integers(0, len(WEAPONS), bouts // 2)
+    weapons2 = rng.integers(0, len(WEAPONS), bouts // 2)
+    wins = draws = decisions = frames = 0
+    decide_time = 0.0
+    start = time.perf_counter()
+    for side, pair in ((0, (policy, opponent)), (1, (opponent, policy))):
+        batch = PolicyBouts(weapons1, weapons2, pair, seed=seed + side)
+        winner, bout_frames = batch.run(max_frames)
+        wins += int(np.sum(winner == side))
+        draws += int(np.sum(winner < 0))
+        decisions += batch.decisions[side]
+        decide_time += batch.decide_time[side]
+        frames += int(bout_frames[winner >= 0].sum())
+    elapsed = time.perf_counter() - start
+    total = len(weapons1) * 2
+    return {
+        "policy": policy.name,
+        "opponent": opponent.name,
+        "win_rate": wins / total,
+        "draw_rate": draws / total,
+        "mean_frames": frames / max(total - draws, 1),
+        "decisions_per_s": decisions / decide_time if decide_time else 0.0,
+        "bouts_per_s": total / elapsed,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure AI policies against the baseline")
+    parser.add_argument("--bouts", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    # Every tier against the baseline, then against itself: two policies
+    # that both wait for the other show up as draws in the mirror match
+    print(f"{'tier':<8}{'policy':<10}{'opponent':<10}{'win rate':>10}{'draws':>8}{'frames':>9}"
+          f"{'decisions/s':>14}{'bouts/s':>10}")
+    stalled = []
+    mirrors = tiers(args.seed + 1)
+    for tier, policy in tiers(args.seed).items():
+        mirror = mirrors[tier]
+        for opponent in (None,) if mirror.name == BaselinePolicy.name else (None, mirror):
+            r = evaluate(policy, opponent, bouts=args.bouts, seed=args.seed)
+            print(f"{tier:<8}{r['policy']:<10}{r['opponent']:<10}{r['win_rate']:>10.1%}{r['draw_rate']:>8.1%}"
+                  f"{r['mean_frames']:>9.0f}{r['decisions_per_s']:>14,.0f}{r['bouts_per_s']:>10,.0f}")
+            if opponent is not None and r["draw_rate"] > 0.01:
+                stalled.append(tier)
+    if stalled:
+        print(f"stalls against itself: {', '.join(stalled)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,170 @@
+import sys
+import csv
+import json
+import time
+import argparse
+from array import array
+
+# Frame profiler. Each phase of a frame (event handling, simulation, the
+# draw_* method for the current screen, presenting...) is timed with
+# perf_counter_ns, together with how many memory blocks it left allocated
+# (sys.getallocatedblocks, which is cheap enough to call every frame unlike
+# tracemalloc). The last `window` samples of each phase are kept in a ring,
+# and percentiles are only computed when someone asks for them, so recording
+# stays a couple of function calls per phase.
+
+PERCENTILES = (50, 95, 99)
+FIELDS = ["phase", "count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms", "allocs_mean"]
+
+class Ring:
+    def __init__(self, size):
+        self.values = array("q", bytes(8 * size))
+        self.size = size
+        self.count = 0  # total ever added
+
+    def add(self, value):
+        self.values[self.count % self.size] = value
+        self.count += 1
+
+    def samples(self):
+        return self.values[:min(self.count, self.size)]
+
+def percentile(ordered, pct):
+    # Nearest-rank percentile of an already sorted sequence
+    if not ordered:
+        return 0
+    rank = max(1, -(-pct * len(ordered) // 100))
+    return ordered[rank - 1]
+
+class Phase:
+    # Context manager timing one named phase
+    __slots__ = ("profiler", "name", "start", "blocks")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.blocks = sys.getallocatedblocks()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter_ns() - self.start
+        self.profiler.record(self.name, elapsed, sys.getallocatedblocks() - self.blocks)
+
+class NullPhase:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+NULL_PHASE = NullPhase()
+
+class FrameProfiler:
+    def __init__(self, window=600, enabled=True):
+        self.window = window
+        self.enabled = enabled
+        self.phases = {}  # name -> Phase, reused every frame
+        self.times = {}  # name -> Ring of nanoseconds
+        self.allocs = {}  # name -> Ring of net allocated blocks
+        self.frames = 0
+        self.frame_start = None
+
+    def phase(self, name):
+        if not self.enabled:
+            return NULL_PHASE
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Phase(self, name)
+        return phase
+
+    def record(self, name, nanoseconds, blocks=0):
+        times = self.times.get(name)
+        if times is None:
+            times = self.times[name] = Ring(self.window)
+            self.allocs[name] = Ring(self.window)
+        times.add(nanoseconds)
+        self.allocs[name].add(blocks)
+
+    def begin_frame(self):
+        if self.enabled:
+            self.frame_start = time.perf_counter_ns()
+
+    def end_frame(self):
+        if self.enabled and self.frame_start is not None:
+            self.record("frame", time.perf_counter_ns() - self.frame_start)
+            self.frames += 1
+
+    def reset(self):
+        self.times = {}
+        self.allocs = {}
+        self.frames = 0
+
+    def stats(self):
+        # One row per phase, slowest p95 first
+        rows = []
+        for name, times in self.times.items():
+            ordered = sorted(times.samples())
+            allocs = self.allocs[name].samples()
+            row = {"phase": name, "count": times.count,
+                   "mean_ms": sum(ordered) / len(ordered) / 1e6}
+            for pct in PERCENTILES:
+                row[f"p{pct}_ms"] = percentile(ordered, pct) / 1e6
+            row["max_ms"] = ordered[-1] / 1e6
+            row["allocs_mean"] = sum(allocs) / len(allocs)
+            rows.append(row)
+        rows.sort(key=lambda row: -row["p95_ms"])
+        return rows
+
+    def export(self, path):
+        # .json or anything else as CSV
+        rows = self.stats()
+        with open(path, "w", newline="") as f:
+            if path.endswith(".json"):
+                json.dump({"frames": self.frames, "window": self.window, "phases": rows}, f, indent=2)
+            else:
+                writer = csv.DictWriter(f, FIELDS)
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow({key: round(value, 4) if isinstance(value, float) else value
+                                     for key, value in row.items()})
+
+    def report_lines(self):
+        lines = [f"{'phase':<18}{'p50':>7}{'p95':>7}{'p99':>7}{'alloc':>7}"]
+        for row in self.stats():
+            lines.append(f"{row['phase']:<18}{row['p50_ms']:>7.2f}{row['p95_ms']:>7.2f}"
+                         f"{row['p99_ms']:>7.2f}{row['allocs_mean']:>7.1f}")
+        return lines
+
+def load(path):
+    if path.endswith(".json"):
+        with open(path) as f:
+            return {row["phase"]: row for row in json.load(f)["phases"]}
+    with open(path, newline="") as f:
+        return {row["phase"]: {key: value if key == "phase" else float(value) for key, value in row.items()}
+                for row in csv.DictReader(f)}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two frame profiles")
+    parser.add_argument("old")
+    parser.add_argument("new")
+    parser.add_argument("--metric", default="p95_ms", choices=FIELDS[2:])
+    args = parser.parse_args(argv)
+
+    old, new = load(args.old), load(args.new)
+    print(f"{'phase':<20}{'old':>10}{'new':>10}{'change':>10}")
+    for name in sorted(set(old) | set(new)):
+        before = old.get(name, {}).get(args.metric)
+        after = new.get(name, {}).get(args.metric)
+        if before is None or after is None:
+            change = "new" if before is None else "gone"
+        else:
+            change = f"{(after - before) / before * 100:+.1f}%" if before else "-"
+        before = "-" if before is None else f"{before:.3f}"
+        after = "-" if after is None else f"{after:.3f}"
+        print(f"{name:<20}{before:>10}{after:>10}{change:>10}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
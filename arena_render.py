@@ -0,0 +1,175 @@
+import math
+import pygame
+from collections import OrderedDict
+from arena_core import ATTACK_FRAMES
+
+# Screen composition for the game UI.
+#
+# Immediate mode paints every frame from scratch and flips the whole display,
+# which is what the game always did. Retained mode paints a screen's static
+# parts once into a cached background and keeps a registry of widgets, each
+# tagged with the value it shows (cash, free games, a fighter's health...).
+# A widget is only repainted when its value changes, and only the rectangles
+# that actually changed are pushed with pygame.display.update(rects).
+
+class DirtyRenderer:
+    def __init__(self, screen, fill_color, retained=True):
+        self.screen = screen
+        self.fill_color = fill_color
+        self.retained = retained
+        self.background = None
+        self.background_key = None
+        self.widgets = {}  # name -> (key, rect) as last painted
+        self.frame = {}  # name -> (key, paint) registered this frame
+        self.dirty = []
+
+    def invalidate(self):
+        # Force the next frame to repaint everything
+        self.background_key = None
+
+    def begin_screen(self, key, paint):
+        # paint(surface) draws the static part of a screen. key identifies
+        # everything that paint depends on; the background is rebuilt only
+        # when it changes.
+        self.frame = {}
+        if not self.retained:
+            self.screen.fill(self.fill_color)
+            paint(self.screen)
+            return
+        if key == self.background_key:
+            return
+
+        if self.background is None or self.background.get_size() != self.screen.get_size():
+            self.background = pygame.Surface(self.screen.get_size(), 0, self.screen)
+        self.background.fill(self.fill_color)
+        paint(self.background)
+        self.background_key = key
+
+        self.screen.blit(self.background, (0, 0))
+        self.widgets = {}
+        self.dirty = [self.screen.get_rect()]
+
+    def widget(self, name, key, paint):
+        # paint(surface) draws the widget and returns the Rect it covered
+        if not self.retained:
+            paint(self.screen)
+            return
+        self.frame[name] = (key, paint)
+
+    def present(self):
+        if not self.retained:
+            pygame.display.flip()
+            return
+
+        changed = {name for name, (key, _) in self.frame.items()
+                   if name not in self.widgets or self.widgets[name][0] != key}
+        removed = [name for name in self.widgets if name not in self.frame]
+        restore = [self.widgets[name][1] for name in removed if self.widgets[name][1]]
+
+        # Overlapping widgets are repainted together: restoring the
+        # background under one would otherwise wipe part of its neighbour
+        painted = {}
+        for _ in range(len(self.frame) + 1):
+            restore += [self.widgets[name][1] for name in changed
+                        if name in self.widgets and self.widgets[name][1]]
+            restore += [painted[name] for name in changed if painted.get(name)]
+            grown = {name for name in self.frame if name not in changed
+                     and self.collides(self.widgets[name][1], restore)}
+            if grown:
+                changed |= grown
+                continue
+
+            for rect in restore:
+                self.screen.blit(self.background, rect, rect)
+            painted = {}
+            for name, (key, paint) in self.frame.items():
+                if name in changed:
+                    painted[name] = paint(self.screen)
+
+            # A widget that grew into an untouched neighbour pulls it in too
+            grown = {name for name in self.frame if name not in changed
+                     and self.collides(self.widgets[name][1], list(painted.values()))}
+            if not grown:
+                break
+            changed |= grown
+
+        for name in removed:
+            del self.widgets[name]
+        for name in changed:
+            self.widgets[name] = (self.frame[name][0], painted.get(name))
+
+        self.dirty += restore + [rect for rect in painted.values() if rect]
+        if self.dirty:
+            pygame.display.update(self.dirty)
+            self.dirty = []
+
+    def collides(self, rect, rects):
+        return rect is not None and rect.collidelist([r for r in rects if r]) != -1
+
+# Text rasterization cache. Font.render is one of the most expensive calls
+# in a frame and most strings on screen never change, so rendered surfaces
+# are kept in a bounded LRU keyed on (font, text, antialias, color). The
+# returned surfaces are shared: blit them, never draw on them.
+
+class TextCache:
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font, text, antialias, color, background=None):
+        key = (font, text, antialias, tuple(color), background and tuple(background))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color, background)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.maxsize:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self.surfaces),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+# Sprite atlas. Every sprite is converted to the display's pixel format once
+# and pre-flipped for both facings, and the attack swing offsets are
+# tabulated per animation frame, so drawing a fighter is a handful of plain
+# blits with no per-frame Surface allocation.
+
+class SpriteAtlas:
+    def __init__(self, images, swing_frames=ATTACK_FRAMES + 1):
+        self.sprites = {}
+        for name, image in images.items():
+            # convert_alpha needs a display; headless callers keep the original
+            if pygame.display.get_surface() is not None:
+                image = image.convert_alpha()
+            self.sprites[name] = {1: image, -1: pygame.transform.flip(image, True, False)}
+        self.swing = [self.swing_offset(frame) for frame in range(swing_frames)]
+
+    def swing_offset(self, frame):
+        # Horizontal weapon offset during an attack, facing right
+        return math.sin(frame * 0.5) * 30
+
+    def get(self, name, direction):
+        return self.sprites[name][-1 if direction == -1 else 1]
+
+    def swing_at(self, frame):
+        return self.swing[frame] if frame < len(self.swing) else self.swing_offset(frame)
@@ -0,0 +1,296 @@
+import os
+import sys
+import time
+import random
+import struct
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from arena_core import (FPS, ENTRY_FEE, MOVE_LEFT, MOVE_RIGHT, ATTACK, Tournament,
+                        step_fight, apply_input, player_of, opponent_of)
+from arena_resolver import resolve_fight_events
+
+# Tournament replays. Everything random in a tournament comes from one
+# seeded random.Random, so a replay only needs the seed and the commands
+# that changed the simulation, each stamped with the fight tick it happened
+# on. Playback rebuilds the tournament from the seed and re-applies the
+# commands headless, as fast as the simulation runs, and checks the result
+# against the outcome stored when the tournament was played.
+#
+# File layout (little endian):
+#   header   b"VARP", version u8, seed u64, entrants u16, event count u32
+#   events   tick delta as a varint, opcode u8 -- repeated
+#   outcome  ticks u32, winner u16, player won u8, prize in cents u32,
+#            8-byte digest of every fighter's final state
+
+MAGIC = b"VARP"
+VERSION = 2  # 2: player attacks strike like AI ones
+HEADER = struct.Struct("<4sBQHI")
+OUTCOME = struct.Struct("<IHBI8s")
+
+# Opcodes besides the player inputs (MOVE_LEFT, MOVE_RIGHT, ATTACK)
+START_FIGHT = 16
+SKIP_FIGHT = 17
+OPCODES = {MOVE_LEFT, MOVE_RIGHT, ATTACK, START_FIGHT, SKIP_FIGHT}
+
+DEFAULT_REPLAY_DIR = os.path.join(os.path.expanduser("~"), ".local", "share", "viking_arena", "replays")
+
+class ReplayError(ValueError):
+    pass
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append(value & 0x7F | 0x80)
+        value >>= 7
+    out.append(value)
+
+def read_varint(data, pos):
+    value = shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError("truncated replay")
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def state_digest(tournament):
+    # Fingerprint of where every fighter ended up
+    blake = hashlib.blake2b(digest_size=8)
+    for fighter in tournament.all_fighters:
+        blake.update(repr((fighter.name, fighter.weapon["name"], fighter.health, fighter.x,
+                           fighter.wins, fighter.alive)).encode())
+    return blake.digest()
+
+def prize_cents(tournament):
+    winner = tournament.winner
+    if winner is None or not winner.is_player:
+        return 0
+    return len(tournament.all_fighters) * ENTRY_FEE * 100
+
+def outcome_of(tournament, ticks):
+    winner = tournament.winner
+    return {
+        "ticks": ticks,
+        "winner": tournament.all_fighters.index(winner) if winner else 0xFFFF,
+        "player_won": bool(winner and winner.is_player),
+        "prize_cents": prize_cents(tournament),
+        "digest": state_digest(tournament),
+    }
+
+class Replay:
+    def __init__(self, seed, entrants=8, events=None, outcome=None):
+        self.seed = seed
+        self.entrants = entrants
+        self.events = events or []  # (tick, opcode), in order
+        self.outcome = outcome
+
+    def encode(self):
+        out = bytearray(HEADER.pack(MAGIC, VERSION, self.seed, self.entrants, len(self.events)))
+        last = 0
+        for tick, opcode in self.events:
+            write_varint(out, tick - last)
+            out.append(opcode)
+            last = tick
+        o = self.outcome
+        out += OUTCOME.pack(o["ticks"], o["winner"], o["player_won"], o["prize_cents"], o["digest"])
+        return bytes(out)
+
+    @classmethod
+    def decode(cls, data):
+        if len(data) < HEADER.size + OUTCOME.size:
+            raise ReplayError("truncated replay")
+        magic, version, seed, entrants, count = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ReplayError("not a replay file")
+        if version != VERSION:
+            raise ReplayError(f"unsupported replay version {version}")
+        if entrants < 2:
+            raise ReplayError(f"a tournament needs at least 2 entrants, not {entrants}")
+        pos = HEADER.size
+        events = []
+        tick = 0
+        for _ in range(count):
+            delta, pos = read_varint(data, pos)
+            if pos >= len(data) or data[pos] not in OPCODES:
+                raise ReplayError("corrupt event stream")
+            tick += delta
+            events.append((tick, data[pos]))
+            pos += 1
+        if len(data) - pos != OUTCOME.size:
+            raise ReplayError("corrupt outcome")
+        ticks, winner, player_won, prize, digest = OUTCOME.unpack_from(data, pos)
+        outcome = {"ticks": ticks, "winner": winner, "player_won": bool(player_won),
+                   "prize_cents": prize, "digest": digest}
+        return cls(seed, entrants, events, outcome)
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(self.encode())
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.decode(f.read())
+
+class Recorder:
+    # Collects a tournament's commands while it is played. tick() is called
+    # for every simulation step of a fight, record() for every command.
+    def __init__(self, seed, entrants=8):
+        self.replay = Replay(seed, entrants)
+        self.ticks = 0
+
+    def tick(self):
+        self.ticks += 1
+
+    def record(self, opcode):
+        self.replay.events.append((self.ticks, opcode))
+
+    def finish(self, tournament):
+        self.replay.outcome = outcome_of(tournament, self.ticks)
+        return self.replay
+
+def new_tournament(seed, entrants=8):
+    return Tournament(rng=random.Random(seed), entrants=entrants)
+
+def step(tournament):
+    if tournament.active_fight and step_fight(*tournament.active_fight):
+        tournament.finish_fight()
+
+def apply_event(tournament, opcode):
+    # Skips are only recorded for AI-only bouts and inputs only during the
+    # player's own, so anything else is a corrupt replay
+    if opcode == START_FIGHT:
+        tournament.start_next_fight()
+        return
+    fight = tournament.active_fight
+    player = player_of(fight) if fight else None
+    if opcode == SKIP_FIGHT:
+        if fight is None or player is not None:
+            raise ReplayError("skip without an AI-only fight in progress")
+        resolve_fight_events(*fight, autopilot=False)
+        tournament.finish_fight()
+    else:
+        if player is None:
+            raise ReplayError("input without the player's fight in progress")
+        apply_input(player, opcode, opponent_of(fight, player))
+
+def play(replay):
+    # Re-run a replay headless; returns (tournament, outcome)
+    tournament = new_tournament(replay.seed, replay.entrants)
+    ticks = 0
+    for tick, opcode in replay.events:
+        while ticks < tick:
+            step(tournament)
+            ticks += 1
+        apply_event(tournament, opcode)
+    while ticks < replay.outcome["ticks"]:
+        step(tournament)
+        ticks += 1
+    return tournament, outcome_of(tournament, ticks)
+
+def verify(path):
+    # (path, ok, message)
+    try:
+        replay = Replay.load(path)
+        _, outcome = play(replay)
+    except (OSError, ReplayError) as error:
+        return path, False, str(error)
+    except Exception as error:
+        # A replay that makes no sense to the simulation is a failed one;
+        # it must not take the rest of a bulk run down with it
+        return path, False, f"{type(error).__name__}: {error}"
+    mismatched = [key for key in outcome if outcome[key] != replay.outcome[key]]
+    if mismatched:
+        return path, False, "mismatch in " + ", ".join(mismatched)
+    return path, True, "ok"
+
+def verify_many(paths, workers=None, chunksize=64):
+    # Yields verify() results in order, checked across a process pool.
+    # workers=0 checks in-process.
+    if workers == 0:
+        yield from map(verify, paths)
+        return
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1) as pool:
+        yield from pool.map(verify, paths, chunksize=chunksize)
+
+def generate(seed, entrants=8, input_rate=0.05, skip_rate=0.5):
+    # A replay of a simulated session: a bot presses random keys during the
+    # player's fights and sometimes skips the AI-only ones
+    rng = random.Random(seed ^ 0x5EED)
+    tournament = new_tournament(seed, entrants)
+    recorder = Recorder(seed, entrants)
+    while tournament.winner is None:
+        recorder.record(START_FIGHT)
+        if not tournament.start_next_fight():
+            break
+        player = player_of(tournament.active_fight)
+        if player is None and rng.random() < skip_rate:
+            recorder.record(SKIP_FIGHT)
+            apply_event(tournament, SKIP_FIGHT)
+            continue
+        while tournament.active_fight:
+            if player and rng.random() < input_rate:
+                opcode = rng.choice((MOVE_LEFT, MOVE_RIGHT, ATTACK, ATTACK))
+                recorder.record(opcode)
+                apply_event(tournament, opcode)
+            recorder.tick()
+            step(tournament)
+    return recorder.finish(tournament)
+
+def replay_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith(".varp"):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record, play back and verify tournament replays")
+    commands = parser.add_subparsers(dest="command", required=True)
+    verify_parser = commands.add_parser("verify", help="re-run replays and check their outcomes")
+    verify_parser.add_argument("paths", nargs="+", help="replay files or directories")
+    verify_parser.add_argument("--workers", type=int)
+    play_parser = commands.add_parser("play", help="re-run one replay and show the result")
+    play_parser.add_argument("path")
+    generate_parser = commands.add_parser("generate", help="write simulated replays for testing")
+    generate_parser.add_argument("directory")
+    generate_parser.add_argument("--count", type=int, default=1000)
+    generate_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        for i in range(args.count):
+            seed = random.Random(args.seed * 1_000_003 + i).getrandbits(64)
+            generate(seed).save(os.path.join(args.directory, f"{seed:016x}.varp"))
+        print(f"Wrote {args.count} replays to {args.directory}")
+    elif args.command == "play":
+        replay = Replay.load(args.path)
+        start = time.perf_counter()
+        tournament, outcome = play(replay)
+        elapsed = time.perf_counter() - start
+        winner = tournament.winner
+        print(f"seed {replay.seed:016x}, {len(replay.events)} events, {outcome['ticks']} ticks")
+        print(f"winner: {winner.name if winner else 'none'}, prize ${outcome['prize_cents'] / 100:.2f}")
+        print(f"matches recording: {outcome == replay.outcome}")
+        print(f"played in {elapsed * 1000:.1f} ms ({outcome['ticks'] / FPS / max(elapsed, 1e-9):.0f}x real time)")
+    else:
+        start = time.perf_counter()
+        total = failed = 0
+        for path, ok, message in verify_many(list(replay_paths(args.paths)), args.workers):
+            total += 1
+            if not ok:
+                failed += 1
+                print(f"FAIL {path}: {message}")
+        elapsed = time.perf_counter() - start
+        print(f"{total - failed}/{total} replays verified in {elapsed:.2f}s")
+        return 1 if failed else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,118 @@
+from arena_core import VELOCITY, ATTACK_FRAMES, resolve_fight
+
+# Event-driven bout resolver. Instead of stepping step_fight once per frame it
+# works out when each fighter arrives in range and then jumps from one attack
+# to the next, so a bout costs a handful of operations per swing rather than
+# one Python call per 1/60 s tick. Outcomes, frame counts and the order of
+# RNG draws match resolve_fight exactly.
+#
+# Why this works: AI fighters only ever close distance (they stop as soon as
+# the gap drops below their weapon range, and steps of 5 are far smaller than
+# any range), so each fighter walks every frame up to its arrival and then
+# attacks on a fixed period of max(ATTACK_FRAMES + 1, 60 // speed) frames.
+
+def attack_period(weapon):
+    return max(ATTACK_FRAMES + 1, 60 // weapon["speed"])
+
+def arrival_frames(distance, range1, range2, active1=True, active2=True):
+    # Frame numbers (1-based) of each fighter's first attack, or None for a
+    # fighter that never acts. Within a frame fighter 1 moves before fighter 2.
+    frame = 0
+    first1 = first2 = None
+
+    if active1 and active2:
+        # Both walking: the gap closes by two steps a frame
+        closest = max(range1, range2 + VELOCITY)
+        if distance >= closest:
+            both = (distance - closest) // (2 * VELOCITY) + 1
+            frame += both
+            distance -= 2 * VELOCITY * both
+
+        # At most one of them keeps walking after this frame
+        frame += 1
+        if distance >= range1:
+            distance -= VELOCITY
+        else:
+            first1 = frame
+        if distance >= range2:
+            distance -= VELOCITY
+        else:
+            first2 = frame
+
+    # One walker left, closing the gap a step a frame
+    if active1 and first1 is None:
+        steps = (distance - range1) // VELOCITY + 1 if distance >= range1 else 0
+        distance -= VELOCITY * steps
+        first1 = frame + steps + 1
+    if active2 and first2 is None:
+        steps = (distance - range2) // VELOCITY + 1 if distance >= range2 else 0
+        distance -= VELOCITY * steps
+        first2 = frame + steps + 1
+
+    return first1, first2
+
+def can_skip(fighter1, fighter2):
+    # The arithmetic assumes a freshly placed bout, as set up by place_fighters
+    return (fighter1.x < fighter2.x
+            and not fighter1.attacking and not fighter2.attacking
+            and fighter1.attack_cooldown <= 0 and fighter2.attack_cooldown <= 0)
+
+def settle(fighter, last_attack, frames, walked):
+    # Leave the fighter exactly as the frame-by-frame loop would have
+    fighter.x += walked * (1 if fighter.direction == 1 else -1) * fighter.velocity
+    if last_attack is None:
+        return
+    since = frames - last_attack
+    fighter.attacking = since <= ATTACK_FRAMES
+    fighter.attack_frame = since if fighter.attacking else 0
+    fighter.attack_cooldown = max(60 // fighter.weapon["speed"] - since, 0)
+
+def resolve_fight_events(fighter1, fighter2, autopilot=True):
+    # Drop-in replacement for arena_core.resolve_fight; returns (winner, frames)
+    if not (fighter1.alive and fighter2.alive):
+        return (fighter1 if fighter1.alive else fighter2), 0
+    if not can_skip(fighter1, fighter2):
+        return resolve_fight(fighter1, fighter2, autopilot)
+
+    active1 = autopilot or not fighter1.is_player
+    active2 = autopilot or not fighter2.is_player
+    if not (active1 or active2):
+        raise ValueError("neither fighter can act without player input")
+
+    first1, first2 = arrival_frames(fighter2.x - fighter1.x, fighter1.weapon["range"],
+                                    fighter2.weapon["range"], active1, active2)
+    fighter1.direction, fighter2.direction = 1, -1
+
+    fighters = (fighter1, fighter2)
+    next_attack = [first1, first2]
+    last_attack = [None, None]
+    periods = (attack_period(fighter1.weapon), attack_period(fighter2.weapon))
+
+    while True:
+        # Earliest attack goes next; fighter 1 acts first on a shared frame
+        if next_attack[1] is None or (next_attack[0] is not None and next_attack[0] <= next_attack[1]):
+            side = 0
+        else:
+            side = 1
+        attacker, target = fighters[side], fighters[1 - side]
+        frame = next_attack[side]
+        last_attack[side] = frame
+        next_attack[side] = frame + periods[side]
+
+        # Calculate hit chance (90% base, modified by weapon speed)
+        hit_chance = 0.9 + (attacker.weapon["speed"] - 5) * 0.02
+        if attacker.rng.random() < hit_chance:
+            target.health -= attacker.weapon["damage"]
+            if target.health <= 0:
+                target.health = 0
+                target.alive = False
+                attacker.wins += 1
+                break
+
+    # Fighter 2 moves after fighter 1, so it gets one step fewer when
+    # fighter 1 lands the killing blow on the same frame
+    walked1 = min(first1 - 1, frame) if first1 else 0
+    walked2 = min(first2 - 1, frame - (side == 0)) if first2 else 0
+    settle(fighter1, last_attack[0], frame, walked1)
+    settle(fighter2, last_attack[1], frame, walked2)
+    return attacker, frame
@@ -0,0 +1,245 @@
+import sys
+import random
+import argparse
+import tracemalloc
+from types import MappingProxyType
+import numpy as np
+from arena_core import (WEAPONS, AI_NAMES, SCREEN_HEIGHT, GROUND_HEIGHT, FIGHTER_WIDTH,
+                        FIGHTER_HEIGHT, VELOCITY, Fighter)
+
+# Compact roster store for very large simulated events. Fighters live in a
+# struct-of-arrays table (one NumPy column per field) instead of one Python
+# object with a __dict__ each, and refer to their weapon by a small integer
+# id into an immutable weapon table. FighterView is a __slots__ handle onto
+# one row that behaves like a Fighter, so the renderer and the scalar fight
+# code can use roster entries unchanged.
+
+# Immutable weapon-stats table, indexed by weapon id
+WEAPON_TABLE = tuple(MappingProxyType(dict(weapon)) for weapon in WEAPONS)
+WEAPON_IDS = {weapon["name"]: i for i, weapon in enumerate(WEAPON_TABLE)}
+WEAPON_COLUMNS = {key: np.array([weapon[key] for weapon in WEAPON_TABLE])
+                  for key in ("damage", "speed", "range")}
+
+AI_NAME = -1  # name_id of a generated AI name
+
+def ai_name(index):
+    return f"{AI_NAMES[index % len(AI_NAMES)]} {index + 1}"
+
+COLUMNS = [
+    ("name_id", np.int32),
+    ("weapon", np.uint8),
+    ("health", np.int16),
+    ("max_health", np.int16),
+    ("x", np.int32),
+    ("direction", np.int8),
+    ("attacking", np.bool_),
+    ("attack_cooldown", np.int16),
+    ("attack_frame", np.int16),
+    ("wins", np.int16),
+    ("alive", np.bool_),
+    ("is_player", np.bool_),
+]
+
+class Roster:
+    def __init__(self, capacity=1024, rng=None):
+        self.rng = rng or random
+        self.size = 0
+        self.names = []  # interned, indexed by name_id
+        self.name_ids = {}
+        self.columns = {name: np.zeros(capacity, dtype=dtype) for name, dtype in COLUMNS}
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, index):
+        if not -self.size <= index < self.size:
+            raise IndexError(index)
+        return FighterView(self, index % self.size)
+
+    def __iter__(self):
+        return (FighterView(self, i) for i in range(self.size))
+
+    def reserve(self, capacity):
+        if capacity <= len(self.columns["x"]):
+            return
+        capacity = max(capacity, 2 * len(self.columns["x"]))
+        for name, column in self.columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    def intern(self, name):
+        name_id = self.name_ids.get(name)
+        if name_id is None:
+            name_id = self.name_ids[name] = len(self.names)
+            self.names.append(name)
+        return name_id
+
+    def add(self, name, weapon=None, is_player=False):
+        # weapon is a weapon id; picked at random like Fighter when omitted
+        if weapon is None:
+            weapon = self.rng.randrange(len(WEAPON_TABLE))
+        return self.add_many([name], [weapon], is_player)[0]
+
+    def add_many(self, names, weapons, is_player=False):
+        # Bulk insert; returns the new rows' indices. A name of None means a
+        # generated AI name.
+        count = len(weapons)
+        start = self.size
+        self.reserve(start + count)
+        rows = slice(start, start + count)
+        c = self.columns
+        c["name_id"][rows] = [AI_NAME if name is None else self.intern(name) for name in names]
+        c["weapon"][rows] = weapons
+        c["health"][rows] = 100
+        c["max_health"][rows] = 100
+        c["x"][rows] = 0
+        c["direction"][rows] = 1
+        c["attacking"][rows] = False
+        c["attack_cooldown"][rows] = 0
+        c["attack_frame"][rows] = 0
+        c["wins"][rows] = 0
+        c["alive"][rows] = True
+        c["is_player"][rows] = is_player
+        self.size += count
+        return range(start, start + count)
+
+    def add_ai(self, count, seed=None):
+        # count AI entrants with random weapons. Their names are derived from
+        # the row number (see ai_name) rather than stored.
+        np_rng = np.random.default_rng(seed)
+        weapons = np_rng.integers(0, len(WEAPON_TABLE), count)
+        return self.add_many([None] * count, weapons)
+
+    def name(self, index):
+        name_id = self.columns["name_id"][index]
+        if name_id == AI_NAME:
+            return ai_name(index)
+        return self.names[name_id]
+
+    def column(self, name):
+        # Live view of a field for the first len(self) fighters
+        return self.columns[name][:self.size]
+
+    def weapon_stat(self, key):
+        # Per-fighter weapon stat, e.g. roster.weapon_stat("damage")
+        return WEAPON_COLUMNS[key][self.column("weapon")]
+
+    def nbytes(self):
+        arrays = sum(column[:self.size].nbytes for column in self.columns.values())
+        names = sum(sys.getsizeof(name) for name in self.names) + sys.getsizeof(self.names)
+        return arrays + names
+
+def column_property(name, cast):
+    def get(self):
+        return cast(self.roster.columns[name][self.index])
+
+    def set(self, value):
+        self.roster.columns[name][self.index] = value
+    return property(get, set)
+
+class FighterView:
+    __slots__ = ("roster", "index")
+
+    # Constant for every fighter, so not stored per row
+    width = FIGHTER_WIDTH
+    height = FIGHTER_HEIGHT
+    y = SCREEN_HEIGHT - GROUND_HEIGHT - FIGHTER_HEIGHT
+    velocity = VELOCITY
+
+    def __init__(self, roster, index):
+        self.roster = roster
+        self.index = index
+
+    health = column_property("health", int)
+    max_health = column_property("max_health", int)
+    x = column_property("x", int)
+    direction = column_property("direction", int)
+    attacking = column_property("attacking", bool)
+    attack_cooldown = column_property("attack_cooldown", int)
+    attack_frame = column_property("attack_frame", int)
+    wins = column_property("wins", int)
+    alive = column_property("alive", bool)
+    is_player = column_property("is_player", bool)
+
+    @property
+    def name(self):
+        return self.roster.name(self.index)
+
+    @property
+    def weapon(self):
+        return WEAPON_TABLE[self.roster.columns["weapon"][self.index]]
+
+    @weapon.setter
+    def weapon(self, weapon):
+        self.roster.columns["weapon"][self.index] = WEAPON_IDS[weapon["name"]]
+
+    @property
+    def rng(self):
+        return self.roster.rng
+
+    def __eq__(self, other):
+        return (isinstance(other, FighterView) and other.roster is self.roster
+                and other.index == self.index)
+
+    def __hash__(self):
+        return hash((id(self.roster), self.index))
+
+    def __repr__(self):
+        return f"FighterView({self.name!r}, index={self.index})"
+
+    # Same fight logic as a regular Fighter
+    move = Fighter.move
+    attack = Fighter.attack
+    update = Fighter.update
+
+def measure(build):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+def memory_benchmark(sizes=(1_000, 100_000, 1_000_000), object_limit=100_000):
+    # Bytes held by a roster vs. the same number of Fighter objects. Object
+    # rosters above object_limit are extrapolated from the largest measured
+    # size to keep the run short.
+    rows = []
+    per_object = None
+    build_roster(10)  # one-off allocations (NumPy RNG setup) aren't per fighter
+    for size in sizes:
+        roster_bytes = measure(lambda: build_roster(size))
+        if size <= object_limit:
+            object_bytes = measure(lambda: [Fighter(f"Viking {i}") for i in range(size)])
+            per_object = object_bytes / size
+            estimated = False
+        else:
+            object_bytes = int(per_object * size)
+            estimated = True
+        rows.append({"fighters": size, "roster_bytes": roster_bytes,
+                     "object_bytes": object_bytes, "object_estimated": estimated})
+    return rows
+
+def build_roster(size):
+    roster = Roster(capacity=size)
+    roster.add_ai(size, seed=0)
+    return roster
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Roster memory benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--object-limit", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    print(f"{'fighters':>10} {'roster':>12} {'B/fighter':>10} {'objects':>14} {'B/fighter':>10}")
+    for row in memory_benchmark(args.sizes, args.object_limit):
+        n = row["fighters"]
+        mark = "~" if row["object_estimated"] else " "
+        print(f"{n:>10} {row['roster_bytes']:>12,} {row['roster_bytes'] / n:>10.1f} "
+              f"{mark}{row['object_bytes']:>13,} {row['object_bytes'] / n:>10.1f}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
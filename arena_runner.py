@@ -0,0 +1,83 @@
+import os
+import sys
+import random
+import hashlib
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from arena_core import Tournament
+from arena_resolver import resolve_fight_events
+
+# Runs large numbers of independent tournaments across a process pool.
+# Tournament i of a run with base seed S always gets the same
+# random.Random seed, so results do not depend on the worker count, the
+# chunk size or the order in which chunks happen to finish.
+
+def tournament_seed(base_seed, index):
+    digest = hashlib.blake2b(f"{base_seed}:{index}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+def run_tournament(index, base_seed=0, resolver=resolve_fight_events):
+    seed = tournament_seed(base_seed, index)
+    tournament = Tournament(rng=random.Random(seed))
+    winner = tournament.resolve(resolver=resolver)
+    return {
+        "index": index,
+        "seed": seed,
+        "winner": winner.name,
+        "weapon": winner.weapon["name"],
+        "player_won": winner.is_player,
+    }
+
+def run_chunk(start, stop, base_seed, resolver):
+    return [run_tournament(i, base_seed, resolver) for i in range(start, stop)]
+
+def run_tournaments(count, base_seed=0, workers=None, chunksize=256,
+                    resolver=resolve_fight_events, max_pending=None):
+    # Yields one result dict per tournament as chunks finish (not in index
+    # order; every result carries its index). workers=0 runs in-process.
+    if workers == 0:
+        for start in range(0, count, chunksize):
+            yield from run_chunk(start, min(start + chunksize, count), base_seed, resolver)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    # Keep a bounded number of chunks in flight so huge runs don't queue
+    # millions of futures up front
+    max_pending = max_pending or workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        starts = iter(range(0, count, chunksize))
+        pending = set()
+        while True:
+            for start in starts:
+                pending.add(pool.submit(run_chunk, start, min(start + chunksize, count),
+                                        base_seed, resolver))
+                if len(pending) >= max_pending:
+                    break
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resolve many headless tournaments")
+    parser.add_argument("count", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunksize", type=int, default=256)
+    args = parser.parse_args(argv)
+
+    weapons = Counter()
+    player_wins = 0
+    for result in run_tournaments(args.count, args.seed, args.workers, args.chunksize):
+        weapons[result["weapon"]] += 1
+        player_wins += result["player_won"]
+
+    print(f"Tournaments: {args.count}")
+    print(f"Player win rate: {player_wins / max(args.count, 1):.4f}")
+    for name, wins in weapons.most_common():
+        print(f"{name}: {wins / args.count:.4f}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
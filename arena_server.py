@@ -0,0 +1,358 @@
+import sys
+import json
+import base64
+import time
+import random
+import asyncio
+import argparse
+import traceback
+from collections import deque
+from arena_core import (FPS, MOVE_LEFT, MOVE_RIGHT, ATTACK, Tournament, step_fight, apply_input,
+                        opponent_of)
+from arena_loop import FixedTimestep
+from arena_snapshot import SnapshotEncoder, SnapshotDecoder
+
+# Tournament server. Players connect over TCP and are seated in tournaments
+# (humans_per_tournament at a time, the rest of the field AI). The server is
+# authoritative: it runs every bout of every tournament on one fixed tick
+# with the same step_fight the game uses, applies players' inputs at the
+# start of the next tick, and sends each room's bout state to its players
+# every few ticks. Bouts whose humans have left are fought by the AI.
+#
+# Messages are JSON objects, one per line.
+#   client -> server
+#     {"type": "join", "name": "Astrid", "compact": false}
+#     {"type": "input", "action": 1}        MOVE_LEFT, MOVE_RIGHT or ATTACK
+#   server -> client
+#     {"type": "joined", "room": 3, "fighters": [...], "you": 0}
+#     {"type": "fight", "fighters": [i, j], "round": 0}   indices into fighters
+#     {"type": "state", "tick": 120, "fight": [[x, health, direction, attacking, attack_frame], ...]}
+#     {"type": "snap", "data": "..."}     instead of "state" for compact clients:
+#                                         a base64 arena_snapshot frame
+#     {"type": "bout", "winner": i}
+#     {"type": "result", "winner": i, "you_won": false}
+
+MAX_BUFFER = 256 * 1024  # a client this far behind is disconnected
+
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+def fighter_state(fighter):
+    return [fighter.x, fighter.health, fighter.direction, fighter.attacking, fighter.attack_frame]
+
+class Client:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.name = None
+        self.room = None
+        self.fighter = None
+        self.compact = False  # wants arena_snapshot frames instead of JSON state
+        self.inputs = deque(maxlen=16)
+
+    def send(self, message):
+        self.send_bytes(encode(message))
+
+    def send_bytes(self, data):
+        # Never waits: the tick loop can't stall on one slow socket
+        if self.writer.is_closing():
+            return
+        if self.writer.transport.get_write_buffer_size() > MAX_BUFFER:
+            self.writer.close()
+            return
+        self.writer.write(data)
+
+class Room:
+    def __init__(self, room_id, clients, seed, entrants=8):
+        self.id = room_id
+        self.clients = list(clients)
+        self.tournament = Tournament(rng=random.Random(seed), entrants=entrants,
+                                     players=[client.name for client in clients])
+        self.index = {fighter: i for i, fighter in enumerate(self.tournament.all_fighters)}
+        self.tick = 0
+        self.encoder = SnapshotEncoder()
+        for client, fighter in zip(self.clients, self.tournament.players):
+            client.room = self
+            client.fighter = fighter
+        roster = [{"name": f.name, "weapon": f.weapon["name"], "max_health": f.max_health}
+                  for f in self.tournament.all_fighters]
+        for client in self.clients:
+            client.send({"type": "joined", "room": room_id, "fighters": roster,
+                         "you": self.index[client.fighter]})
+        self.start_fight()
+
+    def broadcast(self, message):
+        data = encode(message)
+        for client in self.clients:
+            client.send_bytes(data)
+
+    def start_fight(self):
+        if not self.tournament.start_next_fight():
+            return False
+        fighter1, fighter2 = self.tournament.active_fight
+        self.broadcast({"type": "fight", "fighters": [self.index[fighter1], self.index[fighter2]],
+                        "round": self.tournament.current_round})
+        return True
+
+    def leave(self, client):
+        # The AI takes over the departed player's fighter
+        self.clients.remove(client)
+        client.fighter.is_player = False
+
+    def step(self):
+        # One simulation tick; returns False once the tournament is over
+        fight = self.tournament.active_fight
+        for client in self.clients:
+            while client.inputs:
+                action = client.inputs.popleft()
+                if client.fighter in fight:
+                    apply_input(client.fighter, action, opponent_of(fight, client.fighter))
+        self.tick += 1
+        if step_fight(*fight):
+            self.tournament.finish_fight()
+            self.broadcast({"type": "bout", "winner": self.index[fight[0] if fight[0].alive else fight[1]]})
+            if not self.start_fight():
+                winner = self.tournament.winner
+                for client in self.clients:
+                    client.send({"type": "result", "winner": self.index[winner],
+                                 "you_won": winner is client.fighter})
+                    client.room = client.fighter = None
+                return False
+        return True
+
+    def send_state(self):
+        # The encoder runs on every send, even with no compact clients, so
+        # its deltas always follow on from the frame before
+        fight = self.tournament.active_fight
+        snap = encode({"type": "snap",
+                       "data": base64.b64encode(self.encoder.encode(self.tick, fight)).decode("ascii")})
+        state = None
+        for client in self.clients:
+            if client.compact:
+                client.send_bytes(snap)
+            else:
+                if state is None:
+                    state = encode({"type": "state", "tick": self.tick,
+                                    "fight": [fighter_state(f) for f in fight]})
+                client.send_bytes(state)
+
+class TournamentServer:
+    def __init__(self, host="127.0.0.1", port=9000, tick_rate=FPS, send_rate=20,
+                 humans_per_tournament=1, entrants=8, seed=None):
+        if not 1 <= humans_per_tournament <= entrants:
+            raise ValueError(f"humans per tournament must be between 1 and {entrants}")
+        self.host = host
+        self.port = port
+        self.tick_rate = tick_rate
+        self.send_every = max(1, tick_rate // send_rate)
+        self.humans_per_tournament = humans_per_tournament
+        self.entrants = entrants
+        self.rng = random.Random(seed)
+        self.lobby = []
+        self.rooms = {}
+        self.next_room = 1
+        self.ticks = 0
+        self.tick_times = deque(maxlen=600)  # seconds spent per tick, recent
+        self.bouts_finished = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        self.ticker = asyncio.create_task(self.tick_loop())
+
+    async def stop(self):
+        self.ticker.cancel()
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle_client(self, reader, writer):
+        client = Client(reader, writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    client.send({"type": "error", "error": "bad message"})
+                    continue
+                self.handle_message(client, message)
+        except ConnectionError:
+            pass
+        finally:
+            if client in self.lobby:
+                self.lobby.remove(client)
+            if client.room:
+                client.room.leave(client)
+            writer.close()
+
+    def handle_message(self, client, message):
+        if not isinstance(message, dict):
+            client.send({"type": "error", "error": "bad message"})
+            return
+        kind = message.get("type")
+        if kind == "join" and client.room is None and client not in self.lobby:
+            client.name = str(message.get("name", "Player"))[:24]
+            client.compact = bool(message.get("compact"))
+            self.lobby.append(client)
+            if len(self.lobby) >= self.humans_per_tournament:
+                self.open_room(self.lobby[:self.humans_per_tournament])
+                del self.lobby[:self.humans_per_tournament]
+        elif kind == "input" and client.fighter is not None:
+            if message.get("action") in (MOVE_LEFT, MOVE_RIGHT, ATTACK):
+                client.inputs.append(message["action"])
+        else:
+            client.send({"type": "error", "error": f"unexpected {kind!r}"})
+
+    def open_room(self, clients):
+        room = Room(self.next_room, clients, self.rng.getrandbits(64), self.entrants)
+        self.rooms[room.id] = room
+        self.next_room += 1
+
+    async def tick_loop(self):
+        timestep = FixedTimestep(self.tick_rate)
+        while True:
+            for _ in range(timestep.advance()):
+                start = time.perf_counter()
+                try:
+                    self.tick()
+                except Exception:
+                    # Keep every other room running; the failure goes to stderr
+                    traceback.print_exc()
+                self.tick_times.append(time.perf_counter() - start)
+            await asyncio.sleep(timestep.dt - timestep.accumulator)
+
+    def tick(self):
+        self.ticks += 1
+        send = self.ticks % self.send_every == 0
+        for room_id, room in list(self.rooms.items()):
+            if not room.clients:
+                # Everyone left; nobody is watching the rest
+                del self.rooms[room_id]
+                continue
+            bouts = room.tournament.bracket.played
+            try:
+                if not room.step():
+                    del self.rooms[room_id]
+                elif send:
+                    room.send_state()
+            except Exception:
+                # One broken room is closed rather than failing every tick
+                print(f"room {room_id} failed and was closed:", file=sys.stderr)
+                traceback.print_exc()
+                room.broadcast({"type": "error", "error": "tournament aborted"})
+                for client in room.clients:
+                    client.room = client.fighter = None
+                del self.rooms[room_id]
+                continue
+            self.bouts_finished += room.tournament.bracket.played - bouts
+
+    def stats(self):
+        times = sorted(self.tick_times)
+        return {
+            "rooms": len(self.rooms),
+            "lobby": len(self.lobby),
+            "ticks": self.ticks,
+            "bouts_finished": self.bouts_finished,
+            "tick_p50_ms": times[len(times) // 2] * 1000 if times else 0,
+            "tick_p99_ms": times[int(len(times) * 0.99)] * 1000 if times else 0,
+        }
+
+async def bot(host, port, name, rng, tournaments=1, compact=False):
+    # A scripted client: closes in on its opponent and attacks when near.
+    # Returns how many tournaments it won.
+    reader, writer = await asyncio.open_connection(host, port)
+    wins = 0
+    try:
+        for _ in range(tournaments):
+            writer.write(encode({"type": "join", "name": name, "compact": compact}))
+            decoder = SnapshotDecoder()
+            you = opponent = None
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return wins
+                message = json.loads(line)
+                kind = message["type"]
+                if kind == "joined":
+                    you = message["you"]
+                elif kind == "fight":
+                    opponent = message["fighters"]
+                elif kind in ("state", "snap"):
+                    if kind == "snap":
+                        xs = [f.x for f in decoder.decode(base64.b64decode(message["data"]))]
+                    else:
+                        xs = [f[0] for f in message["fight"]]
+                    if not opponent or you not in opponent:
+                        continue
+                    mine, theirs = xs if opponent[0] == you else xs[::-1]
+                    gap = theirs - mine
+                    if abs(gap) < 100 and rng.random() < 0.5:
+                        action = ATTACK
+                    else:
+                        action = MOVE_RIGHT if gap > 0 else MOVE_LEFT
+                    writer.write(encode({"type": "input", "action": action}))
+                elif kind == "result":
+                    wins += message["you_won"]
+                    break
+    finally:
+        writer.close()
+    return wins
+
+async def load_test(bots, port=0, tick_rate=FPS, seed=0, compact=False):
+    # Server and bots in one process; returns the server's stats
+    server = TournamentServer(port=port, tick_rate=tick_rate, seed=seed)
+    await server.start()
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    tasks = [asyncio.create_task(bot("127.0.0.1", server.port, f"Bot {i}", random.Random(rng.random()),
+                                     compact=compact))
+             for i in range(bots)]
+    peak = 0
+    while not all(task.done() for task in tasks):
+        await asyncio.sleep(0.5)
+        peak = max(peak, len(server.rooms))
+    wins = sum(task.result() for task in tasks)
+    stats = server.stats()
+    stats.update(peak_rooms=peak, bot_wins=wins, seconds=time.perf_counter() - start)
+    await server.stop()
+    return stats
+
+async def serve(host, port, tick_rate, humans, entrants=8):
+    server = TournamentServer(host, port, tick_rate, humans_per_tournament=humans, entrants=entrants)
+    await server.start()
+    print(f"Tournament server on {host}:{server.port}")
+    while True:
+        await asyncio.sleep(10)
+        print(server.stats())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Viking Arena tournament server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--tick-rate", type=int, default=FPS)
+    parser.add_argument("--humans", type=int, default=1, help="human players per tournament")
+    parser.add_argument("--entrants", type=int, default=8, help="fighters per tournament, humans included")
+    parser.add_argument("--load-test", type=int, metavar="BOTS",
+                        help="run the server with this many local bot clients and report")
+    parser.add_argument("--compact", action="store_true", help="load-test bots use snapshot frames")
+    args = parser.parse_args(argv)
+    if args.entrants < 2:
+        parser.error("--entrants must be at least 2")
+    if not 1 <= args.humans <= args.entrants:
+        parser.error(f"--humans must be between 1 and --entrants ({args.entrants})")
+
+    if args.load_test:
+        stats = asyncio.run(load_test(args.load_test, tick_rate=args.tick_rate, compact=args.compact))
+        for key, value in stats.items():
+            print(f"{key:<16} {value:.2f}" if isinstance(value, float) else f"{key:<16} {value}")
+        return
+    try:
+        asyncio.run(serve(args.host, args.port, args.tick_rate, args.humans, args.entrants))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
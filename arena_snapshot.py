@@ -0,0 +1,263 @@
+import sys
+import json
+import time
+import random
+import struct
+import argparse
+from arena_core import WEAPONS, Fighter, place_fighters, step_fight
+from arena_replay import write_varint, read_varint
+
+# Compact snapshots of a bout for streaming to clients and spectators.
+#
+# A keyframe carries everything about each fighter, including the fields that
+# never change during a bout (name, weapon, max_health, wins). Every other
+# frame is a delta against the previous one: per fighter a bitmask of the
+# fields that changed, followed by just those fields. x is sent as the
+# zigzag-varint difference from the last x (one byte for a normal step),
+# direction/attacking/alive/is_player share one flags byte, and health, the
+# attack frame and the cooldown are a byte each. Positions are quantized to
+# whole pixels. A frame where nothing moved costs a few bytes.
+#
+# The decoder keeps a Fighter per slot and updates it in place, so the
+# result can be handed straight to the renderer.
+
+KEYFRAME = 0x4B  # "K"
+DELTA = 0x44  # "D"
+
+X = 1
+HEALTH = 2
+FLAGS = 4
+ATTACK_FRAME = 8
+COOLDOWN = 16
+
+FACING_LEFT = 1
+ATTACKING = 2
+ALIVE = 4
+IS_PLAYER = 8
+
+WEAPON_IDS = {weapon["name"]: i for i, weapon in enumerate(WEAPONS)}
+KEY_HEADER = struct.Struct("<BIB")
+KEY_FIGHTER = struct.Struct("<BBH")  # weapon id, max health, wins
+DYNAMIC = struct.Struct("<iBBBB")  # x, health, flags, attack frame, cooldown
+
+def zigzag(value):
+    return value * 2 if value >= 0 else -value * 2 - 1
+
+def unzigzag(value):
+    return value >> 1 if value % 2 == 0 else -(value >> 1) - 1
+
+def clamp_byte(value):
+    return min(max(int(value), 0), 255)
+
+def dynamic_state(fighter):
+    flags = ((FACING_LEFT if fighter.direction == -1 else 0) | (ATTACKING if fighter.attacking else 0)
+             | (ALIVE if fighter.alive else 0) | (IS_PLAYER if fighter.is_player else 0))
+    return (int(round(fighter.x)), clamp_byte(fighter.health), flags,
+            clamp_byte(fighter.attack_frame), clamp_byte(fighter.attack_cooldown))
+
+def static_state(fighter):
+    return (fighter.name, WEAPON_IDS[fighter.weapon["name"]], fighter.max_health, fighter.wins)
+
+class SnapshotEncoder:
+    def __init__(self, keyframe_every=120):
+        # A keyframe at least every keyframe_every frames lets late joiners
+        # and lossy transports resynchronise
+        self.keyframe_every = keyframe_every
+        self.since_keyframe = 0
+        self.last_tick = 0
+        self.statics = None
+        self.dynamics = None
+
+    def encode(self, tick, fighters):
+        statics = [static_state(f) for f in fighters]
+        dynamics = [dynamic_state(f) for f in fighters]
+        if statics != self.statics or self.since_keyframe >= self.keyframe_every:
+            data = self.keyframe(tick, statics, dynamics)
+        else:
+            data = self.delta(tick, dynamics)
+        self.statics = statics
+        self.dynamics = dynamics
+        self.last_tick = tick
+        return data
+
+    def keyframe(self, tick, statics, dynamics):
+        self.since_keyframe = 0
+        out = bytearray(KEY_HEADER.pack(KEYFRAME, tick, len(statics)))
+        for (name, weapon, max_health, wins), dynamic in zip(statics, dynamics):
+            encoded = name.encode()[:255]
+            out.append(len(encoded))
+            out += encoded
+            out += KEY_FIGHTER.pack(weapon, max_health, wins)
+            out += DYNAMIC.pack(*dynamic)
+        return bytes(out)
+
+    def delta(self, tick, dynamics):
+        self.since_keyframe += 1
+        out = bytearray([DELTA])
+        write_varint(out, tick - self.last_tick)
+        for (x, health, flags, frame, cooldown), (old_x, old_health, old_flags, old_frame, old_cooldown) \
+                in zip(dynamics, self.dynamics):
+            mask_at = len(out)
+            out.append(0)
+            mask = 0
+            if x != old_x:
+                mask |= X
+                write_varint(out, zigzag(x - old_x))
+            if health != old_health:
+                mask |= HEALTH
+                out.append(health)
+            if flags != old_flags:
+                mask |= FLAGS
+                out.append(flags)
+            if frame != old_frame:
+                mask |= ATTACK_FRAME
+                out.append(frame)
+            if cooldown != old_cooldown:
+                mask |= COOLDOWN
+                out.append(cooldown)
+            out[mask_at] = mask
+        return bytes(out)
+
+class SnapshotDecoder:
+    def __init__(self):
+        self.tick = None
+        self.fighters = []
+
+    def decode(self, data):
+        # Applies one frame; returns the fighters it describes
+        if data[0] == KEYFRAME:
+            self.read_keyframe(data)
+        elif data[0] == DELTA:
+            if self.tick is None:
+                raise ValueError("delta before the first keyframe")
+            self.read_delta(data)
+        else:
+            raise ValueError(f"unknown frame type {data[0]:#x}")
+        return self.fighters
+
+    def read_keyframe(self, data):
+        _, self.tick, count = KEY_HEADER.unpack_from(data)
+        pos = KEY_HEADER.size
+        fighters = []
+        for _ in range(count):
+            length = data[pos]
+            name = bytes(data[pos + 1:pos + 1 + length]).decode()
+            pos += 1 + length
+            weapon, max_health, wins = KEY_FIGHTER.unpack_from(data, pos)
+            pos += KEY_FIGHTER.size
+            fighter = Fighter(name, weapon=WEAPONS[weapon])
+            fighter.max_health = max_health
+            fighter.wins = wins
+            self.set_dynamic(fighter, *DYNAMIC.unpack_from(data, pos))
+            pos += DYNAMIC.size
+            fighters.append(fighter)
+        self.fighters = fighters
+
+    def read_delta(self, data):
+        delta, pos = read_varint(data, 1)
+        self.tick += delta
+        for fighter in self.fighters:
+            mask = data[pos]
+            pos += 1
+            if mask & X:
+                step, pos = read_varint(data, pos)
+                fighter.x += unzigzag(step)
+            if mask & HEALTH:
+                fighter.health = data[pos]
+                pos += 1
+            if mask & FLAGS:
+                self.set_flags(fighter, data[pos])
+                pos += 1
+            if mask & ATTACK_FRAME:
+                fighter.attack_frame = data[pos]
+                pos += 1
+            if mask & COOLDOWN:
+                fighter.attack_cooldown = data[pos]
+                pos += 1
+
+    def set_dynamic(self, fighter, x, health, flags, frame, cooldown):
+        fighter.x = x
+        fighter.health = health
+        fighter.attack_frame = frame
+        fighter.attack_cooldown = cooldown
+        self.set_flags(fighter, flags)
+
+    def set_flags(self, fighter, flags):
+        fighter.direction = -1 if flags & FACING_LEFT else 1
+        fighter.attacking = bool(flags & ATTACKING)
+        fighter.alive = bool(flags & ALIVE)
+        fighter.is_player = bool(flags & IS_PLAYER)
+
+def json_state(tick, fighters):
+    # Everything sent as plain JSON every frame, for comparison
+    return json.dumps({"tick": tick, "fighters": [
+        {"name": f.name, "weapon": f.weapon["name"], "max_health": f.max_health, "wins": f.wins,
+         "x": f.x, "health": f.health, "direction": f.direction, "attacking": f.attacking,
+         "attack_frame": f.attack_frame, "attack_cooldown": f.attack_cooldown, "alive": f.alive}
+        for f in fighters]}, separators=(",", ":")).encode()
+
+def record_bouts(bouts, seed=0):
+    # (tick, fighters) copies for every tick of `bouts` random bouts
+    rng = random.Random(seed)
+    frames = []
+    tick = 0
+    for _ in range(bouts):
+        fighter1, fighter2 = Fighter("Ragnar", rng=rng), Fighter("Lagertha", rng=rng)
+        place_fighters(fighter1, fighter2)
+        while True:
+            tick += 1
+            done = step_fight(fighter1, fighter2)
+            frames.append((tick, [snapshot_copy(fighter1), snapshot_copy(fighter2)]))
+            if done:
+                break
+    return frames
+
+def snapshot_copy(fighter):
+    copy = Fighter(fighter.name, fighter.is_player, fighter.weapon)
+    for key in ("x", "health", "max_health", "direction", "attacking", "attack_frame",
+                "attack_cooldown", "wins", "alive"):
+        setattr(copy, key, getattr(fighter, key))
+    return copy
+
+def benchmark(bouts=200, keyframe_every=120, seed=0):
+    frames = record_bouts(bouts, seed)
+    encoder = SnapshotEncoder(keyframe_every)
+    start = time.perf_counter()
+    encoded = [encoder.encode(tick, fighters) for tick, fighters in frames]
+    encode_time = time.perf_counter() - start
+
+    decoder = SnapshotDecoder()
+    start = time.perf_counter()
+    for data in encoded:
+        decoder.decode(data)
+    decode_time = time.perf_counter() - start
+
+    # The last frame must round-trip exactly
+    last = frames[-1][1]
+    assert [dynamic_state(f) for f in decoder.fighters] == [dynamic_state(f) for f in last]
+
+    keyframes = [len(data) for data in encoded if data[0] == KEYFRAME]
+    deltas = [len(data) for data in encoded if data[0] == DELTA]
+    json_bytes = sum(len(json_state(tick, fighters)) for tick, fighters in frames)
+    return {
+        "frames": len(frames),
+        "bytes_per_tick": sum(keyframes + deltas) / len(frames),
+        "keyframe_bytes": sum(keyframes) / len(keyframes),
+        "delta_bytes": sum(deltas) / len(deltas) if deltas else 0,
+        "json_bytes_per_tick": json_bytes / len(frames),
+        "encode_per_s": len(frames) / encode_time,
+        "decode_per_s": len(frames) / decode_time,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Snapshot size and speed benchmark")
+    parser.add_argument("--bouts", type=int, default=200)
+    parser.add_argument("--keyframe-every", type=int, default=120)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    for key, value in benchmark(args.bouts, args.keyframe_every, args.seed).items():
+        print(f"{key:<20} {value:,.1f}" if isinstance(value, float) else f"{key:<20} {value:,}")
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -5,16 +5,23 @@ import math
 import os
 import time
 import datetime
+import argparse
 from pygame.locals import *
+from arena_render import DirtyRenderer, TextCache, SpriteAtlas
+from arena_assets import AssetRegistry
+from arena_loop import FixedTimestep, SPEEDS, lerp
+from arena_resolver import resolve_fight_events
+from arena_ledger import Ledger, DEFAULT_LEDGER, cents
+from arena_ads import AdPipeline, LocalAdSource, HttpAdSource
+from arena_profile import FrameProfiler
+from arena_entitlements import Entitlements
+from arena_bracket_view import BracketView
+from arena_replay import Recorder, START_FIGHT, SKIP_FIGHT, DEFAULT_REPLAY_DIR, new_tournament
+from arena_core import (SCREEN_WIDTH, SCREEN_HEIGHT, GROUND_HEIGHT, FPS, ENTRY_FEE,
+                        WEAPONS, MOVE_LEFT, MOVE_RIGHT, ATTACK, Fighter, Tournament,
+                        step_fight, apply_input, player_of, opponent_of)
 
-# Initialize pygame
-pygame.init()
-pygame.font.init()
-
-# Constants
-SCREEN_WIDTH, SCREEN_HEIGHT = 1000, 700
-GROUND_HEIGHT = 100
-FPS = 60
+# Colors
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
 RED = (220, 20, 60)
@@ -25,6 +32,7 @@ BROWN = (139, 69, 19)
 GRAY = (105, 105, 105)
 LIGHT_BROWN = (210, 180, 140)
 DARK_RED = (139, 0, 0)
+BACKGROUND = (30, 30, 50)  # Dark blue background
 
 # Game states
 MAIN_MENU = 0
@@ -35,17 +43,14 @@ AD_SCREEN = 4
 RESULTS = 5
 WITHDRAW = 6
 
-# Create the screen
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Viking Arena: Tournament of Valor")
-clock = pygame.time.Clock()
+# Profiler phase name of each screen's draw method
+DRAW_PHASES = {MAIN_MENU: "draw_main_menu", CHARACTER_SELECT: "draw_character_select",
+               TOURNAMENT: "draw_tournament", FIGHT: "draw_fight", AD_SCREEN: "draw_ad_screen",
+               RESULTS: "draw_results", WITHDRAW: "draw_withdraw"}
 
-# Fonts
-title_font = pygame.font.SysFont("arial", 64, bold=True)
-large_font = pygame.font.SysFont("arial", 42, bold=True)
-medium_font = pygame.font.SysFont("arial", 32)
-small_font = pygame.font.SysFont("arial", 24)
-tiny_font = pygame.font.SysFont("arial", 18)
+# Rendered text is cached; render_text takes the same arguments as Font.render
+text_cache = TextCache()
+render_text = text_cache.render
 
 # Load images (in-memory for portability)
 def create_weapon_surface(color, size, weapon_type):
@@ -77,664 +82,726 @@ def create_character_surface(color, size, helmet=True):
         pygame.draw.circle(surf, RED, (size[0]//2, size[1]//4-size[1]//12), size[1]//20)
     return surf
 
-# Create in-memory images
-character_img = create_character_surface(BLUE, (80, 120))
-player_img = create_character_surface(RED, (80, 120))
-sword_img = create_weapon_surface(GRAY, (40, 80), "sword")
-axe_img = create_weapon_surface(GRAY, (60, 60), "axe")
-spear_img = create_weapon_surface(GRAY, (30, 100), "spear")
-ad_img = pygame.Surface((SCREEN_WIDTH-100, SCREEN_HEIGHT-200))
-ad_img.fill((30, 30, 50))
-pygame.draw.rect(ad_img, (70, 70, 120), (20, 20, ad_img.get_width()-40, ad_img.get_height()-40))
-ad_text = large_font.render("HIGH VALUE AD SPACE", True, GOLD)
-ad_img.blit(ad_text, (ad_img.get_width()//2 - ad_text.get_width()//2, 
-                     ad_img.get_height()//2 - ad_text.get_height()//2))
+def create_ad_surface():
+    surf = pygame.Surface((SCREEN_WIDTH-100, SCREEN_HEIGHT-200))
+    surf.fill((30, 30, 50))
+    pygame.draw.rect(surf, (70, 70, 120), (20, 20, surf.get_width()-40, surf.get_height()-40))
+    ad_text = render_text(assets.large_font, "HIGH VALUE AD SPACE", True, GOLD)
+    surf.blit(ad_text, (surf.get_width()//2 - ad_text.get_width()//2, 
+                        surf.get_height()//2 - ad_text.get_height()//2))
+    return surf
 
-# Weapon types
-WEAPONS = [
-    {"name": "Sword", "damage": 25, "speed": 8, "range": 60, "img": sword_img},
-    {"name": "Axe", "damage": 35, "speed": 5, "range": 50, "img": axe_img},
-    {"name": "Spear", "damage": 20, "speed": 10, "range": 80, "img": spear_img}
-]
+def create_screen():
+    assets["pygame"]
+    surf = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Viking Arena: Tournament of Valor")
+    return surf
 
-class Fighter:
-    def __init__(self, name, is_player=False):
-        self.name = name
-        self.is_player = is_player
-        self.health = 100
-        self.max_health = 100
-        self.weapon = random.choice(WEAPONS)
-        self.x = 0
-        self.y = SCREEN_HEIGHT - GROUND_HEIGHT - 120
-        self.width = 80
-        self.height = 120
-        self.velocity = 5
-        self.direction = 1  # 1 for right, -1 for left
-        self.attacking = False
-        self.attack_cooldown = 0
-        self.attack_frame = 0
-        self.wins = 0
-        self.alive = True
-    
-    def draw(self, screen):
-        color = RED if self.is_player else BLUE
-        char_img = player_img if self.is_player else character_img
-        
-        # Draw character
-        screen.blit(pygame.transform.flip(char_img, self.direction == -1, False), 
-                   (self.x, self.y))
-        
-        # Draw weapon
-        weapon_x = self.x + (self.width//2 if self.direction == 1 else -self.weapon["img"].get_width()//2)
-        weapon_y = self.y + 30
-        
-        if self.attacking:
-            # Animate attack
-            swing_offset = math.sin(self.attack_frame * 0.5) * 30 * self.direction
-            screen.blit(pygame.transform.flip(self.weapon["img"], self.direction == -1, False), 
-                       (weapon_x + swing_offset, weapon_y - 20))
-        else:
-            screen.blit(pygame.transform.flip(self.weapon["img"], self.direction == -1, False), 
-                       (weapon_x, weapon_y))
-        
-        # Draw health bar
-        bar_width = 100
-        pygame.draw.rect(screen, DARK_RED, (self.x + self.width//2 - bar_width//2, self.y - 30, bar_width, 20))
-        pygame.draw.rect(screen, GREEN, (self.x + self.width//2 - bar_width//2, self.y - 30, 
-                                         bar_width * (self.health / self.max_health), 20))
-        pygame.draw.rect(screen, WHITE, (self.x + self.width//2 - bar_width//2, self.y - 30, bar_width, 20), 2)
-        
-        # Draw name
-        name_text = small_font.render(self.name, True, WHITE)
-        screen.blit(name_text, (self.x + self.width//2 - name_text.get_width()//2, self.y - 55))
-        
-        # Draw weapon info
-        weapon_text = tiny_font.render(f"{self.weapon['name']} (Dmg: {self.weapon['damage']})", True, GOLD)
-        screen.blit(weapon_text, (self.x + self.width//2 - weapon_text.get_width()//2, self.y - 80))
-    
-    def move(self, target):
-        if self.attacking or not self.alive:
-            return
-        
-        distance = abs(self.x - target.x)
-        in_range = distance < self.weapon["range"]
-        
-        if not in_range:
-            # Move toward target
-            if self.x < target.x:
-                self.x += self.velocity
-                self.direction = 1
-            else:
-                self.x -= self.velocity
-                self.direction = -1
-        elif self.attack_cooldown <= 0:
-            # Attack if in range and cooldown is done
-            self.attacking = True
-            self.attack_frame = 0
-            self.attack_cooldown = 60 // self.weapon["speed"]  # Frames until next attack
-            self.direction = 1 if target.x > self.x else -1
-            
-            # Calculate hit chance (90% base, modified by weapon speed)
-            hit_chance = 0.9 + (self.weapon["speed"] - 5) * 0.02
-            if random.random() < hit_chance:
-                target.health -= self.weapon["damage"]
-                if target.health <= 0:
-                    target.health = 0
-                    target.alive = False
-                    self.wins += 1
-    
-    def update(self):
-        if self.attacking:
-            self.attack_frame += 1
-            if self.attack_frame > 20:  # Attack animation lasts 20 frames
-                self.attacking = False
-                self.attack_frame = 0
-        
-        if self.attack_cooldown > 0:
-            self.attack_cooldown -= 1
+def create_sprites():
+    # Needs the display for convert_alpha
+    assets["screen"]
+    images = {"player": assets.player_img, "character": assets.character_img}
+    for weapon in WEAPONS:
+        images[weapon["name"]] = assets[WEAPON_IMAGES[weapon["name"]]]
+    return SpriteAtlas(images)
 
-class Tournament:
-    def __init__(self):
-        self.entries = []
-        self.rounds = []
-        self.current_round = 0
-        self.active_fight = None
-        self.winner = None
-        self.entry_fee = 10  # USD
-        self.prize_pool = 0
-        self.start_date = datetime.date.today()
-        
-        # Generate AI fighters
-        self.ai_names = ["Ragnar", "Bjorn", "Ivar", "Lagertha", "Floki", "Harald", "Erik", "Sigurd",
-                         "Gunnar", "Sven", "Olaf", "Torsten", "Ubbe", "Hvitserk", "Halfdan"]
-        
-        # Create player
-        self.player = Fighter("Player", is_player=True)
-        
-        # Create AI fighters
-        self.ai_fighters = [Fighter(name) for name in random.sample(self.ai_names, 7)]
-        self.all_fighters = [self.player] + self.ai_fighters
-        
-        # Setup tournament bracket
-        self.setup_bracket()
-    
-    def setup_bracket(self):
-        # Randomize the bracket
-        random.shuffle(self.all_fighters)
-        
-        # Create rounds (quarter-finals, semi-finals, final)
-        self.rounds = []
-        current_round = self.all_fighters.copy()
-        
-        while len(current_round) > 1:
-            next_round = []
-            matches = []
-            
-            # Pair up fighters
-            for i in range(0, len(current_round), 2):
-                if i+1 < len(current_round):
-                    matches.append((current_round[i], current_round[i+1]))
-            
-            self.rounds.append(matches)
-            current_round = next_round  # Will be populated with winners
+# Weapon image asset names, keyed by weapon name
+WEAPON_IMAGES = {"Sword": "sword_img", "Axe": "axe_img", "Spear": "spear_img"}
+
+# Everything below is created on first use, not at import
+assets = AssetRegistry()
+assets.register("pygame", pygame.init, "init")
+assets.register("screen", create_screen, "display")
+
+# Fonts
+assets.font("title_font", "arial", 64, bold=True)
+assets.font("large_font", "arial", 42, bold=True)
+assets.font("medium_font", "arial", 32)
+assets.font("small_font", "arial", 24)
+assets.font("tiny_font", "arial", 18)
+
+# In-memory images
+assets.image("character_img", lambda: create_character_surface(BLUE, (80, 120)))
+assets.image("player_img", lambda: create_character_surface(RED, (80, 120)))
+assets.image("sword_img", lambda: create_weapon_surface(GRAY, (40, 80), "sword"))
+assets.image("axe_img", lambda: create_weapon_surface(GRAY, (60, 60), "axe"))
+assets.image("spear_img", lambda: create_weapon_surface(GRAY, (30, 100), "spear"))
+assets.image("ad_img", create_ad_surface)
+
+# Fighter and weapon sprites in both facings, in the display's pixel format
+assets.register("sprites", create_sprites, "atlas")
+
+def blit_centered(surface, text, y):
+    return surface.blit(text, (SCREEN_WIDTH//2 - text.get_width()//2, y))
+
+def fighter_key(fighter, x=None):
+    # Everything draw_fighter depends on that changes during a bout
+    return (fighter.x if x is None else x, fighter.direction, fighter.attacking,
+            fighter.attack_frame if fighter.attacking else 0, fighter.health)
+
+def draw_fighter(screen, fighter, x=None):
+    # Returns the Rect covering everything drawn. x overrides fighter.x,
+    # e.g. with a position interpolated between simulation steps.
+    if x is None:
+        x = fighter.x
+    sprites = assets.sprites
+    char_img = sprites.get("player" if fighter.is_player else "character", fighter.direction)
+    weapon_img = sprites.get(fighter.weapon["name"], fighter.direction)
+    rects = []
     
-    def start_next_fight(self):
-        if self.current_round >= len(self.rounds):
-            return False  # Tournament finished
-        
-        current_matches = self.rounds[self.current_round]
-        
-        # Find next match that hasn't been fought
-        for match in current_matches:
-            if match[0].alive and match[1].alive:
-                self.active_fight = match
-                return True
-        
-        # If all matches in this round are done, move to next round
-        self.current_round += 1
-        
-        if self.current_round >= len(self.rounds):
-            # Tournament finished, determine winner
-            self.winner = self.get_tournament_winner()
-            return False
-        
-        return self.start_next_fight()
+    # Draw character
+    rects.append(screen.blit(char_img, (x, fighter.y)))
+    
+    # Draw weapon
+    weapon_x = x + (fighter.width//2 if fighter.direction == 1 else -weapon_img.get_width()//2)
+    weapon_y = fighter.y + 30
+    
+    if fighter.attacking:
+        # Animate attack
+        swing_offset = sprites.swing_at(fighter.attack_frame) * fighter.direction
+        rects.append(screen.blit(weapon_img, (weapon_x + swing_offset, weapon_y - 20)))
+    else:
+        rects.append(screen.blit(weapon_img, (weapon_x, weapon_y)))
+    
+    # Draw health bar
+    bar_width = 100
+    pygame.draw.rect(screen, DARK_RED, (x + fighter.width//2 - bar_width//2, fighter.y - 30, bar_width, 20))
+    pygame.draw.rect(screen, GREEN, (x + fighter.width//2 - bar_width//2, fighter.y - 30, 
+                                     bar_width * (fighter.health / fighter.max_health), 20))
+    rects.append(pygame.draw.rect(screen, WHITE, (x + fighter.width//2 - bar_width//2, fighter.y - 30, bar_width, 20), 2))
+    
+    # Draw name
+    name_text = render_text(assets.small_font, fighter.name, True, WHITE)
+    rects.append(screen.blit(name_text, (x + fighter.width//2 - name_text.get_width()//2, fighter.y - 55)))
     
-    def get_tournament_winner(self):
-        # Find the last fighter standing
-        for fighter in self.all_fighters:
-            if fighter.alive:
-                return fighter
-        return None
+    # Draw weapon info
+    weapon_text = render_text(assets.tiny_font, f"{fighter.weapon['name']} (Dmg: {fighter.weapon['damage']})", True, GOLD)
+    rects.append(screen.blit(weapon_text, (x + fighter.width//2 - weapon_text.get_width()//2, fighter.y - 80)))
+    return rects[0].unionall(rects[1:])
 
 class Game:
-    def __init__(self):
+    def __init__(self, retained=True, ledger=None, ad_source=None, replay_dir=None):
+        # retained=False repaints and flips the whole screen every frame.
+        # Balances live in the ledger; without one they are kept in memory.
+        # Ads come from ad_source (an ad server, or made locally by default).
+        # Finished tournaments are saved as replays in replay_dir if given.
+        self.ledger = ledger or Ledger(None)
+        self.ads = AdPipeline(ad_source or LocalAdSource(), on_impression=self.book_impression)
+        self.current_ad = None
+        self.profiler = FrameProfiler()
+        self.show_profile = False  # F3 toggles the overlay
+        self.renderer = DirtyRenderer(assets.screen, BACKGROUND, retained)
+        self.timestep = FixedTimestep(FPS)
+        self.speed_index = 0  # into SPEEDS, for fast-forwarding fights
+        self.previous_x = {}  # fighter -> x before the last step, for interpolation
         self.state = MAIN_MENU
         self.player_name = "Player"
-        self.player_cash = 0.0
-        self.free_games = 3
-        self.last_free_game_date = datetime.date.today()
-        self.ad_count = 0
+        self.entitlements = Entitlements(self.ledger)
+        self.open_wallet()
         self.tournament = None
-        self.owner_revenue = 0.0
+        self.bracket_view = None
+        self.recorder = None
+        self.replay_dir = replay_dir
+        self.last_replay = None
         self.withdraw_amount = 0.0
         self.game_result = ""
         self.tournament_result = ""
         self.ad_timer = 0
-        self.ad_set_count = 0
-        self.total_ads_watched = 0
         self.ads_enabled = True
     
+    @property
+    def player_cash(self):
+        return self.ledger["player_cash"] / 100
+    
+    @property
+    def owner_revenue(self):
+        return self.ledger["owner_revenue"] / 100
+    
+    @property
+    def free_games(self):
+        # Includes today's reset even before it is written to the ledger
+        return self.entitlements.balance()
+    
+    @property
+    def total_ads_watched(self):
+        return self.ledger["total_ads_watched"]
+    
+    @property
+    def ad_count(self):
+        return self.ledger["ad_count"]
+    
+    @property
+    def ad_set_count(self):
+        return self.ledger["ad_set_count"]
+    
     def start_tournament(self):
-        if self.free_games > 0:
-            self.free_games -= 1
-            self.tournament = Tournament()
-            self.tournament.prize_pool = len(self.tournament.all_fighters) * self.tournament.entry_fee
+        if self.entitlements.settle() > 0:
+            self.ledger.post("free_entry", {"free_games": -1})
+            self.new_tournament()
             self.state = TOURNAMENT
             return True
-        elif self.player_cash >= self.tournament.entry_fee:
-            self.player_cash -= self.tournament.entry_fee
-            self.tournament = Tournament()
-            self.tournament.prize_pool = len(self.tournament.all_fighters) * self.tournament.entry_fee
+        elif self.player_cash >= ENTRY_FEE:
+            self.ledger.post("entry_fee", {"player_cash": -cents(ENTRY_FEE)})
+            self.new_tournament()
             self.state = TOURNAMENT
             return True
         return False
     
+    def new_tournament(self):
+        # Seeded so the tournament can be replayed from its recording
+        seed = random.getrandbits(64)
+        self.tournament = new_tournament(seed)
+        self.tournament.prize_pool = len(self.tournament.all_fighters) * self.tournament.entry_fee
+        self.recorder = Recorder(seed)
+    
+    def start_fight(self):
+        self.recorder.record(START_FIGHT)
+        return self.tournament.start_next_fight()
+    
+    def player_input(self, action):
+        player = player_of(self.tournament.active_fight)
+        if player:
+            self.recorder.record(action)
+            apply_input(player, action, opponent_of(self.tournament.active_fight, player))
+    
     def watch_ad(self):
         if not self.ads_enabled:
             return
         
         self.state = AD_SCREEN
         self.ad_timer = 180  # 3 seconds at 60 FPS
-        self.ad_count += 1
-        self.total_ads_watched += 1
-        
-        # Owner gets ad revenue ($100 to $2200 CPM)
-        cpm = random.uniform(100, 2200)
-        self.owner_revenue += cpm / 1000  # Revenue per ad view
-        
-        # After 3 ads, give 3 free games
-        if self.ad_count % 3 == 0:
-            self.free_games += 3
-            self.ad_set_count += 1
-    
-    def update_free_games(self):
-        today = datetime.date.today()
-        if today > self.last_free_game_date:
-            days_passed = (today - self.last_free_game_date).days
-            if days_passed > 0:
-                self.free_games = 3  # Reset to 3 free games
-                self.last_free_game_date = today
+        
+        # Show the next prefetched ad; the house ad if none has arrived yet.
+        # Revenue is booked off the main thread once the impression is reported.
+        self.current_ad = self.ads.next_ad()
+        if self.current_ad:
+            self.ads.record_impression(self.current_ad)
+        delta = {"ad_count": 1, "total_ads_watched": 1}
+        
+        # After 3 ads, give 3 free games, on top of today's reset if it is
+        # still pending
+        if (self.ad_count + 1) % 3 == 0:
+            delta["free_games"] = 3
+            delta["ad_set_count"] = 1
+            self.entitlements.settle()
+        self.ledger.post("ad_view", delta, ad=self.current_ad and self.current_ad.id)
+    
+    def book_impression(self, impression):
+        # Owner gets ad revenue at the impression's booked CPM
+        self.ledger.post("impression", {"owner_revenue": cents(impression["cpm"] / 1000)},
+                         ad=impression["id"], cpm=impression["cpm"])
+    
+    def open_wallet(self):
+        # Ledgers from before resets were timestamped count from the local
+        # midnight that started their last reset day
+        if self.ledger.state.get("last_free_reset") is None and self.ledger.state.get("last_free_game_date"):
+            day = datetime.date.fromisoformat(self.ledger["last_free_game_date"])
+            stamp = datetime.datetime.combine(day, datetime.time()).timestamp()
+            self.ledger.post("open", set={"last_free_reset": stamp})
+        self.entitlements.open()
     
     def withdraw_cash(self, amount):
         if amount <= self.player_cash:
-            self.player_cash -= amount
+            self.ledger.post("withdrawal", {"player_cash": -cents(amount)})
             self.withdraw_amount = amount
             return True
         return False
     
+    def update(self):
+        # One fixed simulation step
+        if self.state == FIGHT and self.tournament.active_fight:
+            fighter1, fighter2 = self.tournament.active_fight
+            self.previous_x[fighter1] = fighter1.x
+            self.previous_x[fighter2] = fighter2.x
+            
+            # Advance the bout and check if it is over
+            self.recorder.tick()
+            if step_fight(fighter1, fighter2):
+                self.end_fight()
+        
+        # Ad screen timer
+        elif self.state == AD_SCREEN:
+            self.ad_timer -= 1
+            if self.ad_timer <= 0:
+                self.state = MAIN_MENU
+    
+    def skip_fight(self):
+        # Jump straight to the result of an AI-vs-AI bout
+        fighter1, fighter2 = self.tournament.active_fight
+        if fighter1.is_player or fighter2.is_player:
+            return
+        self.recorder.record(SKIP_FIGHT)
+        resolve_fight_events(fighter1, fighter2, autopilot=False)
+        self.end_fight()
+    
+    def end_fight(self):
+        self.tournament.finish_fight()
+        self.state = TOURNAMENT
+        if self.bracket_view:
+            self.bracket_view.focus(self.tournament.bracket.next_match())
+        
+        # Check if tournament is over
+        if self.tournament.winner:
+            replay = self.save_replay()
+            if self.tournament.winner.is_player:
+                self.ledger.post("prize", {"player_cash": cents(self.tournament.prize_pool)},
+                                 replay=replay)
+                self.tournament_result = f"You won the tournament! Prize: ${self.tournament.prize_pool}"
+            else:
+                self.tournament_result = f"{self.tournament.winner.name} won the tournament"
+            self.state = RESULTS
+    
+    def save_replay(self):
+        # Keeps the finished tournament's replay; returns its file name
+        self.last_replay = self.recorder.finish(self.tournament)
+        name = f"{datetime.datetime.now():%Y%m%d-%H%M%S}-{self.last_replay.seed:016x}.varp"
+        if self.replay_dir:
+            self.last_replay.save(os.path.join(self.replay_dir, name))
+        return name
+    
     def run(self):
         running = True
+        clock = pygame.time.Clock()
         
+        profiler = self.profiler
         while running:
-            self.update_free_games()
+            profiler.begin_frame()
             
             # Event handling
-            for event in pygame.event.get():
-                if event.type == QUIT:
-                    running = False
-                
-                if event.type == KEYDOWN:
-                    if event.key == K_ESCAPE:
-                        if self.state in [FIGHT, AD_SCREEN]:
-                            self.state = TOURNAMENT
-                        elif self.state in [TOURNAMENT, CHARACTER_SELECT, RESULTS, WITHDRAW]:
-                            self.state = MAIN_MENU
-                        else:
-                            running = False
-                    
-                    # Main menu controls
-                    if self.state == MAIN_MENU:
-                        if event.key == K_1:
-                            self.state = CHARACTER_SELECT
-                        elif event.key == K_2:
-                            self.watch_ad()
-                        elif event.key == K_3:
-                            self.state = WITHDRAW
-                        elif event.key == K_4:
-                            running = False
-                    
-                    # Character select controls
-                    elif self.state == CHARACTER_SELECT:
-                        if event.key == K_RETURN:
-                            if self.start_tournament():
-                                self.state = TOURNAMENT
-                    
-                    # Tournament controls
-                    elif self.state == TOURNAMENT:
-                        if event.key == K_SPACE:
-                            if self.tournament.start_next_fight():
-                                self.state = FIGHT
-                    
-                    # Fight controls (player only)
-                    elif self.state == FIGHT and self.tournament.active_fight[0].is_player:
-                        if event.key == K_LEFT:
-                            self.tournament.active_fight[0].x -= 10
-                        elif event.key == K_RIGHT:
-                            self.tournament.active_fight[0].x += 10
-                        elif event.key == K_a:  # Attack
-                            if not self.tournament.active_fight[0].attacking:
-                                self.tournament.active_fight[0].attacking = True
-                                self.tournament.active_fight[0].attack_frame = 0
-                    
-                    # Results screen
-                    elif self.state == RESULTS:
-                        if event.key == K_RETURN:
-                            self.state = MAIN_MENU
-                    
-                    # Withdraw screen
-                    elif self.state == WITHDRAW:
-                        if event.key == K_RETURN:
-                            if self.withdraw_cash(min(2000, self.player_cash)):
-                                self.state = RESULTS
-                                self.game_result = f"Withdrew ${min(2000, self.player_cash):.2f} to PayPal"
+            with profiler.phase("events"):
+                running = self.handle_events()
             
-            # Game logic
-            if self.state == FIGHT and self.tournament.active_fight:
-                fighter1, fighter2 = self.tournament.active_fight
-                
-                # Update fighters
-                fighter1.update()
-                fighter2.update()
-                
-                # AI movement
-                if not fighter1.is_player:
-                    fighter1.move(fighter2)
-                if not fighter2.is_player:
-                    fighter2.move(fighter1)
-                
-                # Check if fight is over
-                if not fighter1.alive or not fighter2.alive:
-                    self.state = TOURNAMENT
-                    
-                    # Check if tournament is over
-                    if self.tournament.winner:
-                        if self.tournament.winner.is_player:
-                            self.player_cash += self.tournament.prize_pool
-                            self.tournament_result = f"You won the tournament! Prize: ${self.tournament.prize_pool}"
-                        else:
-                            self.tournament_result = f"{self.tournament.winner.name} won the tournament"
-                        self.state = RESULTS
-            
-            # Ad screen timer
-            if self.state == AD_SCREEN:
-                self.ad_timer -= 1
-                if self.ad_timer <= 0:
-                    self.state = MAIN_MENU
+            # Simulation runs in fixed steps, independent of the frame rate;
+            # only fights are fast-forwarded
+            with profiler.phase("update"):
+                self.timestep.speed = SPEEDS[self.speed_index] if self.state == FIGHT else 1
+                for _ in range(self.timestep.advance()):
+                    self.update()
             
             # Drawing
-            screen.fill((30, 30, 50))  # Dark blue background
+            with profiler.phase(DRAW_PHASES[self.state]):
+                if self.state == MAIN_MENU:
+                    self.draw_main_menu()
+                elif self.state == CHARACTER_SELECT:
+                    self.draw_character_select()
+                elif self.state == TOURNAMENT:
+                    self.draw_tournament()
+                elif self.state == FIGHT:
+                    self.draw_fight()
+                elif self.state == AD_SCREEN:
+                    self.draw_ad_screen()
+                elif self.state == RESULTS:
+                    self.draw_results()
+                elif self.state == WITHDRAW:
+                    self.draw_withdraw()
+                if self.show_profile:
+                    self.draw_profile()
             
-            if self.state == MAIN_MENU:
-                self.draw_main_menu()
-            elif self.state == CHARACTER_SELECT:
-                self.draw_character_select()
-            elif self.state == TOURNAMENT:
-                self.draw_tournament()
-            elif self.state == FIGHT:
-                self.draw_fight()
-            elif self.state == AD_SCREEN:
-                self.draw_ad_screen()
-            elif self.state == RESULTS:
-                self.draw_results()
-            elif self.state == WITHDRAW:
-                self.draw_withdraw()
-            
-            pygame.display.flip()
+            with profiler.phase("present"):
+                self.renderer.present()
+            profiler.end_frame()
             clock.tick(FPS)
         
+        self.ads.close()
+        self.ledger.close()
         pygame.quit()
-        sys.exit()
+    
+    def handle_events(self):
+        # Returns False once the game should quit
+        running = True
+        for event in pygame.event.get():
+            if event.type == QUIT:
+                running = False
+            elif event.type == MOUSEWHEEL and self.state == TOURNAMENT and self.bracket_view:
+                self.bracket_view.scroll(-40 * event.x, -40 * event.y)
+            
+            if event.type == KEYDOWN:
+                if event.key == K_ESCAPE:
+                    if self.state in [FIGHT, AD_SCREEN]:
+                        self.state = TOURNAMENT
+                    elif self.state in [TOURNAMENT, CHARACTER_SELECT, RESULTS, WITHDRAW]:
+                        self.state = MAIN_MENU
+                    else:
+                        running = False
+                elif event.key == K_F3:
+                    self.show_profile = not self.show_profile
+                
+                # Main menu controls
+                if self.state == MAIN_MENU:
+                    if event.key == K_1:
+                        self.state = CHARACTER_SELECT
+                    elif event.key == K_2:
+                        self.watch_ad()
+                    elif event.key == K_3:
+                        self.state = WITHDRAW
+                    elif event.key == K_4:
+                        running = False
+                
+                # Character select controls
+                elif self.state == CHARACTER_SELECT:
+                    if event.key == K_RETURN:
+                        if self.start_tournament():
+                            self.state = TOURNAMENT
+                
+                # Tournament controls
+                elif self.state == TOURNAMENT:
+                    if event.key == K_SPACE:
+                        if self.start_fight():
+                            self.state = FIGHT
+                            self.previous_x = {}
+                            self.timestep.reset()
+                    elif self.bracket_view:
+                        self.bracket_keys(event.key)
+                
+                # Fight speed controls
+                elif self.state == FIGHT and event.key == K_f:
+                    self.speed_index = (self.speed_index + 1) % len(SPEEDS)
+                elif self.state == FIGHT and event.key == K_s:
+                    self.skip_fight()
+                
+                # Fight controls (player only)
+                elif self.state == FIGHT:
+                    if event.key == K_LEFT:
+                        self.player_input(MOVE_LEFT)
+                    elif event.key == K_RIGHT:
+                        self.player_input(MOVE_RIGHT)
+                    elif event.key == K_a:  # Attack
+                        self.player_input(ATTACK)
+                
+                # Results screen
+                elif self.state == RESULTS:
+                    if event.key == K_RETURN:
+                        self.state = MAIN_MENU
+                
+                # Withdraw screen
+                elif self.state == WITHDRAW:
+                    if event.key == K_RETURN:
+                        if self.withdraw_cash(min(2000, self.player_cash)):
+                            self.state = RESULTS
+                            self.game_result = f"Withdrew ${self.withdraw_amount:.2f} to PayPal"
+        return running
+    
+    def bracket_keys(self, key):
+        view = self.bracket_view
+        if key in (K_UP, K_DOWN, K_LEFT, K_RIGHT):
+            view.scroll({K_LEFT: -120, K_RIGHT: 120}.get(key, 0), {K_UP: -120, K_DOWN: 120}.get(key, 0))
+        elif key in (K_EQUALS, K_PLUS, K_KP_PLUS):
+            view.zoom_by(1)
+        elif key in (K_MINUS, K_KP_MINUS):
+            view.zoom_by(-1)
+        elif key == K_HOME:
+            view.focus(self.tournament.bracket.next_match())
+    
+    def text_widget(self, name, font, text, color, y, x=None):
+        # A line of text that is only repainted when it changes; x=None
+        # centres it horizontally
+        def paint(surface):
+            rendered = render_text(font, text, True, color)
+            if x is None:
+                return blit_centered(surface, rendered, y)
+            return surface.blit(rendered, (x, y))
+        self.renderer.widget(name, (text, color), paint)
+    
+    def draw_profile(self):
+        # Frame-time overlay, refreshed twice a second
+        def paint(surface):
+            lines = self.profiler.report_lines()
+            rendered = [render_text(assets.tiny_font, line, True, WHITE) for line in lines]
+            width = max(text.get_width() for text in rendered) + 20
+            panel = pygame.Rect(SCREEN_WIDTH - width - 10, 10, width, 20 * len(rendered) + 10)
+            surface.fill((0, 0, 0), panel)
+            for i, text in enumerate(rendered):
+                surface.blit(text, (panel.x + 10, panel.y + 5 + 20 * i))
+            return panel
+        self.renderer.widget("profile", self.profiler.frames // (FPS // 2), paint)
     
     def draw_main_menu(self):
-        # Title
-        title = title_font.render("VIKING ARENA", True, GOLD)
-        subtitle = large_font.render("Tournament of Valor", True, RED)
-        screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
-        screen.blit(subtitle, (SCREEN_WIDTH//2 - subtitle.get_width()//2, 130))
+        entry_fee = self.tournament.entry_fee if self.tournament else ENTRY_FEE
+        prize_pool = self.tournament.prize_pool if self.tournament else 80
+        self.renderer.begin_screen((MAIN_MENU, entry_fee, prize_pool),
+                                   lambda surface: self.paint_main_menu(surface, entry_fee, prize_pool))
         
         # Stats
-        cash_text = medium_font.render(f"Cash: ${self.player_cash:.2f}", True, GREEN)
-        free_text = medium_font.render(f"Free Games: {self.free_games}", True, BLUE)
-        ads_text = small_font.render(f"Ads Watched: {self.total_ads_watched} (Sets: {self.ad_set_count})", True, WHITE)
-        revenue_text = small_font.render(f"Owner Revenue: ${self.owner_revenue:.2f}", True, GOLD)
-        
-        screen.blit(cash_text, (50, 200))
-        screen.blit(free_text, (50, 250))
-        screen.blit(ads_text, (50, 300))
-        screen.blit(revenue_text, (50, 330))
+        self.text_widget("cash", assets.medium_font, f"Cash: ${self.player_cash:.2f}", GREEN, 200, 50)
+        self.text_widget("free", assets.medium_font, f"Free Games: {self.free_games}", BLUE, 250, 50)
+        self.text_widget("ads", assets.small_font, f"Ads Watched: {self.total_ads_watched} (Sets: {self.ad_set_count})", WHITE, 300, 50)
+        self.text_widget("revenue", assets.small_font, f"Owner Revenue: ${self.owner_revenue:.2f}", GOLD, 330, 50)
+    
+    def paint_main_menu(self, surface, entry_fee, prize_pool):
+        # Title
+        title = render_text(assets.title_font, "VIKING ARENA", True, GOLD)
+        subtitle = render_text(assets.large_font, "Tournament of Valor", True, RED)
+        surface.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
+        surface.blit(subtitle, (SCREEN_WIDTH//2 - subtitle.get_width()//2, 130))
         
         # Tournament info
-        tourney_text = medium_font.render("Monthly Tournament", True, WHITE)
-        fee_text = medium_font.render(f"Entry Fee: ${self.tournament.entry_fee if self.tournament else 10}", True, WHITE)
-        prize_text = medium_font.render(f"Prize Pool: ${self.tournament.prize_pool if self.tournament else 80}", True, GOLD)
+        tourney_text = render_text(assets.medium_font, "Monthly Tournament", True, WHITE)
+        fee_text = render_text(assets.medium_font, f"Entry Fee: ${entry_fee}", True, WHITE)
+        prize_text = render_text(assets.medium_font, f"Prize Pool: ${prize_pool}", True, GOLD)
         
-        screen.blit(tourney_text, (SCREEN_WIDTH//2 - tourney_text.get_width()//2, 400))
-        screen.blit(fee_text, (SCREEN_WIDTH//2 - fee_text.get_width()//2, 450))
-        screen.blit(prize_text, (SCREEN_WIDTH//2 - prize_text.get_width()//2, 500))
+        surface.blit(tourney_text, (SCREEN_WIDTH//2 - tourney_text.get_width()//2, 400))
+        surface.blit(fee_text, (SCREEN_WIDTH//2 - fee_text.get_width()//2, 450))
+        surface.blit(prize_text, (SCREEN_WIDTH//2 - prize_text.get_width()//2, 500))
         
         # Menu options
-        pygame.draw.rect(screen, DARK_RED, (SCREEN_WIDTH//2 - 150, 550, 300, 50), border_radius=10)
-        option1 = medium_font.render("1. Join Tournament", True, WHITE)
-        screen.blit(option1, (SCREEN_WIDTH//2 - option1.get_width()//2, 560))
+        pygame.draw.rect(surface, DARK_RED, (SCREEN_WIDTH//2 - 150, 550, 300, 50), border_radius=10)
+        option1 = render_text(assets.medium_font, "1. Join Tournament", True, WHITE)
+        surface.blit(option1, (SCREEN_WIDTH//2 - option1.get_width()//2, 560))
         
-        pygame.draw.rect(screen, DARK_RED, (SCREEN_WIDTH//2 - 150, 610, 300, 50), border_radius=10)
-        option2 = medium_font.render("2. Watch Ads (Get 3 Free Games)", True, WHITE)
-        screen.blit(option2, (SCREEN_WIDTH//2 - option2.get_width()//2, 620))
+        pygame.draw.rect(surface, DARK_RED, (SCREEN_WIDTH//2 - 150, 610, 300, 50), border_radius=10)
+        option2 = render_text(assets.medium_font, "2. Watch Ads (Get 3 Free Games)", True, WHITE)
+        surface.blit(option2, (SCREEN_WIDTH//2 - option2.get_width()//2, 620))
         
         # Additional options
-        pygame.draw.rect(screen, DARK_RED, (SCREEN_WIDTH - 250, 20, 230, 40), border_radius=5)
-        withdraw_opt = small_font.render("3. Withdraw Cash", True, WHITE)
-        screen.blit(withdraw_opt, (SCREEN_WIDTH - 240, 28))
+        pygame.draw.rect(surface, DARK_RED, (SCREEN_WIDTH - 250, 20, 230, 40), border_radius=5)
+        withdraw_opt = render_text(assets.small_font, "3. Withdraw Cash", True, WHITE)
+        surface.blit(withdraw_opt, (SCREEN_WIDTH - 240, 28))
         
-        pygame.draw.rect(screen, DARK_RED, (SCREEN_WIDTH - 250, 70, 230, 40), border_radius=5)
-        quit_opt = small_font.render("4. Quit Game", True, WHITE)
-        screen.blit(quit_opt, (SCREEN_WIDTH - 240, 78))
+        pygame.draw.rect(surface, DARK_RED, (SCREEN_WIDTH - 250, 70, 230, 40), border_radius=5)
+        quit_opt = render_text(assets.small_font, "4. Quit Game", True, WHITE)
+        surface.blit(quit_opt, (SCREEN_WIDTH - 240, 78))
         
         # Help text
-        help_text = small_font.render("Press ESC to exit current screen", True, GRAY)
-        screen.blit(help_text, (SCREEN_WIDTH//2 - help_text.get_width()//2, SCREEN_HEIGHT - 40))
+        help_text = render_text(assets.small_font, "Press ESC to exit current screen", True, GRAY)
+        surface.blit(help_text, (SCREEN_WIDTH//2 - help_text.get_width()//2, SCREEN_HEIGHT - 40))
     
     def draw_character_select(self):
+        self.renderer.begin_screen((CHARACTER_SELECT, self.player_name), self.paint_character_select)
+    
+    def paint_character_select(self, surface):
         # Title
-        title = large_font.render("SELECT YOUR FIGHTER", True, GOLD)
-        screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
+        title = render_text(assets.large_font, "SELECT YOUR FIGHTER", True, GOLD)
+        surface.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
         
         # Player info
-        player_text = medium_font.render(f"Player: {self.player_name}", True, RED)
-        screen.blit(player_text, (SCREEN_WIDTH//2 - player_text.get_width()//2, 120))
+        player_text = render_text(assets.medium_font, f"Player: {self.player_name}", True, RED)
+        surface.blit(player_text, (SCREEN_WIDTH//2 - player_text.get_width()//2, 120))
         
         # Weapon selection
-        weapon_text = medium_font.render("Choose Your Weapon:", True, WHITE)
-        screen.blit(weapon_text, (SCREEN_WIDTH//2 - weapon_text.get_width()//2, 180))
+        weapon_text = render_text(assets.medium_font, "Choose Your Weapon:", True, WHITE)
+        surface.blit(weapon_text, (SCREEN_WIDTH//2 - weapon_text.get_width()//2, 180))
         
         # Draw weapons
         y_pos = 250
         for i, weapon in enumerate(WEAPONS):
-            pygame.draw.rect(screen, (50, 50, 70), (SCREEN_WIDTH//2 - 150, y_pos, 300, 80), border_radius=10)
-            name_text = medium_font.render(weapon["name"], True, GOLD)
-            stats_text = small_font.render(f"Damage: {weapon['damage']} | Speed: {weapon['speed']} | Range: {weapon['range']}", True, WHITE)
+            pygame.draw.rect(surface, (50, 50, 70), (SCREEN_WIDTH//2 - 150, y_pos, 300, 80), border_radius=10)
+            name_text = render_text(assets.medium_font, weapon["name"], True, GOLD)
+            stats_text = render_text(assets.small_font, f"Damage: {weapon['damage']} | Speed: {weapon['speed']} | Range: {weapon['range']}", True, WHITE)
             
-            screen.blit(name_text, (SCREEN_WIDTH//2 - name_text.get_width()//2, y_pos + 10))
-            screen.blit(stats_text, (SCREEN_WIDTH//2 - stats_text.get_width()//2, y_pos + 50))
-            screen.blit(weapon["img"], (SCREEN_WIDTH//2 - 170, y_pos + 10))
+            surface.blit(name_text, (SCREEN_WIDTH//2 - name_text.get_width()//2, y_pos + 10))
+            surface.blit(stats_text, (SCREEN_WIDTH//2 - stats_text.get_width()//2, y_pos + 50))
+            surface.blit(assets[WEAPON_IMAGES[weapon["name"]]], (SCREEN_WIDTH//2 - 170, y_pos + 10))
             
             y_pos += 100
         
         # Start button
-        pygame.draw.rect(screen, GREEN, (SCREEN_WIDTH//2 - 100, y_pos, 200, 50), border_radius=10)
-        start_text = medium_font.render("START TOURNAMENT", True, WHITE)
-        screen.blit(start_text, (SCREEN_WIDTH//2 - start_text.get_width()//2, y_pos + 10))
+        pygame.draw.rect(surface, GREEN, (SCREEN_WIDTH//2 - 100, y_pos, 200, 50), border_radius=10)
+        start_text = render_text(assets.medium_font, "START TOURNAMENT", True, WHITE)
+        surface.blit(start_text, (SCREEN_WIDTH//2 - start_text.get_width()//2, y_pos + 10))
         
         # Help text
-        help_text = medium_font.render("Press ENTER to start tournament", True, GRAY)
-        screen.blit(help_text, (SCREEN_WIDTH//2 - help_text.get_width()//2, SCREEN_HEIGHT - 100))
+        help_text = render_text(assets.medium_font, "Press ENTER to start tournament", True, GRAY)
+        surface.blit(help_text, (SCREEN_WIDTH//2 - help_text.get_width()//2, SCREEN_HEIGHT - 100))
         
-        help_text2 = small_font.render("ESC to return to main menu", True, GRAY)
-        screen.blit(help_text2, (SCREEN_WIDTH//2 - help_text2.get_width()//2, SCREEN_HEIGHT - 50))
+        help_text2 = render_text(assets.small_font, "ESC to return to main menu", True, GRAY)
+        surface.blit(help_text2, (SCREEN_WIDTH//2 - help_text2.get_width()//2, SCREEN_HEIGHT - 50))
     
     def draw_tournament(self):
+        # The bracket view keeps its own slot surfaces and only draws what is
+        # in its viewport, so this costs the same for any field size
+        if self.bracket_view is None or self.bracket_view.tournament is not self.tournament:
+            self.bracket_view = BracketView(self.tournament, (20, 70, SCREEN_WIDTH - 40, SCREEN_HEIGHT - 200),
+                                            assets.small_font, assets.small_font, BACKGROUND, render_text)
+        self.renderer.begin_screen((TOURNAMENT, self.tournament, self.tournament.active_fight is not None),
+                                   self.paint_tournament)
+        self.renderer.widget("bracket", self.bracket_view.key(), self.bracket_view.draw)
+    
+    def paint_tournament(self, surface):
         # Title
-        title = large_font.render("TOURNAMENT BRACKET", True, GOLD)
-        screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 20))
-        
-        # Round labels
-        round_labels = ["Quarter-Finals", "Semi-Finals", "Finals"]
-        
-        # Draw bracket
-        bracket_width = SCREEN_WIDTH - 100
-        bracket_height = SCREEN_HEIGHT - 150
-        start_x = 50
-        start_y = 80
-        
-        # Draw rounds
-        round_width = bracket_width // 3
-        for round_idx in range(3):
-            # Round label
-            round_text = medium_font.render(round_labels[round_idx], True, WHITE)
-            screen.blit(round_text, (start_x + round_idx * round_width + round_width//2 - round_text.get_width()//2, start_y - 40))
-            
-            # Matches in this round
-            match_height = bracket_height / 4
-            for match_idx in range(4 // (2 ** round_idx)):
-                y_pos = start_y + match_idx * match_height * (2 ** round_idx) + match_height * (2 ** round_idx - 1) / 2
-                
-                # Draw match slot
-                pygame.draw.rect(screen, (40, 40, 60), 
-                                (start_x + round_idx * round_width, y_pos - 20, round_width - 20, 40), 
-                                border_radius=5)
-                
-                # Draw fighter names if available
-                if round_idx < len(self.tournament.rounds) and match_idx < len(self.tournament.rounds[round_idx]):
-                    fighter1, fighter2 = self.tournament.rounds[round_idx][match_idx]
-                    
-                    # Fighter 1
-                    f1_color = RED if fighter1.is_player else WHITE
-                    f1_text = small_font.render(fighter1.name, True, f1_color)
-                    screen.blit(f1_text, (start_x + round_idx * round_width + 10, y_pos - 15))
-                    
-                    # Fighter 2
-                    f2_color = RED if fighter2.is_player else WHITE
-                    f2_text = small_font.render(fighter2.name, True, f2_color)
-                    screen.blit(f2_text, (start_x + round_idx * round_width + 10, y_pos + 5))
-                    
-                    # Winner indicator
-                    if not fighter1.alive or not fighter2.alive:
-                        winner = fighter1 if fighter1.alive else fighter2
-                        win_text = small_font.render("WINNER" if winner.alive else "DEAD", True, GREEN if winner.alive else RED)
-                        screen.blit(win_text, (start_x + round_idx * round_width + round_width - 90, y_pos - 5))
+        title = render_text(assets.large_font, "TOURNAMENT BRACKET", True, GOLD)
+        surface.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 20))
         
         # Current fight indicator
         if self.tournament.active_fight:
-            fight_text = medium_font.render("FIGHT IN PROGRESS", True, RED)
-            screen.blit(fight_text, (SCREEN_WIDTH//2 - fight_text.get_width()//2, SCREEN_HEIGHT - 100))
+            fight_text = render_text(assets.medium_font, "FIGHT IN PROGRESS", True, RED)
+            surface.blit(fight_text, (SCREEN_WIDTH//2 - fight_text.get_width()//2, SCREEN_HEIGHT - 100))
         
         # Start fight button
-        pygame.draw.rect(screen, GREEN, (SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT - 60, 200, 40), border_radius=10)
-        fight_text = medium_font.render("START FIGHT", True, WHITE)
-        screen.blit(fight_text, (SCREEN_WIDTH//2 - fight_text.get_width()//2, SCREEN_HEIGHT - 55))
+        pygame.draw.rect(surface, GREEN, (SCREEN_WIDTH//2 - 100, SCREEN_HEIGHT - 60, 200, 40), border_radius=10)
+        fight_text = render_text(assets.medium_font, "START FIGHT", True, WHITE)
+        surface.blit(fight_text, (SCREEN_WIDTH//2 - fight_text.get_width()//2, SCREEN_HEIGHT - 55))
         
         # Help text
-        help_text = small_font.render("Press SPACE to start next fight", True, GRAY)
-        screen.blit(help_text, (SCREEN_WIDTH//2 - help_text.get_width()//2, SCREEN_HEIGHT - 120))
+        help_text = render_text(assets.small_font, "SPACE: next fight   Arrows: scroll   +/-: zoom   HOME: next match", True, GRAY)
+        surface.blit(help_text, (SCREEN_WIDTH//2 - help_text.get_width()//2, SCREEN_HEIGHT - 125))
     
     def draw_fight(self):
+        fighter1, fighter2 = self.tournament.active_fight
+        self.renderer.begin_screen((FIGHT, self.tournament.active_fight), self.paint_fight)
+        
+        # Draw fighters, interpolated between the last two simulation steps
+        x1, x2 = self.render_x(fighter1), self.render_x(fighter2)
+        self.renderer.widget("fighter1", fighter_key(fighter1, x1), lambda surface: draw_fighter(surface, fighter1, x1))
+        self.renderer.widget("fighter2", fighter_key(fighter2, x2), lambda surface: draw_fighter(surface, fighter2, x2))
+        
+        # Fight speed
+        speed = SPEEDS[self.speed_index]
+        self.text_widget("speed", assets.small_font, f"Speed: {speed}x  |  F: fast-forward  S: skip AI fight", WHITE, SCREEN_HEIGHT - 40)
+        
+        # Fight status
+        if not fighter1.alive:
+            self.text_widget("status", assets.large_font, f"{fighter2.name} WINS!", GREEN, 60)
+        elif not fighter2.alive:
+            self.text_widget("status", assets.large_font, f"{fighter1.name} WINS!", GREEN, 60)
+    
+    def render_x(self, fighter):
+        previous = self.previous_x.get(fighter, fighter.x)
+        return round(lerp(previous, fighter.x, self.timestep.alpha))
+    
+    def paint_fight(self, surface):
         # Background
-        pygame.draw.rect(screen, (20, 60, 30), (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT - GROUND_HEIGHT))  # Sky
-        pygame.draw.rect(screen, (100, 70, 40), (0, SCREEN_HEIGHT - GROUND_HEIGHT, SCREEN_WIDTH, GROUND_HEIGHT))  # Ground
+        pygame.draw.rect(surface, (20, 60, 30), (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT - GROUND_HEIGHT))  # Sky
+        pygame.draw.rect(surface, (100, 70, 40), (0, SCREEN_HEIGHT - GROUND_HEIGHT, SCREEN_WIDTH, GROUND_HEIGHT))  # Ground
         
         # Draw arena details
-        pygame.draw.circle(screen, (150, 150, 150), (SCREEN_WIDTH//2, SCREEN_HEIGHT - GROUND_HEIGHT//2), 200, 5)
-        
-        # Draw fighters
-        if self.tournament.active_fight:
-            fighter1, fighter2 = self.tournament.active_fight
-            fighter1.draw(screen)
-            fighter2.draw(screen)
-            
-            # Position fighters
-            fighter1.x = SCREEN_WIDTH//4 - 40
-            fighter2.x = SCREEN_WIDTH*3//4 - 40
-            
-            # Ensure fighters don't go off screen
-            fighter1.x = max(50, min(fighter1.x, SCREEN_WIDTH//2 - 100))
-            fighter2.x = max(SCREEN_WIDTH//2 + 50, min(fighter2.x, SCREEN_WIDTH - 150))
+        pygame.draw.circle(surface, (150, 150, 150), (SCREEN_WIDTH//2, SCREEN_HEIGHT - GROUND_HEIGHT//2), 200, 5)
         
         # Controls info for player
         if self.tournament.active_fight[0].is_player or self.tournament.active_fight[1].is_player:
-            controls_text = small_font.render("Player Controls: Arrow Keys to move, A to attack", True, WHITE)
-            screen.blit(controls_text, (SCREEN_WIDTH//2 - controls_text.get_width()//2, 20))
-        
-        # Fight status
-        if not self.tournament.active_fight[0].alive:
-            status_text = large_font.render(f"{self.tournament.active_fight[1].name} WINS!", True, GREEN)
-            screen.blit(status_text, (SCREEN_WIDTH//2 - status_text.get_width()//2, 60))
-        elif not self.tournament.active_fight[1].alive:
-            status_text = large_font.render(f"{self.tournament.active_fight[0].name} WINS!", True, GREEN)
-            screen.blit(status_text, (SCREEN_WIDTH//2 - status_text.get_width()//2, 60))
+            controls_text = render_text(assets.small_font, "Player Controls: Arrow Keys to move, A to attack", True, WHITE)
+            surface.blit(controls_text, (SCREEN_WIDTH//2 - controls_text.get_width()//2, 20))
     
     def draw_ad_screen(self):
-        # Title
-        title = large_font.render("HIGH VALUE ADVERTISEMENT", True, GOLD)
-        screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 30))
-        
-        # Ad display
-        pygame.draw.rect(screen, (20, 20, 40), (50, 100, SCREEN_WIDTH - 100, SCREEN_HEIGHT - 200))
-        screen.blit(ad_img, (50, 100))
+        ad = self.current_ad
+        self.renderer.begin_screen((AD_SCREEN, ad and ad.id), self.paint_ad_screen)
         
-        # Ad info
-        cpm = random.randint(100, 2200)
-        info_text = medium_font.render(f"CPM: ${cpm} | eCPM: ${cpm}", True, GREEN)
-        screen.blit(info_text, (SCREEN_WIDTH//2 - info_text.get_width()//2, SCREEN_HEIGHT - 180))
+        # Ad info, at the CPM this impression was booked for
+        if ad:
+            self.text_widget("cpm", assets.medium_font, f"CPM: ${ad.cpm:.2f} | eCPM: ${ad.cpm:.2f}", GREEN, SCREEN_HEIGHT - 180)
+        else:
+            self.text_widget("cpm", assets.medium_font, "House ad", GRAY, SCREEN_HEIGHT - 180)
         
         # Timer
         time_left = self.ad_timer // 60 + 1
-        timer_text = large_font.render(f"Ad ends in: {time_left}", True, RED)
-        screen.blit(timer_text, (SCREEN_WIDTH//2 - timer_text.get_width()//2, SCREEN_HEIGHT - 120))
+        self.text_widget("timer", assets.large_font, f"Ad ends in: {time_left}", RED, SCREEN_HEIGHT - 120)
+    
+    def paint_ad_screen(self, surface):
+        # Title
+        title = render_text(assets.large_font, "HIGH VALUE ADVERTISEMENT", True, GOLD)
+        surface.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 30))
+        
+        # Ad display
+        pygame.draw.rect(surface, (20, 20, 40), (50, 100, SCREEN_WIDTH - 100, SCREEN_HEIGHT - 200))
+        if self.current_ad:
+            surface.blit(self.current_ad.surface, (50, 100))
+            advertiser = render_text(assets.large_font, self.current_ad.title, True, WHITE)
+            blit_centered(surface, advertiser, SCREEN_HEIGHT//2 - advertiser.get_height()//2)
+        else:
+            surface.blit(assets.ad_img, (50, 100))
         
         # Reward info
-        reward_text = medium_font.render("After 3 ads, you'll receive 3 free tournament entries", True, BLUE)
-        screen.blit(reward_text, (SCREEN_WIDTH//2 - reward_text.get_width()//2, SCREEN_HEIGHT - 70))
+        reward_text = render_text(assets.medium_font, "After 3 ads, you'll receive 3 free tournament entries", True, BLUE)
+        surface.blit(reward_text, (SCREEN_WIDTH//2 - reward_text.get_width()//2, SCREEN_HEIGHT - 70))
     
     def draw_results(self):
+        prize_pool = self.tournament.prize_pool if self.tournament else 0
+        self.renderer.begin_screen((RESULTS, self.tournament_result, self.game_result, prize_pool),
+                                   lambda surface: self.paint_results(surface, prize_pool))
+        
+        # Player cash
+        self.text_widget("cash", assets.medium_font, f"Your Cash: ${self.player_cash:.2f}", GREEN, 350)
+    
+    def paint_results(self, surface, prize_pool):
         # Background
-        pygame.draw.rect(screen, (30, 20, 40), (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+        pygame.draw.rect(surface, (30, 20, 40), (0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
         
         # Title
-        title = large_font.render("TOURNAMENT RESULTS", True, GOLD)
-        screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
+        title = render_text(assets.large_font, "TOURNAMENT RESULTS", True, GOLD)
+        surface.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
         
         # Result text
-        result_text = large_font.render(self.tournament_result, True, GREEN if "You won" in self.tournament_result else RED)
-        screen.blit(result_text, (SCREEN_WIDTH//2 - result_text.get_width()//2, 150))
+        result_text = render_text(assets.large_font, self.tournament_result, True, GREEN if "You won" in self.tournament_result else RED)
+        surface.blit(result_text, (SCREEN_WIDTH//2 - result_text.get_width()//2, 150))
         
         # Game result (for withdrawals)
         if self.game_result:
-            game_text = medium_font.render(self.game_result, True, BLUE)
-            screen.blit(game_text, (SCREEN_WIDTH//2 - game_text.get_width()//2, 220))
+            game_text = render_text(assets.medium_font, self.game_result, True, BLUE)
+            surface.blit(game_text, (SCREEN_WIDTH//2 - game_text.get_width()//2, 220))
         
         # Prize info
-        prize_text = medium_font.render(f"Prize Pool: ${self.tournament.prize_pool}", True, GOLD)
-        screen.blit(prize_text, (SCREEN_WIDTH//2 - prize_text.get_width()//2, 300))
-        
-        # Player cash
-        cash_text = medium_font.render(f"Your Cash: ${self.player_cash:.2f}", True, GREEN)
-        screen.blit(cash_text, (SCREEN_WIDTH//2 - cash_text.get_width()//2, 350))
+        prize_text = render_text(assets.medium_font, f"Prize Pool: ${prize_pool}", True, GOLD)
+        surface.blit(prize_text, (SCREEN_WIDTH//2 - prize_text.get_width()//2, 300))
         
         # Continue button
-        pygame.draw.rect(screen, GREEN, (SCREEN_WIDTH//2 - 100, 450, 200, 50), border_radius=10)
-        continue_text = medium_font.render("CONTINUE", True, WHITE)
-        screen.blit(continue_text, (SCREEN_WIDTH//2 - continue_text.get_width()//2, 460))
+        pygame.draw.rect(surface, GREEN, (SCREEN_WIDTH//2 - 100, 450, 200, 50), border_radius=10)
+        continue_text = render_text(assets.medium_font, "CONTINUE", True, WHITE)
+        surface.blit(continue_text, (SCREEN_WIDTH//2 - continue_text.get_width()//2, 460))
         
         # Help text
-        help_text = small_font.render("Press ENTER to return to main menu", True, GRAY)
-        screen.blit(help_text, (SCREEN_WIDTH//2 - help_text.get_width()//2, SCREEN_HEIGHT - 50))
+        help_text = render_text(assets.small_font, "Press ENTER to return to main menu", True, GRAY)
+        surface.blit(help_text, (SCREEN_WIDTH//2 - help_text.get_width()//2, SCREEN_HEIGHT - 50))
     
     def draw_withdraw(self):
-        # Title
-        title = large_font.render("WITHDRAW EARNINGS", True, GOLD)
-        screen.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
+        self.renderer.begin_screen((WITHDRAW,), self.paint_withdraw)
         
         # Player cash
-        cash_text = large_font.render(f"Available: ${self.player_cash:.2f}", True, GREEN)
-        screen.blit(cash_text, (SCREEN_WIDTH//2 - cash_text.get_width()//2, 150))
+        self.text_widget("cash", assets.large_font, f"Available: ${self.player_cash:.2f}", GREEN, 150)
         
         # Max withdrawal
         max_withdraw = min(2000, self.player_cash)
-        max_text = medium_font.render(f"Max Withdrawal: ${max_withdraw:.2f}", True, WHITE)
-        screen.blit(max_text, (SCREEN_WIDTH//2 - max_text.get_width()//2, 220))
+        self.text_widget("max", assets.medium_font, f"Max Withdrawal: ${max_withdraw:.2f}", WHITE, 220)
+        
+        # Owner revenue
+        self.text_widget("revenue", assets.medium_font, f"Owner Revenue: ${self.owner_revenue:.2f}", GOLD, 480)
+    
+    def paint_withdraw(self, surface):
+        # Title
+        title = render_text(assets.large_font, "WITHDRAW EARNINGS", True, GOLD)
+        surface.blit(title, (SCREEN_WIDTH//2 - title.get_width()//2, 50))
         
         # Withdraw button
-        pygame.draw.rect(screen, GREEN, (SCREEN_WIDTH//2 - 150, 300, 300, 80), border_radius=10)
-        withdraw_text = large_font.render("WITHDRAW MAX", True, WHITE)
-        screen.blit(withdraw_text, (SCREEN_WIDTH//2 - withdraw_text.get_width()//2, 320))
+        pygame.draw.rect(surface, GREEN, (SCREEN_WIDTH//2 - 150, 300, 300, 80), border_radius=10)
+        withdraw_text = render_text(assets.large_font, "WITHDRAW MAX", True, WHITE)
+        surface.blit(withdraw_text, (SCREEN_WIDTH//2 - withdraw_text.get_width()//2, 320))
         
         # PayPal info
-        paypal_text = medium_font.render("Funds will be sent to your PayPal account", True, BLUE)
-        screen.blit(paypal_text, (SCREEN_WIDTH//2 - paypal_text.get_width()//2, 420))
-        
-        # Owner revenue
-        revenue_text = medium_font.render(f"Owner Revenue: ${self.owner_revenue:.2f}", True, GOLD)
-        screen.blit(revenue_text, (SCREEN_WIDTH//2 - revenue_text.get_width()//2, 480))
+        paypal_text = render_text(assets.medium_font, "Funds will be sent to your PayPal account", True, BLUE)
+        surface.blit(paypal_text, (SCREEN_WIDTH//2 - paypal_text.get_width()//2, 420))
         
         # Help text
-        help_text = small_font.render("Press ENTER to withdraw max amount ($2000 limit)", True, GRAY)
-        screen.blit(help_text, (SCREEN_WIDTH//2 - help_text.get_width()//2, SCREEN_HEIGHT - 100))
+        help_text = render_text(assets.small_font, "Press ENTER to withdraw max amount ($2000 limit)", True, GRAY)
+        surface.blit(help_text, (SCREEN_WIDTH//2 - help_text.get_width()//2, SCREEN_HEIGHT - 100))
         
-        help_text2 = small_font.render("ESC to return to main menu", True, GRAY)
-        screen.blit(help_text2, (SCREEN_WIDTH//2 - help_text2.get_width()//2, SCREEN_HEIGHT - 50))
+        help_text2 = render_text(assets.small_font, "ESC to return to main menu", True, GRAY)
+        surface.blit(help_text2, (SCREEN_WIDTH//2 - help_text2.get_width()//2, SCREEN_HEIGHT - 50))
+
+def main(argv):
+    parser = argparse.ArgumentParser(description="Viking Arena: Tournament of Valor")
+    parser.add_argument("--asset-bundle", help="load fonts and images from a pre-baked bundle")
+    parser.add_argument("--bake-assets", metavar="PATH", help="write an asset bundle and exit")
+    parser.add_argument("--ledger", default=DEFAULT_LEDGER, help="wallet and transaction log file")
+    parser.add_argument("--ad-server", metavar="URL", help="fetch ads from an ad server (see arena_ads.py)")
+    parser.add_argument("--profile", metavar="PATH", help="write frame timings (.csv or .json) on exit")
+    parser.add_argument("--replay-dir", default=DEFAULT_REPLAY_DIR, help="where finished tournaments are saved")
+    parser.add_argument("--startup-report", action="store_true", help="print asset load times")
+    args = parser.parse_args(argv)
+    
+    if args.bake_assets:
+        assets.bake(args.bake_assets)
+        print(f"Wrote asset bundle to {args.bake_assets}")
+        return
+    if args.asset_bundle:
+        assets.load_bundle(args.asset_bundle)
+    
+    ad_source = HttpAdSource(args.ad_server) if args.ad_server else None
+    game = Game(ledger=Ledger(args.ledger, archive=True), ad_source=ad_source, replay_dir=args.replay_dir)
+    if args.startup_report:
+        assets.preload()
+        print(assets.report())
+    game.run()
+    if args.profile:
+        game.profiler.export(args.profile)
 
 # Start the game
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    main(sys.argv[1:])